@@ -20,6 +20,13 @@ from src.handler.redis_handler import RedisHandler
 from src.handler.redis_stream_consumer import RedisStreamConsumer
 
 from service.ai.llm_manager import LLMManager
+from src.service.ai.rag_manager import RAGManager
+from src.service.ai.chat_state_manager import SessionStateCache
+from src.service.ai.chat_turn_actor import SessionTurnActor
+from src.service.ai.step_summary_queue import StepSummaryQueue
+from src.service.ai.turn_classifier import TurnClassifier, TurnDecisionLog
+from src.utils.chat_stream_utils import ChatHistoryCache
+from src.utils.contract_draft_utils import ContractDraftStore
 
 class LoggerConfig(BaseModel):
     level: str
@@ -51,6 +58,52 @@ class LLMConfig(BaseModel):
     provider: str           # "ollama" | "openai" | ...
     model: str              # "llama3.2" 등
 
+class RAGIndexConfig(BaseModel):
+    type: str = "flat"              # "flat" | "hnsw" | "ivfpq"
+    hnsw_m: int = 32
+    hnsw_ef_construction: int = 200
+    hnsw_ef_search: int = 64        # 검색 시점 파라미터
+    ivf_nlist: int = 256
+    ivf_nprobe: int = 16            # 검색 시점 파라미터
+    pq_m: int = 48
+    pq_nbits: int = 8
+    pq_refine_k_factor: int = 8     # 검색 시점 파라미터 (원본 벡터 재정렬 후보 배수)
+
+class RAGConfig(BaseModel):
+    reference_dir: str = "reference"
+    index_path: str = "faiss_index"
+    index: RAGIndexConfig = RAGIndexConfig()
+    min_score: float = 0.0          # 이 값 미만의 조항은 프롬프트에 넣지 않음 (코사인 유사도)
+    faq_min_similarity: float = 0.72  # FAQ 뱅크 매칭 최소 유사도 (문자 n-gram 코사인)
+    watch: bool = False             # reference/인덱스 변경 감지 시 자동 재로드
+    watch_debounce_ms: int = 2000
+
+class SessionCacheConfig(BaseModel):
+    max_entries: int = 1000         # 메모리에 유지할 최대 세션 수 (LRU)
+    idle_ttl_sec: float = 1800.0    # 마지막 접근 이후 유휴 시간
+    max_memory_mb: float = 64.0     # 직렬화 크기 기준 추정 메모리 상한
+    flush_after_ms: int = 500       # 턴 진행 중 지연된 상태 저장의 최대 지연 시간
+    role_inputs_max: int = 500      # 세션별 role_inputs 로그 최대 보관 개수
+    role_inputs_recent: int = 20    # 메모리에 유지할 역할별 최근 입력 수
+    cas_retries: int = 3            # 다른 워커와 저장이 충돌했을 때 rebase 후 재시도 횟수
+
+class ChatTurnConfig(BaseModel):
+    debounce_ms: int = 300          # 연속 메시지를 한 턴으로 합치는 대기 시간 (마지막 메시지 기준)
+    max_batch: int = 5              # 한 턴으로 합칠 최대 메시지 수
+    summary_wait_sec: float = 10.0  # 다음 턴이 백그라운드 단계 요약 반영을 기다리는 최대 시간
+
+class ChatHistoryConfig(BaseModel):
+    window: int = 20                # 세션별로 유지할 최근 대화 이력 라인 수
+    max_sessions: int = 1000        # 이력 버퍼/최신 초안을 메모리에 유지할 최대 세션 수 (LRU)
+    draft_ttl_sec: int = 2592000    # 마지막 저장 이후 계약서 초안(포인터/blob) 보관 기간 (0이면 만료 없음)
+
+class TurnClassifierConfig(BaseModel):
+    enabled: bool = True            # 학습된 모델이 있을 때 질문 감지/단계 진행 판단에 먼저 사용
+    model_dir: str = "turn_classifier"
+    min_confidence: float = 0.9     # max(p, 1-p)가 이 값 미만이면 LLM으로 넘김
+    decision_log: Optional[str] = None      # LLM 판단 학습 로그 경로 (None이면 기록 안 함)
+    decision_log_raw_text: bool = False     # 판단 로그에 사용자 원문 기록 (기본은 해시된 n-gram 특징만 기록)
+
 class AppConfig(BaseModel):
     # 상위 항목 직접 정의
     environment: str
@@ -73,6 +126,11 @@ class AppConfig(BaseModel):
 
     # 서비스 관련
     llm: Optional[LLMConfig] = None
+    rag: Optional[RAGConfig] = None
+    session_cache: Optional[SessionCacheConfig] = None
+    chat_turn: Optional[ChatTurnConfig] = None
+    chat_history: Optional[ChatHistoryConfig] = None
+    turn_classifier: Optional[TurnClassifierConfig] = None
 
 
 class AppContext:
@@ -90,6 +148,9 @@ class AppContext:
 
         # 서비스
         self.llm_manager: Optional[LLMManager] = None
+        self.rag_manager: Optional[RAGManager] = None
+        self.turn_classifier: Optional[TurnClassifier] = None
+        self.turn_decision_log: Optional[TurnDecisionLog] = None
 
     def load_config(self, path: str) -> AppConfig:
         """JSON 파일을 로드하고 AppConfig 모델로 파싱"""
@@ -132,6 +193,12 @@ class AppContext:
         self.log.debug("+ start init websocket")
 
         self.ws_handler = WebSocketHandler(self)
+        # 참여자가 모두 떠난 세션의 진행 중인 턴 정리
+        self.ws_handler.add_session_closed_listener(SessionTurnActor.abandon)
+        SessionTurnActor.add_abandon_hook(StepSummaryQueue.cancel)
+        self.ws_handler.add_session_closed_listener(ChatHistoryCache.discard)
+        self.ws_handler.add_session_closed_listener(ContractDraftStore.discard)
+        self.ws_handler.add_session_closed_listener(RAGManager.discard)
 
         self.log.debug("- end init websocket")
             
@@ -160,6 +227,40 @@ class AppContext:
         self.log.debug("- end init system manager")
 
 
+    def _init_session_cache(self):
+        self.log.debug("+ start init session cache")
+
+        cache_cfg = getattr(self.cfg, "session_cache", None) or SessionCacheConfig()
+        SessionStateCache.configure(
+            max_entries=cache_cfg.max_entries,
+            idle_ttl_sec=cache_cfg.idle_ttl_sec,
+            max_memory_mb=cache_cfg.max_memory_mb,
+            flush_after_ms=cache_cfg.flush_after_ms,
+            role_inputs_max=cache_cfg.role_inputs_max,
+            role_inputs_recent=cache_cfg.role_inputs_recent,
+            cas_retries=cache_cfg.cas_retries,
+        )
+
+        self.log.debug("- end init session cache")
+
+    def _init_chat_turns(self):
+        self.log.debug("+ start init chat turn actor")
+
+        turn_cfg = getattr(self.cfg, "chat_turn", None) or ChatTurnConfig()
+        SessionTurnActor.configure(debounce_ms=turn_cfg.debounce_ms, max_batch=turn_cfg.max_batch)
+        StepSummaryQueue.configure(wait_sec=turn_cfg.summary_wait_sec)
+
+        self.log.debug("- end init chat turn actor")
+
+    def _init_chat_history(self):
+        self.log.debug("+ start init chat history cache")
+
+        history_cfg = getattr(self.cfg, "chat_history", None) or ChatHistoryConfig()
+        ChatHistoryCache.configure(window=history_cfg.window, max_sessions=history_cfg.max_sessions)
+        ContractDraftStore.configure(max_sessions=history_cfg.max_sessions, ttl_sec=history_cfg.draft_ttl_sec)
+
+        self.log.debug("- end init chat history cache")
+
     def _init_llms(self):
         if not self.cfg or not getattr(self.cfg, "llm", None):
             if self.log:
@@ -183,4 +284,42 @@ class AppContext:
             raise
 
 
+    def _init_rag(self):
+        self.log.debug("+ start init RAG")
+
+        rag_cfg = getattr(self.cfg, "rag", None) or RAGConfig()
+        try:
+            self.rag_manager = RAGManager(
+                reference_dir=rag_cfg.reference_dir,
+                index_path=rag_cfg.index_path,
+                index_params=rag_cfg.index.model_dump(),
+                min_score=rag_cfg.min_score,
+                faq_min_similarity=rag_cfg.faq_min_similarity,
+            )
+            self.log.info(f"[RAG] manager ready (index={rag_cfg.index.type})")
+        except Exception as e:
+            # RAG는 부가 기능이므로 초기화 실패 시에도 서버는 기동
+            self.log.error(f"[RAG] init failed: {e}")
+
+        self.log.debug("- end init RAG")
+
+    def _init_turn_classifier(self):
+        self.log.debug("+ start init turn classifier")
+
+        clf_cfg = getattr(self.cfg, "turn_classifier", None) or TurnClassifierConfig()
+        if clf_cfg.decision_log:
+            self.turn_decision_log = TurnDecisionLog(clf_cfg.decision_log, raw_text=clf_cfg.decision_log_raw_text)
+        if clf_cfg.enabled:
+            try:
+                self.turn_classifier = TurnClassifier.load(clf_cfg.model_dir, clf_cfg.min_confidence)
+                if self.turn_classifier:
+                    self.log.info(f"[CLF] turn classifier ready (version={self.turn_classifier.version}, tasks={list(self.turn_classifier.models)})")
+                else:
+                    self.log.info(f"[CLF] no trained turn classifier in {clf_cfg.model_dir}; using LLM decisions only")
+            except Exception as e:
+                # 분류기는 LLM 호출 절감용이므로 로드 실패 시 LLM 판단으로 동작
+                self.log.error(f"[CLF] init failed: {e}")
+
+        self.log.debug("- end init turn classifier")
+
     # TODO _destroy() 메서드 추가
\ No newline at end of file
@@ -18,11 +18,17 @@ import traceback
 import asyncio
 
 from src.app_context import AppContext
+from src.service.ai.chat_state_manager import SessionStateCache
+from src.service.ai.chat_turn_actor import SessionTurnActor
+from src.service.ai.step_summary_queue import StepSummaryQueue
+from src.service.ai.session_context import SessionContext
 
 from service.basic.basic_api import router as basic_router
 from service.auth.session_api import router as session_router
 from service.ai.chat_ws import router as chat_ws_router
 from service.archive.archive_api import router as archive_router
+from service.admin.rag_admin_api import router as rag_admin_router
+from service.admin.session_admin_api import router as session_admin_router
 
 class AppFactory:
     """애플리케이션 팩토리 클래스"""
@@ -97,7 +103,9 @@ class AppFactory:
             basic_router,
             session_router,
             chat_ws_router,
-            archive_router
+            archive_router,
+            rag_admin_router,
+            session_admin_router
         ]
         for router in routers:
             app.include_router(router)
@@ -133,6 +141,9 @@ class AppFactory:
         AppFactory._test_logging(ctx.log)
         
         ctx._init_system_manager()
+        ctx._init_session_cache()
+        ctx._init_chat_turns()
+        ctx._init_chat_history()
 
     @staticmethod
     async def _initialize_handlers(ctx: AppContext) -> None:
@@ -147,6 +158,8 @@ class AppFactory:
         """알고리즘 초기화"""
         print("     - Initializing algorithms...")   
         ctx._init_llms()
+        ctx._init_rag()
+        ctx._init_turn_classifier()
 
     @staticmethod
     async def _setup_connections(ctx: AppContext) -> None:
@@ -156,6 +169,16 @@ class AppFactory:
         await ctx.redis_consumer.init_group()
         
         ctx.redis_consumer_task = asyncio.create_task(ctx.redis_consumer.consume())
+
+        # 다른 워커의 세션 상태 변경 알림 구독 (로컬 캐시 무효화)
+        ctx.session_invalidation_task = asyncio.create_task(SessionStateCache.listen_invalidations(ctx))
+
+        # 세션 정보 갱신 알림 구독 (연결 그룹에 붙은 세션 컨텍스트 재로드)
+        ctx.session_info_refresh_task = asyncio.create_task(SessionContext.listen_refresh(ctx))
+
+        # RAG 인덱스 변경 감지 (무중단 재로드)
+        if ctx.rag_manager and ctx.cfg.rag and ctx.cfg.rag.watch:
+            ctx.rag_watch_task = asyncio.create_task(ctx.rag_manager.watch(ctx.cfg.rag.watch_debounce_ms))
         await asyncio.sleep(0)  # 태스크가 시작되도록 제어권 양보   
 
     
@@ -167,6 +190,22 @@ class AppFactory:
         if hasattr(ctx, 'log') and ctx.log:
             ctx.log.info("     -- Shutting down application")
 
+        # 실행 중인 턴/단계 요약 취소 후 지연된 세션 상태 기록
+        try:
+            await SessionTurnActor.shutdown()
+            await StepSummaryQueue.shutdown()
+        except Exception as e:
+            ctx.log.warning(f"     - Chat turn actor shutdown failed: {e}")
+        try:
+            await SessionStateCache.flush_all(ctx)
+        except Exception as e:
+            ctx.log.warning(f"     - Session state flush failed: {e}")
+
+        if getattr(ctx, "session_invalidation_task", None):
+            ctx.session_invalidation_task.cancel()
+        if getattr(ctx, "session_info_refresh_task", None):
+            ctx.session_info_refresh_task.cancel()
+
         # Redis 종료
         if hasattr(ctx, "redis_consumer") and ctx.redis_consumer:
             try:
@@ -181,6 +220,14 @@ class AppFactory:
             except Exception as e:
                 ctx.log.warning(f"     - Redis close failed: {e}")
 
+        # RAG 변경 감지 종료
+        if getattr(ctx, "rag_watch_task", None):
+            ctx.rag_watch_task.cancel()
+
+        # 턴 판단 로그의 남은 기록 flush
+        if getattr(ctx, "turn_decision_log", None):
+            await asyncio.to_thread(ctx.turn_decision_log.close)
+
         # WebSocket 종료
         if ctx.ws_handler:
             try:
@@ -8,6 +8,7 @@ class RedisHandler:
         self.log = ctx.log
         self.cfg = ctx.cfg.redis
         self.client: Redis = None
+        self.binary_client: Redis = None    # 압축 blob 등 바이너리 값용 (decode_responses=False)
 
     async def connect(self):
         try:
@@ -28,6 +29,13 @@ class RedisHandler:
                 password=self.cfg.password,
                 decode_responses=True
             )
+            self.binary_client = Redis(
+                host=self.cfg.host,
+                port=self.cfg.port,
+                db=self.cfg.db,
+                password=self.cfg.password,
+                decode_responses=False
+            )
 
             if await self.client.ping():
                 self.log.info("REDIS", " == Connected")
@@ -48,6 +56,8 @@ class RedisHandler:
             try:
                 self.log.debug("REDIS", "  - Disconnecting...")
                 await self.client.close()
+                if self.binary_client:
+                    await self.binary_client.close()
                 self.log.info("REDIS", "  -- Disconnected")
             except Exception as e:
                 self.log.warning("REDIS", f" - Disconnect failed: {str(e)}")
@@ -58,3 +68,9 @@ class RedisHandler:
             self.log.error("REDIS", " - Client not connected")
             raise RuntimeError("Redis client is not connected")
         return self.client
+
+    def get_binary_client(self) -> Redis:
+        if not self.binary_client:
+            self.log.error("REDIS", " - Binary client not connected")
+            raise RuntimeError("Redis binary client is not connected")
+        return self.binary_client
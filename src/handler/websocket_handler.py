@@ -8,6 +8,8 @@ class WebSocketHandler:
         self.log = ctx.log
         self.active_connections: list[WebSocket] = []
         self.session_map: dict[str, list[WebSocket]] = {}  # 1:N 세션 구조
+        self.session_closed_listeners = []  # 세션의 마지막 연결이 끊겼을 때 sid로 호출
+        self.session_contexts: dict[str, object] = {}  # 세션 연결 그룹별 컨텍스트 (그룹이 사라지면 제거)
 
     async def connect(self, websocket: WebSocket, id: str = None):
         """
@@ -28,6 +30,20 @@ class WebSocketHandler:
         else:
             self.log.info("WS", f"- Connected: Client={websocket.client}")
 
+    def add_session_closed_listener(self, listener):
+        """세션의 마지막 연결이 끊겼을 때 호출할 콜백 등록 (동기 함수, 인자: sid)"""
+        self.session_closed_listeners.append(listener)
+
+    def attach_session_context(self, sid: str, context) -> bool:
+        """세션 연결 그룹에 컨텍스트를 붙임 (연결된 소켓이 없으면 붙이지 않음)"""
+        if sid not in self.session_map:
+            return False
+        self.session_contexts[sid] = context
+        return True
+
+    def get_session_context(self, sid: str):
+        return self.session_contexts.get(sid)
+
     def disconnect(self, websocket: WebSocket):
         if websocket in self.active_connections:
             self.active_connections.remove(websocket)
@@ -40,7 +56,13 @@ class WebSocketHandler:
                 # 세션에 연결이 없으면 세션 제거
                 if not self.session_map[sid]:
                     del self.session_map[sid]
+                    self.session_contexts.pop(sid, None)
                     self.log.info("WS", f"- Session {sid} removed (no active connections)")
+                    for listener in self.session_closed_listeners:
+                        try:
+                            listener(sid)
+                        except Exception as e:
+                            self.log.warning("WS", f"- Session closed listener failed for {sid}: {e}")
             
             self.log.info("WS", f"- Disconnected: Client={websocket.client}")
 
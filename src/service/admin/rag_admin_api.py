@@ -0,0 +1,48 @@
+from fastapi import APIRouter, Request
+from typing import Dict, Any
+
+import src.common.common_codes as codes
+
+router = APIRouter(prefix="/v1/admin/rag", tags=["Admin"])
+
+@router.get("/status", response_model=Dict[str, Any])
+async def get_rag_status(request: Request):
+    """
+    현재 사용 중인 RAG 인덱스 버전을 조회합니다.
+    """
+    ctx = request.app.state.ctx
+    rag_manager = ctx.rag_manager
+    if not rag_manager:
+        return {"state": codes.ResponseStatus.NOT_FOUND, "detail": "RAG manager is not initialized"}
+
+    snapshot = rag_manager.snapshot
+    return {
+        "state": codes.ResponseStatus.SUCCESS,
+        "data": {
+            "version": rag_manager.version,
+            "chunks": len(snapshot.chunks) if snapshot else 0,
+            "index": snapshot.manifest.get("index") if snapshot else None,
+            "session_cache": {"hits": rag_manager.session_cache.hits, "misses": rag_manager.session_cache.misses},
+        }
+    }
+
+@router.post("/reload", response_model=Dict[str, Any])
+async def reload_rag_index(request: Request, rebuild: bool = False):
+    """
+    다른 워커가 빌드한 최신 인덱스 버전을 로드합니다 (서버 재시작 불필요).
+    rebuild=true면 reference 변경분으로 인덱스를 백그라운드 빌드한 뒤 교체하며, 이미 진행 중인 재로드가 있으면 거절합니다.
+    """
+    ctx = request.app.state.ctx
+    rag_manager = ctx.rag_manager
+    if not rag_manager:
+        return {"state": codes.ResponseStatus.NOT_FOUND, "detail": "RAG manager is not initialized"}
+    if rebuild and rag_manager.reloading:
+        return {"state": codes.ResponseStatus.CONFLICT, "detail": "RAG reload is already in progress"}
+
+    previous = rag_manager.version
+    version = await rag_manager.reload(rebuild=rebuild)
+    ctx.log.info(f"[RAG] reload requested: {previous} -> {version}")
+    return {
+        "state": codes.ResponseStatus.SUCCESS,
+        "data": {"previous_version": previous, "version": version, "swapped": previous != version}
+    }
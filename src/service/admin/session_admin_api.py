@@ -0,0 +1,50 @@
+from fastapi import APIRouter, Request
+from typing import Dict, Any
+
+from src.service.ai.chat_state_manager import SessionStateCache
+from src.service.ai.chat_turn_actor import SessionTurnActor
+from src.service.ai.step_summary_queue import StepSummaryQueue
+from src.utils.chat_stream_utils import ChatHistoryCache
+from src.utils.contract_draft_utils import ContractDraftStore
+import src.common.common_codes as codes
+
+router = APIRouter(prefix="/v1/admin/session", tags=["Admin"])
+
+@router.get("/cache", response_model=Dict[str, Any])
+async def get_session_cache_stats(request: Request):
+    """
+    세션 상태 메모리 캐시 크기와 제거(eviction) 지표를 조회합니다.
+    """
+    return {
+        "state": codes.ResponseStatus.SUCCESS,
+        "data": SessionStateCache.stats()
+    }
+
+
+@router.get("/history", response_model=Dict[str, Any])
+async def get_chat_history_stats(request: Request):
+    """
+    세션별 대화 이력 버퍼 현황 (버퍼 적중/복원 횟수, 파싱한 메시지 수)과 계약서 초안 저장/조회 수를 조회합니다.
+    """
+    return {
+        "state": codes.ResponseStatus.SUCCESS,
+        "data": {
+            **ChatHistoryCache.stats(),
+            "contract_drafts": ContractDraftStore.stats(),
+        }
+    }
+
+@router.get("/turns", response_model=Dict[str, Any])
+async def get_session_turn_stats(request: Request):
+    """
+    세션 턴 액터 현황 (실행 중인 턴, 대기 메시지, 병합/취소된 턴 수), 백그라운드 단계 요약 현황과 로컬 턴 분류기 판단 수를 조회합니다.
+    """
+    classifier = request.app.state.ctx.turn_classifier
+    return {
+        "state": codes.ResponseStatus.SUCCESS,
+        "data": {
+            **SessionTurnActor.stats(),
+            "step_summaries": StepSummaryQueue.stats(),
+            "classifier": classifier.stats() if classifier else None,
+        }
+    }
@@ -192,10 +192,7 @@ NORMAL_RESPONSE_PROMPT_TEMPLATE = """{system_prompt}
 {{collected_fields_summary}}  
 === 끝 ===
 
-=== 참고 법률/계약 조항 (RAG) ===
 {{rag_context}}
-=== 끝 ===
-
 === 계약서 초안 (지속적으로 업데이트) ===  
 {{previous_contract_draft}}  
 === 끝 ===
@@ -245,10 +242,7 @@ STEP_TRANSITION_PROMPT_TEMPLATE = """{system_prompt}
 {{collected_fields_summary}}
 === 끝 ===
 
-=== 참고 법률/계약 조항 (RAG) ===
 {{rag_context}}
-=== 끝 ===
-
 === 계약서 초안 (지속 업데이트) ===
 {{previous_contract_draft}}
 === 끝 ===
@@ -42,6 +42,19 @@ QUESTION_DETECTION_PROMPT = """
 ```
 """
 
+# ㄹ 받침 음절(할, 갈, 볼, 을 ...) 문자 클래스: 완성형 한글에서는 'ㄹ까'가 한 음절로 합쳐지므로 받침으로 찾음 (종성 인덱스 8 = ㄹ)
+_RIEUL_FINAL_SYLLABLES = "".join(chr(code) for code in range(0xAC00, 0xD7A4) if (code - 0xAC00) % 28 == 8)
+
+# 질문 감지 사전 필터: 아래 패턴이 하나도 없으면 질문 감지 LLM 호출을 생략 (조건 제시/동의 발화)
+# 질문이 아닌 발화가 걸리는 것은 괜찮지만, 질문이 빠지지 않도록 넓게 잡습니다.
+QUESTION_MARKER_PATTERNS = [
+    r"[?？]",                                                   # 물음표
+    r"(무엇|뭔가|뭐|뭘|무슨|어떤|어떻게|어떨|왜|언제|어디|누가|누구|얼마|몇)",  # 의문사
+    r"(나요|까요|가요|인가|습니까|는지요?|은지요?|을지요?|[" + _RIEUL_FINAL_SYLLABLES + r"]까)\s*[.!~]*\s*$",  # 의문형 어미 (~ㄹ까)
+    r"(설명|알려|궁금|의미|뜻|정의|차이|일반적|보통)",               # 설명/지식 요청
+    r"(?i)\b(what|why|how|when|where|who|which)\b",
+]
+
 # RAG 검색 결과를 바탕으로 사용자 질문에 답변하는 프롬프트
 RAG_ANSWER_PROMPT = """
 당신은 용역계약서와 관련된 법률 정보를 제공하는 전문 AI 조수 'DoQ'입니다.
@@ -64,6 +77,16 @@ RAG_ANSWER_PROMPT = """
 답변은 아래 조건을 충족하는 자연어 한 단락으로 작성하십시오.
 """
 
+# 관련 조항이 있을 때만 대화 프롬프트에 삽입되는 섹션 (없으면 섹션 자체를 생략)
+RAG_CONTEXT_SECTION_TEMPLATE = """=== 참고 법률/계약 조항 (RAG) ===
+{rag_context}
+=== 끝 ===
+
+"""
+
+# 질문 답변 시 임계값 이상의 조항이 없을 때 참고 자료 대신 사용
+RAG_NO_CONTEXT_TEXT = "(관련 참고 조항 없음 - 일반적인 용역계약 관행에 근거하여 답변)"
+
 # 이미 질문에 대한 답변을 했을 때, 중복 답변을 방지하고 계약 단계로 복귀를 유도하는 지침
 RAG_ANSWER_ALREADY_SENT_PROMPT = """
 당신은 해당 질문에 이미 답변한 상태입니다. 다시 설명하거나 반복하지 마십시오.
@@ -74,3 +97,51 @@ RAG_ANSWER_ALREADY_SENT_PROMPT = """
 3. 핵심 목적은 사용자에게 현재 계약 단계로 **즉시 자연스럽게 복귀**하도록 유도하는 것입니다.
 4. 안내 말투는 정중하고 자연스러워야 하며, 명령하거나 거절하는 어투는 피하십시오.
 """
+
+# ==========================================
+# 조항 청크 주제 태깅용 키워드 (rag_chunker.py에서 사용)
+# 키는 ChatStep 값과 동일하며, 검색 시 현재 단계의 주제로 필터링됩니다.
+# ==========================================
+RAG_STEP_TOPIC_KEYWORDS = {
+    "work_scope": ["과업", "용역의 범위", "업무 범위", "업무의 범위", "작업 범위", "용역 내용", "납품", "결과물"],
+    "work_period": ["기간", "납기", "착수", "완료일", "지체", "일정", "연장"],
+    "budget": ["대금", "금액", "지급", "보수", "비용", "계약금", "선급금", "잔금", "부가가치세", "정산"],
+    "revisions": ["수정", "보완", "재작업", "검수", "변경 요청", "시안"],
+    "copyright": ["저작권", "지식재산", "권리의 귀속", "2차적", "저작인격권", "소유권", "포트폴리오"],
+    "confidentiality": ["비밀", "기밀", "누설", "보안", "개인정보", "비밀유지"],
+    "conflict_resolution": ["분쟁", "해제", "해지", "손해배상", "위약", "관할", "조정", "중재"],
+    "finalization": ["서명", "날인", "기명날인", "효력", "부칙"],
+}
+
+# ==========================================
+# FAQ 답변 뱅크 질문 목록 (rag_faq.py 오프라인 빌드에서 사용)
+# 표준계약서에 근거한 정의/관행 질문만 포함하며, questions의 첫 항목이 대표 질문입니다.
+# ==========================================
+RAG_FAQ_QUESTIONS = [
+    {"id": "copyright_owner", "step": "copyright", "questions": [
+        "저작권은 누구에게 귀속되나요?", "결과물 저작권은 누가 가지나요?", "디자인 저작권은 누구 소유인가요?"]},
+    {"id": "derivative_work", "step": "copyright", "questions": [
+        "2차적 저작물이 뭔가요?", "2차 저작물이라는 게 뭔가요?", "2차적 저작물 작성권은 무엇인가요?"]},
+    {"id": "moral_rights", "step": "copyright", "questions": [
+        "저작인격권이 뭔가요?", "저작인격권은 양도할 수 있나요?"]},
+    {"id": "portfolio_use", "step": "copyright", "questions": [
+        "결과물을 포트폴리오로 써도 되나요?", "포트폴리오 사용이 가능한가요?"]},
+    {"id": "revision_scope", "step": "revisions", "questions": [
+        "수정 횟수는 보통 몇 번인가요?", "무상 수정은 몇 회까지 가능한가요?", "수정 요청 범위는 어떻게 정하나요?"]},
+    {"id": "acceptance_inspection", "step": "revisions", "questions": [
+        "검수는 어떻게 진행되나요?", "검수 기간은 얼마나 되나요?"]},
+    {"id": "payment_schedule", "step": "budget", "questions": [
+        "대금은 언제 지급하나요?", "계약금과 잔금 비율은 보통 어떻게 되나요?", "선급금이 뭔가요?"]},
+    {"id": "vat_included", "step": "budget", "questions": [
+        "계약 금액에 부가가치세가 포함되나요?", "부가세는 별도인가요?"]},
+    {"id": "delay_penalty", "step": "work_period", "questions": [
+        "지체상금이 뭔가요?", "납기가 늦어지면 어떻게 되나요?"]},
+    {"id": "confidentiality_scope", "step": "confidentiality", "questions": [
+        "비밀유지 의무는 언제까지인가요?", "비밀유지 조항은 어떤 내용인가요?"]},
+    {"id": "termination", "step": "conflict_resolution", "questions": [
+        "계약 해제와 해지는 어떻게 다른가요?", "계약을 중간에 해지할 수 있나요?"]},
+    {"id": "damages", "step": "conflict_resolution", "questions": [
+        "손해배상이 뭔가요?", "손해배상 범위는 어떻게 되나요?"]},
+    {"id": "dispute_court", "step": "conflict_resolution", "questions": [
+        "분쟁이 생기면 어디서 해결하나요?", "관할 법원은 어떻게 정하나요?"]},
+]
@@ -5,9 +5,17 @@
 from enum import Enum
 from typing import Optional, Dict, Any
 from datetime import datetime
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+import os
 import re
+import time
+import uuid
+import asyncio
 import orjson
 import src.utils.redis_basic_utils as ru
+import src.utils.redis_hash_utils as rh
+import src.utils.redis_list_utils as rl
 from src.service.ai.asset.prompts.doq_prompts_confirmation import _CONFIRM_PATTERNS
 from src.service.ai.asset.prompts.doq_prompts_chat_scenario import STEP_PROMPTS
 
@@ -39,71 +47,147 @@ class ChatStep(Enum):
         return STEP_PROMPTS.get(self.value, "")
 
 
+# 단계 순서/역조회 테이블 (list(ChatStep).index 대신 사용)
+_STEPS = tuple(ChatStep)
+_STEP_ORDINAL = {step: idx for idx, step in enumerate(_STEPS)}
+_STEP_BY_VALUE = {step.value: step for step in _STEPS}
+
+
+def _to_step(value, default: Optional[ChatStep] = ChatStep.INTRODUCTION) -> Optional[ChatStep]:
+    """문자열/Enum을 ChatStep으로 변환 (알 수 없는 값은 default)"""
+    if isinstance(value, ChatStep):
+        return value
+    return _STEP_BY_VALUE.get(value, default)
+
+
+def step_ordinal(step) -> int:
+    """단계 순서 번호 (0부터, 문자열/Enum 모두 허용)"""
+    return _STEP_ORDINAL[_to_step(step)]
+
+
+def _to_epoch(value) -> float:
+    """ISO 문자열/epoch 값을 epoch 초로 변환 (잘못된 값은 현재 시각)"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except (TypeError, ValueError):
+        return time.time()
+
+
 class ChatStateManager:
-    """세션별 대화 상태 관리"""
-    
+    """
+    세션별 대화 상태 관리
+    Redis 해시 필드 단위로 변경(dirty) 여부를 추적하며, role_inputs는 별도 리스트에 추가분만 기록합니다.
+    메모리의 role_inputs는 최근 RECENT_INPUTS개만 유지하며, 전체 기록은 SessionStateCache.load_role_inputs로 조회합니다.
+    수천 개가 메모리에 상주하므로 __slots__로 선언하고, 타임스탬프는 epoch로 보관하여 출력 시에만 ISO 문자열로 변환합니다.
+    """
+
+    RECENT_INPUTS = 20
+
+    # Redis 해시에 필드별로 저장되는 항목 (role_inputs 제외)
+    _HASH_FIELDS = (
+        "sid", "user_info", "current_step", "step_history", "collected_data",
+        "conflicts", "created_at", "updated_at", "progress_percentage",
+    )
+    _HASH_FIELD_SET = frozenset(_HASH_FIELDS)
+    _JSON_FIELDS = ("user_info", "step_history", "collected_data", "conflicts")
+    _COLLECTED_KEYS = (
+        "client_name",           # 의뢰인(클라이언트) 이름
+        "client_company",        # 의뢰인 회사
+        "provider_name",         # 서비스 제공자 이름
+        "provider_company",      # 서비스 제공자 회사
+        "category",              # 프로젝트 카테고리
+        "work_scope", "work_period", "start_date", "end_date", "budget",
+        "revision_count", "copyright_owner", "confidentiality_terms", "special_conditions",
+    )
+
+    _TIMESTAMP_SLOTS = {"created_at": "_created_ts", "updated_at": "_updated_ts"}
+
+    __slots__ = (
+        "_dirty", "_dirty_data_keys", "_pending_inputs", "_field_sizes", "revision",
+        "sid", "current_step", "step_history", "user_info", "collected_data",
+        "role_inputs", "conflicts", "_created_ts", "_updated_ts", "progress_percentage",
+    )
+
+    def __setattr__(self, name, value):
+        # 필드 재할당은 자동으로 dirty 처리 (dict/list 내부 변경은 각 메서드에서 표시)
+        if name in self._HASH_FIELD_SET:
+            self._dirty.add(name)
+        object.__setattr__(self, name, value)
+
     def __init__(self, sid: str, user_info: Optional[Dict[str, Any]] = None):
+        now = time.time()
+        self._init_slots()
         self.sid = sid
         self.current_step = ChatStep.INTRODUCTION
         self.step_history = [ChatStep.INTRODUCTION]
-        
+
         # 사용자 정보 (snake_case)
         self.user_info = {
             "userId": user_info.get("userId") if user_info else None,
             "client_name": user_info.get("client_name") if user_info else None,
             "provider_name": user_info.get("provider_name") if user_info else None,
         }
-        
+
         # 수집된 정보
-        self.collected_data = {
-            "client_name": None,           # 의뢰인(클라이언트) 이름
-            "client_company": None,        # 의뢰인 회사
-            "provider_name": None,         # 서비스 제공자 이름
-            "provider_company": None,      # 서비스 제공자 회사
-            "category": None,              # 프로젝트 카테고리
-            "work_scope": None,
-            "work_period": None,
-            "start_date": None,
-            "end_date": None,
-            "budget": None,
-            "revision_count": None,
-            "copyright_owner": None,
-            "confidentiality_terms": None,
-            "special_conditions": None,
-        }
-        
-        # 역할별 입력 추적
-        self.role_inputs = {
-            "client": [],      # 의뢰인(클라이언트)의 입력
-            "provider": [],    # 서비스 제공자의 입력
-        }
-        
+        self.collected_data = dict.fromkeys(self._COLLECTED_KEYS)
+
+        # 역할별 입력 추적 (client: 의뢰인, provider: 서비스 제공자)
+        self.role_inputs = {"client": [], "provider": []}
+
         # 충돌 사항
         self.conflicts = []
-        
-        # 타임스탬프
-        self.created_at = datetime.now().isoformat()
-        self.updated_at = datetime.now().isoformat()
-        
+
+        # 타임스탬프 (epoch)
+        self.created_at = now
+        self.updated_at = now
+
         # 진행률
         self.progress_percentage = 0.0
         self._update_progress()
-        
+
+    def _init_slots(self):
+        object.__setattr__(self, "_dirty", set())
+        object.__setattr__(self, "_dirty_data_keys", set())   # collected_data 중 변경된 키 (충돌 시 병합용)
+        object.__setattr__(self, "revision", 0)                # 마지막으로 읽거나 기록한 Redis 리비전
+        object.__setattr__(self, "_pending_inputs", [])   # 아직 Redis 리스트에 기록되지 않은 role_inputs 항목
+        object.__setattr__(self, "_field_sizes", {})      # 마지막으로 직렬화한 필드별 크기 (메모리 추정용)
+
+    # ------------------------
+    # 타임스탬프 (출력 시에만 ISO 변환)
+    # ------------------------
+    @property
+    def created_at(self) -> str:
+        return datetime.fromtimestamp(self._created_ts).isoformat()
+
+    @created_at.setter
+    def created_at(self, value):
+        object.__setattr__(self, "_created_ts", _to_epoch(value))
+
+    @property
+    def updated_at(self) -> str:
+        return datetime.fromtimestamp(self._updated_ts).isoformat()
+
+    @updated_at.setter
+    def updated_at(self, value):
+        object.__setattr__(self, "_updated_ts", _to_epoch(value))
+
+    def _touch(self):
+        self._dirty.add("updated_at")
+        object.__setattr__(self, "_updated_ts", time.time())
+
     def _update_progress(self):
         """현재 단계에 따른 진행률 계산"""
-        try:
-            steps = list(ChatStep)
-            if not isinstance(self.current_step, ChatStep):
-                self.current_step = ChatStep(self.current_step)
-            
-            current_idx = steps.index(self.current_step)
-            # 마지막 단계(completed)는 100%
-            if self.current_step == ChatStep.COMPLETED:
-                self.progress_percentage = 100.0
-            else:
-                self.progress_percentage = round((current_idx / len(steps)) * 100, 1)
-        except Exception:
-            self.progress_percentage = 0.0
+        if not isinstance(self.current_step, ChatStep):
+            self.current_step = _to_step(self.current_step)
+        # 마지막 단계(completed)는 100%
+        if self.current_step is ChatStep.COMPLETED:
+            progress = 100.0
+        else:
+            progress = round((_STEP_ORDINAL[self.current_step] / len(_STEPS)) * 100, 1)
+        if progress != self.progress_percentage:
+            self.progress_percentage = progress
     
     def check_confirm_pattern(self, user_text: str) -> bool:
         """
@@ -124,57 +208,71 @@ class ChatStateManager:
             return True
         return False
     
+    def peek_next_step(self) -> ChatStep:
+        """move_to_next_step()이 이동할 단계 (상태는 바꾸지 않음)"""
+        current_idx = _STEP_ORDINAL[_to_step(self.current_step)]
+        return _STEPS[min(current_idx + 1, len(_STEPS) - 1)]
+
     def move_to_next_step(self) -> ChatStep:
         """다음 단계로 이동 (Enum 일관성 보장)"""
-        steps = list(ChatStep)
         # current_step이 string일 경우 Enum으로 변환
         if not isinstance(self.current_step, ChatStep):
-            try:
-                self.current_step = ChatStep(self.current_step)
-            except Exception:
-                self.current_step = ChatStep.INTRODUCTION
-        current_idx = steps.index(self.current_step)
-        if current_idx < len(steps) - 1:
-            self.current_step = steps[current_idx + 1]
+            self.current_step = _to_step(self.current_step)
+        current_idx = _STEP_ORDINAL[self.current_step]
+        if current_idx < len(_STEPS) - 1:
+            self.current_step = _STEPS[current_idx + 1]
             # step_history에 Enum만 추가
             if not self.step_history or self.step_history[-1] != self.current_step:
                 self.step_history.append(self.current_step)
-            self.updated_at = datetime.now().isoformat()
+                self._dirty.add("step_history")
+            self._touch()
             self._update_progress()
-            return self.current_step
         return self.current_step
     
     def jump_to_step(self, step) -> ChatStep:
         """특정 단계로 이동 (Enum 일관성 보장)"""
         # step이 string이면 Enum으로 변환
-        if not isinstance(step, ChatStep):
-            try:
-                step = ChatStep(step)
-            except Exception:
-                step = ChatStep.INTRODUCTION
+        step = _to_step(step)
         self.current_step = step
         if step not in self.step_history:
             self.step_history.append(step)
-        self.updated_at = datetime.now().isoformat()
+            self._dirty.add("step_history")
+        self._touch()
         self._update_progress()
         return step
     
     def update_data(self, key: str, value: Any):
-        """수집된 데이터 업데이트"""
-        if key in self.collected_data:
+        """수집된 데이터 업데이트 (값이 같으면 변경 없음)"""
+        if key in self.collected_data and self.collected_data[key] != value:
             self.collected_data[key] = value
-            self.updated_at = datetime.now().isoformat()
+            self._dirty.add("collected_data")
+            self._dirty_data_keys.add(key)
+            self._touch()
     
     def add_role_input(self, role: str, text: str):
         """역할별 입력 기록"""
         if role in self.role_inputs:
-            self.role_inputs[role].append({
+            self._touch()
+            entry = {
                 "text": text,
-                "timestamp": datetime.now().isoformat(),
+                "timestamp": datetime.fromtimestamp(self._updated_ts).isoformat(),
                 "step": self.current_step.value
-            })
-            self.updated_at = datetime.now().isoformat()
+            }
+            self.role_inputs[role].append(entry)
+            # 최근 입력만 메모리에 유지 (전체 기록은 Redis 리스트)
+            if len(self.role_inputs[role]) > self.RECENT_INPUTS:
+                del self.role_inputs[role][:-self.RECENT_INPUTS]
+            self._pending_inputs.append({"role": role, **entry})
     
+    def role_inputs_slice(self, step: Optional[str] = None, limit: int = 10) -> Dict[str, list]:
+        """
+        프롬프트용 역할별 입력 (step이 주어지면 해당 단계 입력만, 역할별 최근 limit개)
+        """
+        return {
+            role: [entry for entry in entries if step is None or entry.get("step") == step][-limit:]
+            for role, entries in self.role_inputs.items()
+        }
+
     def add_conflict(self, description: str, client_position: str, designer_position: str):
         """충돌 사항 기록"""
         self.conflicts.append({
@@ -185,15 +283,118 @@ class ChatStateManager:
             "timestamp": datetime.now().isoformat(),
             "resolved": False
         })
+        self._dirty.add("conflicts")
         self.jump_to_step(ChatStep.CONFLICT_RESOLUTION)
-        self.updated_at = datetime.now().isoformat()
     
     def resolve_conflict(self, conflict_idx: int):
         """충돌 해결 표시"""
         if 0 <= conflict_idx < len(self.conflicts):
             self.conflicts[conflict_idx]["resolved"] = True
-            self.updated_at = datetime.now().isoformat()
+            self._dirty.add("conflicts")
+            self._touch()
     
+    # ------------------------
+    # 필드 단위 영속화
+    # ------------------------
+    def _serialize_field(self, name: str) -> str:
+        if name == "current_step":
+            return self.current_step.value
+        if name == "step_history":
+            return orjson.dumps([s.value for s in self.step_history]).decode()
+        value = getattr(self, name)
+        if name in self._JSON_FIELDS:
+            return orjson.dumps(value).decode()
+        return str(value)
+
+    def has_changes(self) -> bool:
+        return bool(self._dirty or self._pending_inputs)
+
+    def take_changes(self):
+        """
+        변경된 해시 필드(직렬화), 변경된 collected_data 키, 추가할 role_inputs 항목을 꺼내고 변경 표시를 초기화합니다.
+        Redis 기록 중에 발생한 변경은 다음 저장 대상으로 남습니다.
+        """
+        fields = {name: self._serialize_field(name) for name in self._HASH_FIELDS if name in self._dirty}
+        for name, value in fields.items():
+            self._field_sizes[name] = len(value)
+        data_keys = set(self._dirty_data_keys)
+        entries = self._pending_inputs
+        items = [orjson.dumps(entry).decode() for entry in entries]
+        self._dirty.clear()
+        self._dirty_data_keys.clear()
+        object.__setattr__(self, "_pending_inputs", [])
+        return fields, data_keys, entries, items
+
+    def restore_changes(self, fields: Dict[str, str], entries: list, data_keys=()):
+        """기록 실패 시 꺼낸 변경분을 되돌림"""
+        self._dirty.update(fields)
+        self._dirty_data_keys.update(data_keys)
+        object.__setattr__(self, "_pending_inputs", entries + self._pending_inputs)
+
+    def mark_clean(self):
+        """변경 표시 초기화"""
+        self._dirty.clear()
+        self._dirty_data_keys.clear()
+        self._pending_inputs.clear()
+
+    def rebase(self, remote: Dict[str, str], fields: Dict[str, str], data_keys) -> Dict[str, str]:
+        """
+        다른 워커가 먼저 기록한 경우(리비전 불일치) 원격 상태 위에 로컬 변경분을 다시 적용하고, 다시 기록할 필드를 반환합니다.
+        로컬에서 바꾸지 않은 필드는 원격 값을 따르고, collected_data는 로컬에서 바꾼 키만 덮어쓰며, step_history는 합칩니다.
+        """
+        remote_state = ChatStateManager.from_redis(remote)
+        for name in self._HASH_FIELDS:
+            if name in remote and name not in fields:
+                slot = self._TIMESTAMP_SLOTS.get(name, name)
+                object.__setattr__(self, slot, getattr(remote_state, slot))
+        if "collected_data" in fields and "collected_data" in remote and data_keys:
+            merged = dict(remote_state.collected_data)
+            merged.update((key, self.collected_data.get(key)) for key in data_keys)
+            object.__setattr__(self, "collected_data", merged)
+        if "step_history" in fields and "step_history" in remote:
+            history = list(remote_state.step_history)
+            history.extend(step for step in self.step_history if step not in history)
+            object.__setattr__(self, "step_history", history)
+        object.__setattr__(self, "revision", remote_state.revision)
+        return {name: self._serialize_field(name) for name in fields}
+
+    def mark_all_dirty(self, role_inputs: Optional[Dict[str, list]] = None):
+        """전체 필드 재기록이 필요한 경우 (레거시 키 이전 등 / role_inputs는 전체 기록 전달)"""
+        self._dirty.update(self._HASH_FIELDS)
+        source = role_inputs if role_inputs is not None else self.role_inputs
+        entries = [{"role": role, **entry} for role, items in source.items() for entry in items]
+        entries.sort(key=lambda entry: entry.get("timestamp") or "")
+        object.__setattr__(self, "_pending_inputs", entries)
+
+    def estimated_size(self) -> int:
+        """마지막 저장 기준 직렬화 크기 + 메모리에 유지 중인 최근 입력 크기 추정 (bytes)"""
+        inputs_bytes = sum(len(entry.get("text") or "") * 3 + 80 for entries in self.role_inputs.values() for entry in entries)
+        return sum(self._field_sizes.values()) + inputs_bytes
+
+    @staticmethod
+    def from_redis(fields: Dict[str, str], inputs: Optional[list] = None) -> 'ChatStateManager':
+        """Redis 해시 필드 + 최근 role_inputs(리스트 끝부분)에서 복원 (변경 없음 상태)"""
+        data = {}
+        for name, value in fields.items():
+            if name in ChatStateManager._JSON_FIELDS:
+                data[name] = orjson.loads(value)
+            elif name == "progress_percentage":
+                data[name] = float(value)
+            else:
+                data[name] = value
+
+        role_inputs = {"client": [], "provider": []}
+        for item in inputs or []:
+            entry = orjson.loads(item)
+            role_inputs.setdefault(entry.pop("role", "client"), []).append(entry)
+        data["role_inputs"] = role_inputs
+
+        manager = ChatStateManager.from_dict(data)
+        manager._field_sizes.update((name, len(value)) for name, value in fields.items())
+        manager.revision = int(fields.get("rev") or 0)
+        manager.mark_clean()
+        return manager
+
     def get_status(self) -> Dict[str, Any]:
         """현재 상태 조회"""
         return {
@@ -212,88 +413,324 @@ class ChatStateManager:
     def to_dict(self) -> Dict[str, Any]:
         """JSON 변환용 딕셔너리"""
         return self.get_status()
+
+    def to_json(self) -> bytes:
+        """to_dict 결과를 orjson으로 직렬화 (UTF-8 bytes)"""
+        return orjson.dumps(self.get_status())
     
     @staticmethod
     def from_dict(data: Dict[str, Any]) -> 'ChatStateManager':
-        """딕셔너리에서 복원 (Enum 일관성 보장)"""
-        user_info = data.get("user_info", {})
-        manager = ChatStateManager(data.get("sid", "unknown"), user_info=user_info)
-        # current_step이 string이면 Enum으로 변환
-        cur_step = data.get("current_step", "introduction")
-        if not isinstance(cur_step, ChatStep):
-            try:
-                cur_step = ChatStep(cur_step)
-            except Exception:
-                cur_step = ChatStep.INTRODUCTION
-        manager.current_step = cur_step
-        # step_history도 Enum으로 변환
-        step_hist = data.get("step_history", [])
-        manager.step_history = []
-        for s in step_hist:
-            if isinstance(s, ChatStep):
-                manager.step_history.append(s)
-            else:
-                try:
-                    manager.step_history.append(ChatStep(s))
-                except Exception:
-                    continue
+        """
+        딕셔너리에서 복원 (Enum 일관성 보장)
+        기본값을 만든 뒤 덮어쓰지 않고 슬롯에 직접 채웁니다.
+        """
+        manager = ChatStateManager.__new__(ChatStateManager)
+        manager._init_slots()
+        manager.sid = data.get("sid", "unknown")
+        user_info = data.get("user_info") or {}
+        manager.user_info = {
+            "userId": user_info.get("userId"),
+            "client_name": user_info.get("client_name"),
+            "provider_name": user_info.get("provider_name"),
+        }
+        # current_step/step_history는 Enum으로 변환 (알 수 없는 값은 제외)
+        manager.current_step = _to_step(data.get("current_step", "introduction"))
+        manager.step_history = [
+            step for step in (_to_step(s, None) for s in data.get("step_history", [])) if step is not None
+        ]
         # collected_data는 그대로
         manager.collected_data = data.get("collected_data", {})
-        role_inputs_data = data.get("role_inputs", {"client": [], "provider": []})
+        role_inputs_data = data.get("role_inputs") or {}
         # 하위 호환: 기존 "갑"/"을" 키도 지원
         manager.role_inputs = {
-            "client": role_inputs_data.get("client") or role_inputs_data.get("갑") or [],
-            "provider": role_inputs_data.get("provider") or role_inputs_data.get("을") or [],
+            "client": (role_inputs_data.get("client") or role_inputs_data.get("갑") or [])[-ChatStateManager.RECENT_INPUTS:],
+            "provider": (role_inputs_data.get("provider") or role_inputs_data.get("을") or [])[-ChatStateManager.RECENT_INPUTS:],
         }
         manager.conflicts = data.get("conflicts", [])
-        manager.created_at = data.get("created_at", datetime.now().isoformat())
-        manager.updated_at = data.get("updated_at", datetime.now().isoformat())
-        
+        now = time.time()
+        manager.created_at = data.get("created_at", now)
+        manager.updated_at = data.get("updated_at", now)
+
         # 진행률 복원
         if "progress_percentage" in data:
             manager.progress_percentage = data["progress_percentage"]
         else:
+            manager.progress_percentage = 0.0
             manager._update_progress()
-            
+
         return manager
 
 
+# 세션 상태 CAS 저장 스크립트
+# KEYS: [상태 해시, 입력 리스트]
+# ARGV: [기대 rev, 입력 로그 상한, 무효화 채널, 알림 접두어, 필드 수, 필드/값..., 입력 항목...]
+# 반환: {1, 새 rev} 또는 rev 불일치 시 {0, 현재 rev}
+_CAS_SAVE_SCRIPT = """
+local rev = tonumber(redis.call('HGET', KEYS[1], 'rev') or '0')
+if rev ~= tonumber(ARGV[1]) then
+    return {0, rev}
+end
+local nfields = tonumber(ARGV[5])
+local first_item = 6 + nfields * 2
+if nfields > 0 then
+    redis.call('HSET', KEYS[1], unpack(ARGV, 6, first_item - 1))
+end
+if #ARGV >= first_item then
+    redis.call('RPUSH', KEYS[2], unpack(ARGV, first_item, #ARGV))
+    redis.call('LTRIM', KEYS[2], -tonumber(ARGV[2]), -1)
+end
+rev = redis.call('HINCRBY', KEYS[1], 'rev', 1)
+redis.call('PUBLISH', ARGV[3], ARGV[4] .. rev)
+return {1, rev}
+"""
+
+
 class SessionStateCache:
-    """세션 상태 캐시 (Redis + 메모리 캐싱)"""
+    """
+    세션 상태 캐시 (Redis + 메모리 캐싱)
+    Redis 저장 구조:
+        session:chat_state:{sid}   해시 (필드별 저장, 변경된 필드만 HSET)
+        session:chat_inputs:{sid}  리스트 (role_inputs 추가분만 RPUSH)
+    이전 버전의 문자열(JSON blob) 키는 로드 시 해시 구조로 이전합니다.
+    메모리 캐시는 LRU 순서로 유지하며, 개수/유휴 TTL/추정 메모리 상한을 넘으면 오래된 세션부터 제거합니다.
+    Redis에는 매 저장마다 기록되므로 제거된 세션은 다음 조회 시 Redis에서 다시 로드됩니다.
 
-    _cache: Dict[str, ChatStateManager] = {}
+    워커 간 일관성:
+        해시의 rev 필드는 저장마다 1씩 증가하며, 저장은 Lua 스크립트로 rev를 비교한 뒤에만 반영됩니다 (CAS).
+        rev가 다르면 원격 상태를 읽어 로컬 변경분을 다시 적용(rebase)한 뒤 재시도합니다.
+        저장/삭제 시 session:chat_state:invalidate 채널로 알림을 보내고, 다른 워커는 해당 세션을 로컬 캐시에서 제거합니다.
+    """
+
+    _cache: "OrderedDict[str, ChatStateManager]" = OrderedDict()
+    _last_access: Dict[str, float] = {}
+    _sizes: Dict[str, int] = {}        # 직렬화 크기 기준 추정 메모리 (bytes)
+    _total_bytes = 0
     _REDIS_PREFIX = "session:chat_state:"
+    _INPUTS_PREFIX = "session:chat_inputs:"
+
+    # 워커 간 캐시 일관성 (CAS 저장 + pub/sub 무효화)
+    _INVALIDATE_CHANNEL = "session:chat_state:invalidate"
+    _worker_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+    _cas_retries = 3
+    _cas_scripts: Dict[int, Any] = {}   # id(redis client) -> 등록된 스크립트
+    _listening = False                  # 무효화 채널 구독 중 여부 (아니면 조회 시 rev 확인)
+
+    # 턴 단위 쓰기 지연 (unit of work)
+    _turns: Dict[str, int] = {}                   # sid -> 진행 중인 턴 수
+    _pending: Dict[str, ChatStateManager] = {}    # 기록 대기 중인 세션
+    _flush_timers: Dict[str, asyncio.TimerHandle] = {}
+    _flush_after_ms = 500
+
+    # role_inputs 로그 상한 (LTRIM)
+    _inputs_max = 500
+
+    # 상한 (configure()로 설정값 반영)
+    _max_entries = 1000
+    _idle_ttl_sec = 1800.0
+    _max_bytes = 64 * 1024 * 1024
+
+    _metrics = {
+        "hits": 0,
+        "misses": 0,
+        "evicted_lru": 0,
+        "evicted_idle": 0,
+        "evicted_memory": 0,
+        "dropped_completed": 0,
+        "deferred_saves": 0,
+        "flushes": 0,
+        "cas_conflicts": 0,
+        "cas_failures": 0,
+        "invalidations": 0,
+        "stale_reloads": 0,
+    }
+
+    @classmethod
+    def configure(
+        cls,
+        max_entries: int = 1000,
+        idle_ttl_sec: float = 1800.0,
+        max_memory_mb: float = 64.0,
+        flush_after_ms: int = 500,
+        role_inputs_max: int = 500,
+        role_inputs_recent: int = 20,
+        cas_retries: int = 3,
+    ):
+        cls._cas_retries = cas_retries
+        cls._flush_after_ms = flush_after_ms
+        cls._inputs_max = role_inputs_max
+        ChatStateManager.RECENT_INPUTS = role_inputs_recent
+        cls._max_entries = max_entries
+        cls._idle_ttl_sec = idle_ttl_sec
+        cls._max_bytes = int(max_memory_mb * 1024 * 1024)
+        cls._evict()
+
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        """캐시 크기 및 제거 지표"""
+        return {
+            "entries": len(cls._cache),
+            "estimated_bytes": cls._total_bytes,
+            "max_entries": cls._max_entries,
+            "idle_ttl_sec": cls._idle_ttl_sec,
+            "max_bytes": cls._max_bytes,
+            "pending_flush": len(cls._pending),
+            "worker_id": cls._worker_id,
+            "listening": cls._listening,
+            **cls._metrics,
+        }
 
     @classmethod
     def _redis_key(cls, sid: str) -> str:
         return f"{cls._REDIS_PREFIX}{sid}"
 
+    @classmethod
+    def _inputs_key(cls, sid: str) -> str:
+        return f"{cls._INPUTS_PREFIX}{sid}"
+
+    @classmethod
+    def _put(cls, manager: ChatStateManager, size: int):
+        """메모리 캐시에 등록 (완료된 세션은 보관하지 않음)"""
+        if manager.current_step == ChatStep.COMPLETED:
+            cls._remove(manager.sid)
+            cls._metrics["dropped_completed"] += 1
+            return
+        cls._remove(manager.sid)
+        cls._cache[manager.sid] = manager
+        cls._last_access[manager.sid] = time.monotonic()
+        cls._sizes[manager.sid] = size
+        cls._total_bytes += size
+        cls._evict()
+
+    @classmethod
+    def _remove(cls, sid: str) -> bool:
+        manager = cls._cache.pop(sid, None)
+        cls._last_access.pop(sid, None)
+        cls._total_bytes -= cls._sizes.pop(sid, 0)
+        return manager is not None
+
+    @classmethod
+    def _evict(cls):
+        """
+        유휴 TTL 초과 → 개수 상한 → 메모리 상한 순으로 LRU 앞쪽부터 제거
+        기록 대기 중인(_pending) 세션은 Redis에 아직 없는 변경을 들고 있으므로 기록될 때까지 제거하지 않습니다.
+        """
+        now = time.monotonic()
+        for sid in list(cls._cache):
+            if sid in cls._pending:
+                continue
+            if now - cls._last_access.get(sid, now) > cls._idle_ttl_sec:
+                reason = "evicted_idle"
+            elif len(cls._cache) > cls._max_entries:
+                reason = "evicted_lru"
+            elif cls._total_bytes > cls._max_bytes and len(cls._cache) > 1:
+                reason = "evicted_memory"
+            else:
+                break
+            cls._remove(sid)
+            cls._metrics[reason] += 1
+
     @classmethod
     async def get(cls, sid: str, ctx=None) -> Optional[ChatStateManager]:
-        """세션 상태 조회 (Redis 우선, 실패 시 메모리 캐시 사용)"""
+        """
+        세션 상태 조회 (메모리 캐시 우선, 없거나 만료되면 Redis에서 로드)
+        무효화 채널을 구독하지 못한 상태면 캐시된 rev를 Redis와 비교하여 다르면 다시 로드합니다.
+        턴 진행 중 기록 대기 중인 상태가 있으면 그 상태가 최신이므로 Redis를 보지 않고 반환합니다.
+        """
+        cls._evict()
+        pending = cls._pending.get(sid)
+        if pending is not None:
+            if sid in cls._cache:
+                cls._cache.move_to_end(sid)
+                cls._last_access[sid] = time.monotonic()
+            cls._metrics["hits"] += 1
+            return pending
+        if sid in cls._cache and ctx and not cls._listening and await cls._is_stale(ctx, cls._cache[sid]):
+            cls._remove(sid)
+            cls._metrics["stale_reloads"] += 1
         if sid in cls._cache:
+            cls._cache.move_to_end(sid)
+            cls._last_access[sid] = time.monotonic()
+            cls._metrics["hits"] += 1
             return cls._cache[sid]
 
+        cls._metrics["misses"] += 1
         if ctx:
-            manager = await cls._load_from_redis(ctx, sid)
+            manager, size = await cls._load_from_redis(ctx, sid)
             if manager:
-                cls._cache[sid] = manager
+                cls._put(manager, size)
                 return manager
 
         return None
 
     @classmethod
     async def save(cls, manager: ChatStateManager, ctx=None):
-        """세션 상태 저장 (Redis + 메모리)"""
-        cls._cache[manager.sid] = manager
+        """
+        세션 상태 저장 (Redis에는 변경된 필드와 추가된 입력만 기록)
+        턴(unit_of_work) 진행 중이면 메모리에만 반영하고 턴 종료 시 한 번에 기록합니다.
+        """
+        cls._put(manager, manager.estimated_size())
+        if not ctx:
+            return
 
-        if ctx:
+        sid = manager.sid
+        if sid in cls._turns:
+            cls._pending[sid] = manager
+            cls._metrics["deferred_saves"] += 1
+            # 턴이 길어져도 flush_after_ms 이내에는 기록되도록 보장
+            if sid not in cls._flush_timers:
+                loop = asyncio.get_running_loop()
+                cls._flush_timers[sid] = loop.call_later(
+                    cls._flush_after_ms / 1000,
+                    lambda: asyncio.ensure_future(cls.flush(sid, ctx)),
+                )
+            return
+
+        await cls._save_to_redis(ctx, manager)
+
+    @classmethod
+    @asynccontextmanager
+    async def unit_of_work(cls, sid: Optional[str], ctx=None):
+        """
+        턴 단위 저장 묶음
+        블록 안의 save()는 지연되며, 블록 종료 시(예외 포함) 한 번의 파이프라인으로 기록됩니다.
+        """
+        if not sid or not ctx:
+            yield
+            return
+        cls._turns[sid] = cls._turns.get(sid, 0) + 1
+        try:
+            yield
+        finally:
+            cls._turns[sid] -= 1
+            if cls._turns[sid] <= 0:
+                del cls._turns[sid]
+                await cls.flush(sid, ctx)
+
+    @classmethod
+    async def flush(cls, sid: str, ctx=None):
+        """기록 대기 중인 세션 상태를 즉시 기록 (턴 종료, 소켓 종료, 타이머)"""
+        timer = cls._flush_timers.pop(sid, None)
+        if timer:
+            timer.cancel()
+        manager = cls._pending.pop(sid, None)
+        if manager and ctx:
+            cls._metrics["flushes"] += 1
             await cls._save_to_redis(ctx, manager)
 
+    @classmethod
+    async def flush_all(cls, ctx=None):
+        """종료 시 모든 대기 세션 기록"""
+        for sid in list(cls._pending):
+            await cls.flush(sid, ctx)
+
     @classmethod
     async def delete(cls, sid: str, ctx=None):
         """세션 상태 삭제"""
-        cls._cache.pop(sid, None)
+        cls._remove(sid)
+        cls._pending.pop(sid, None)
+        timer = cls._flush_timers.pop(sid, None)
+        if timer:
+            timer.cancel()
 
         if ctx:
             await cls._delete_from_redis(ctx, sid)
@@ -315,51 +752,214 @@ class SessionStateCache:
 
     @classmethod
     async def list_all(cls, ctx=None) -> Dict[str, Dict[str, Any]]:
-        """모든 세션 상태 조회 (가능하면 Redis에서 불러와 메모리 동기화)"""
+        """
+        모든 세션 상태 조회 (목록 용도이므로 role_inputs는 포함하지 않음)
+        Redis 결과는 메모리 캐시에 넣지 않으며, 캐시에 있는 세션은 최신 메모리 상태를 사용합니다.
+        """
+        sessions: Dict[str, Dict[str, Any]] = {}
         if ctx:
             try:
-                results = await ru.redis_search_by_prefix(ctx, cls._REDIS_PREFIX)
-                for key, data in results.items():
-                    if not data:
-                        continue
+                for key in await ru.redis_scan_keys(ctx, cls._REDIS_PREFIX):
                     try:
-                        manager_dict = orjson.loads(data)
-                        manager = ChatStateManager.from_dict(manager_dict)
-                        cls._cache[manager.sid] = manager
+                        key_type = await ru.redis_type(ctx, key)
+                        if key_type == "hash":
+                            manager = ChatStateManager.from_redis(await rh.redis_hgetall(ctx, key))
+                        elif key_type == "string":
+                            manager = ChatStateManager.from_dict(orjson.loads(await ru.redis_get(ctx, key)))
+                        else:
+                            continue
+                        data = manager.to_dict()
+                        data.pop("role_inputs", None)
+                        sessions[manager.sid] = data
                     except Exception as e:
                         ctx.log.warning(f"[WS]        -- Failed to load session state from Redis ({key}): {e}")
                         continue
             except Exception as e:
                 ctx.log.warning(f"[WS]        -- Redis list_all failed: {e}")
 
-        return {sid: manager.to_dict() for sid, manager in cls._cache.items()}
+        for sid, manager in cls._cache.items():
+            data = manager.to_dict()
+            data.pop("role_inputs", None)
+            sessions[sid] = data
+        return sessions
+
+    @classmethod
+    async def load_role_inputs(cls, sid: str, ctx, limit: Optional[int] = None, step: Optional[str] = None) -> Dict[str, list]:
+        """
+        role_inputs 로그 조회 (limit: 최근 N개, step: 해당 단계만)
+        아직 기록되지 않은 입력이 있으면 먼저 기록합니다.
+        """
+        await cls.flush(sid, ctx)
+        start = -limit if limit else 0
+        role_inputs: Dict[str, list] = {"client": [], "provider": []}
+        for item in await rl.redis_lrange(ctx, cls._inputs_key(sid), start, -1):
+            entry = orjson.loads(item)
+            if step and entry.get("step") != step:
+                continue
+            role_inputs.setdefault(entry.pop("role", "client"), []).append(entry)
+        return role_inputs
 
     @classmethod
-    async def _load_from_redis(cls, ctx, sid: str) -> Optional[ChatStateManager]:
+    async def _load_from_redis(cls, ctx, sid: str):
+        """(manager, 추정 크기) 반환 / 레거시 문자열 키는 해시 구조로 이전"""
+        key = cls._redis_key(sid)
         try:
-            data = await ru.redis_get(ctx, cls._redis_key(sid))
-            if not data:
-                return None
-            manager_dict = orjson.loads(data)
-            return ChatStateManager.from_dict(manager_dict)
+            key_type = await ru.redis_type(ctx, key)
+            if key_type == "hash":
+                fields = await rh.redis_hgetall(ctx, key)
+                if not fields:
+                    return None, 0
+                # 역할별 최근 입력을 채울 만큼만 끝부분 조회 (세션 길이와 무관)
+                inputs = await rl.redis_lrange(ctx, cls._inputs_key(sid), -ChatStateManager.RECENT_INPUTS * 2, -1)
+                manager = ChatStateManager.from_redis(fields, inputs)
+                return manager, manager.estimated_size()
+
+            if key_type == "string":
+                data = await ru.redis_get(ctx, key)
+                if not data:
+                    return None, 0
+                legacy = orjson.loads(data)
+                manager = ChatStateManager.from_dict(legacy)
+                await cls._migrate_legacy(ctx, manager, legacy.get("role_inputs"))
+                return manager, manager.estimated_size()
+
+            return None, 0
         except Exception as e:
             ctx.log.warning(f"[WS]        -- Failed to load session state from Redis for {sid}: {e}")
-            return None
+            return None, 0
+
+    @classmethod
+    async def _migrate_legacy(cls, ctx, manager: ChatStateManager, role_inputs: Optional[Dict[str, list]] = None):
+        """문자열 blob 키를 해시 + 입력 리스트로 변환"""
+        if role_inputs:
+            role_inputs = {
+                "client": role_inputs.get("client") or role_inputs.get("갑") or [],
+                "provider": role_inputs.get("provider") or role_inputs.get("을") or [],
+            }
+        manager.mark_all_dirty(role_inputs)
+        await ru.redis_delete(ctx, cls._redis_key(manager.sid), cls._inputs_key(manager.sid))
+        await cls._save_to_redis(ctx, manager)
+        ctx.log.info(f"[WS]        -- Migrated legacy session state to hash for {manager.sid}")
+
+    @classmethod
+    def _cas_script(cls, client):
+        script = cls._cas_scripts.get(id(client))
+        if script is None:
+            cls._cas_scripts = {id(client): client.register_script(_CAS_SAVE_SCRIPT)}
+            script = cls._cas_scripts[id(client)]
+        return script
 
     @classmethod
     async def _save_to_redis(cls, ctx, manager: ChatStateManager):
+        """
+        변경분을 rev 비교 후 한 번에 기록 (HSET + RPUSH/LTRIM + rev 증가 + 무효화 알림)
+        다른 워커가 먼저 기록했으면 원격 상태에 rebase 후 cas_retries회까지 재시도합니다.
+        """
+        if not manager.has_changes():
+            return
+        sid = manager.sid
+        fields, data_keys, entries, items = manager.take_changes()
         try:
-            await ru.redis_set(
-                ctx,
-                cls._redis_key(manager.sid),
-                orjson.dumps(manager.to_dict()).decode(),
-            )
+            client = ctx.redis_handler.client
+            script = cls._cas_script(client)
+            for _ in range(cls._cas_retries + 1):
+                args = [manager.revision, cls._inputs_max, cls._INVALIDATE_CHANNEL, f"{cls._worker_id}|{sid}|", len(fields)]
+                for name, value in fields.items():
+                    args.extend((name, value))
+                args.extend(items)
+                ok, revision = await script(keys=[cls._redis_key(sid), cls._inputs_key(sid)], args=args)
+                if ok:
+                    manager.revision = int(revision)
+                    ctx.log.debug(f"[WS]        -- Session state saved for {sid}: rev={revision}, fields={list(fields)}, inputs={len(items)}")
+                    return
+                # 다른 워커의 기록이 먼저 반영됨 → 원격 상태 위에 로컬 변경분을 다시 적용
+                cls._metrics["cas_conflicts"] += 1
+                remote = await rh.redis_hgetall(ctx, cls._redis_key(sid))
+                if remote:
+                    fields = manager.rebase(remote, fields, data_keys)
+                else:
+                    # 다른 워커가 삭제한 경우 전체 필드를 새로 기록
+                    manager.revision = 0
+                    fields = {name: manager._serialize_field(name) for name in manager._HASH_FIELDS}
+                ctx.log.info(f"[WS]        -- Session state conflict for {sid}: rebased onto rev={manager.revision}")
+            cls._metrics["cas_failures"] += 1
+            manager.restore_changes(fields, entries, data_keys)
+            ctx.log.warning(f"[WS]        -- Session state save for {sid} kept conflicting; retrying on next save")
         except Exception as e:
-            ctx.log.warning(f"[WS]        -- Failed to save session state to Redis for {manager.sid}: {e}")
+            # 실패 시 변경분을 되돌려 다음 저장에서 재시도
+            manager.restore_changes(fields, entries, data_keys)
+            ctx.log.warning(f"[WS]        -- Failed to save session state to Redis for {sid}: {e}")
 
     @classmethod
     async def _delete_from_redis(cls, ctx, sid: str):
         try:
-            await ru.redis_delete(ctx, cls._redis_key(sid))
+            await ru.redis_delete(ctx, cls._redis_key(sid), cls._inputs_key(sid))
+            # rev 0 = 삭제 (다른 워커는 무조건 캐시에서 제거)
+            await ctx.redis_handler.client.publish(cls._INVALIDATE_CHANNEL, f"{cls._worker_id}|{sid}|0")
         except Exception as e:
             ctx.log.warning(f"[WS]        -- Failed to delete session state from Redis for {sid}: {e}")
+
+    # ------------------------
+    # 워커 간 무효화
+    # ------------------------
+    @classmethod
+    async def _is_stale(cls, ctx, manager: ChatStateManager) -> bool:
+        """Redis의 rev가 캐시된 리비전과 다른지 (로컬 미기록 변경분이 있으면 CAS 저장 시 병합하므로 유지)"""
+        if manager.has_changes() or manager.sid in cls._pending:
+            return False
+        revision = await rh.redis_hget(ctx, cls._redis_key(manager.sid), "rev")
+        return revision is not None and int(revision) != manager.revision
+
+    @classmethod
+    def _on_invalidate(cls, payload: str):
+        """'{worker_id}|{sid}|{rev}' 알림 처리 (자기 워커 알림과 이미 반영된 리비전은 무시)"""
+        worker_id, rest = payload.split("|", 1)
+        sid, revision = rest.rsplit("|", 1)
+        if worker_id == cls._worker_id:
+            return
+        manager = cls._cache.get(sid)
+        if manager is None:
+            return
+        revision = int(revision)
+        if revision and manager.revision >= revision:
+            return
+        if revision and (manager.has_changes() or sid in cls._pending):
+            return
+        cls._remove(sid)
+        cls._metrics["invalidations"] += 1
+
+    @classmethod
+    def _drop_clean(cls):
+        """구독이 끊긴 동안의 알림은 알 수 없으므로 미기록 변경분이 없는 세션은 모두 제거"""
+        for sid in [sid for sid, manager in cls._cache.items() if not manager.has_changes() and sid not in cls._pending]:
+            cls._remove(sid)
+
+    @classmethod
+    async def listen_invalidations(cls, ctx, retry_sec: float = 1.0):
+        """다른 워커의 저장/삭제 알림 구독 (연결이 끊기면 retry_sec 후 재구독)"""
+        while True:
+            pubsub = None
+            try:
+                pubsub = ctx.redis_handler.client.pubsub(ignore_subscribe_messages=True)
+                await pubsub.subscribe(cls._INVALIDATE_CHANNEL)
+                cls._drop_clean()
+                cls._listening = True
+                ctx.log.info(f"[WS]        -- Subscribed to {cls._INVALIDATE_CHANNEL} as {cls._worker_id}")
+                async for message in pubsub.listen():
+                    if message.get("type") == "message":
+                        try:
+                            cls._on_invalidate(message["data"])
+                        except ValueError:
+                            ctx.log.warning(f"[WS]        -- Invalid session invalidation message: {message['data']}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                ctx.log.warning(f"[WS]        -- Session invalidation listener failed: {e}")
+            finally:
+                cls._listening = False
+                if pubsub is not None:
+                    try:
+                        await pubsub.reset()
+                    except Exception:
+                        pass
+            await asyncio.sleep(retry_sec)
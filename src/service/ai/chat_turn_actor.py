@@ -0,0 +1,247 @@
+"""
+세션별 턴 실행 모듈
+같은 세션(sid)의 메시지는 세션당 하나의 워커가 순서대로 처리합니다.
+debounce 창 안에 같은 발화자가 연달아 보낸 메시지는 하나의 턴으로 합쳐 LLM 파이프라인을 한 번만 실행하고 (발화자가 바뀌면 턴을 나눔),
+실행 중인 턴이 커밋 지점(첫 응답 전송/상태 반영) 전이면 취소한 뒤 새 메시지와 합쳐 다시 실행합니다.
+세션의 모든 소켓이 끊기면 대기 메시지를 버리고, 커밋 전 턴은 취소, 커밋 후 턴은 다음 LLM 호출 대신 상태만 저장하고 끝냅니다.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+
+class TurnAbandoned(BaseException):
+    """
+    참여자가 모두 떠난 세션의 턴에서 LLM 호출을 건너뛸 때 발생
+    턴 본문의 except Exception 블록에 잡히지 않도록 BaseException을 상속합니다.
+    """
+
+
+class TurnHandle:
+    """실행 중인 턴 (commit() 이후에는 새 메시지가 와도 취소하지 않음)"""
+
+    def __init__(self, batch: List[Tuple[Any, dict]]):
+        self.batch = batch
+        self.task: Optional[asyncio.Task] = None
+        self.committed = False
+        self.superseded = False
+        self.abandoned = False
+        self.in_llm = 0         # 응답 대기 중인 LLM 호출 수 (단계 전환 시 동시 호출 가능, 취소 시 회피한 호출로 집계)
+        self.llm_calls = 0
+
+    def commit(self):
+        """사용자에게 보이는 출력이나 상태 변경 직전에 호출"""
+        self.committed = True
+
+    def wrap(self, llm_fn: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+        """LLM 호출 함수 래핑 (세션이 버려진 뒤에는 호출하지 않고 TurnAbandoned 발생)"""
+        async def call(*args, **kwargs):
+            if self.abandoned:
+                SessionTurnActor._metrics["llm_calls_avoided"] += 1
+                raise TurnAbandoned()
+            self.llm_calls += 1
+            self.in_llm += 1
+            try:
+                return await llm_fn(*args, **kwargs)
+            finally:
+                self.in_llm -= 1
+        return call
+
+
+class SessionTurnActor:
+    """
+    세션별 턴 실행기 (워커 1개 + 대기열)
+    대기열이 비면 워커가 종료되고 레지스트리에서 제거되며, 다음 메시지가 오면 새로 생성됩니다.
+    """
+
+    _actors: Dict[str, "SessionTurnActor"] = {}
+    _debounce_ms = 300
+    _max_batch = 5
+    _abandon_hooks: List[Callable[[str], int]] = []    # 이탈 시 세션의 백그라운드 LLM 작업 취소 (취소한 호출 수 반환)
+
+    _metrics = {
+        "messages": 0,
+        "turns": 0,
+        "merged_messages": 0,
+        "superseded_turns": 0,
+        "failed_turns": 0,
+        "abandoned_cancelled": 0,    # 모든 참여자 이탈로 취소된 (커밋 전) 턴
+        "abandoned_persisted": 0,    # 커밋 후라서 상태 저장만 하고 끝낸 턴
+        "dropped_messages": 0,       # 이탈로 실행하지 않은 대기 메시지
+        "llm_calls_avoided": 0,      # 취소된 진행 중 호출 + 건너뛴 호출 (관측 가능한 호출만 집계)
+    }
+
+    @classmethod
+    def configure(cls, debounce_ms: int = 300, max_batch: int = 5):
+        cls._debounce_ms = debounce_ms
+        cls._max_batch = max(1, max_batch)
+
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        return {
+            "active_sessions": len(cls._actors),
+            "running_turns": sum(1 for actor in cls._actors.values() if actor.turn is not None),
+            "queued_messages": sum(len(actor.pending) for actor in cls._actors.values()),
+            "debounce_ms": cls._debounce_ms,
+            "max_batch": cls._max_batch,
+            **cls._metrics,
+        }
+
+    @classmethod
+    def submit(cls, ctx, sid: str, websocket, msg: dict, run_turn: Callable[..., Awaitable[None]]):
+        """메시지를 세션 대기열에 넣고 바로 반환"""
+        actor = cls._actors.get(sid)
+        if actor is None:
+            actor = cls(ctx, sid, run_turn)
+            cls._actors[sid] = actor
+        actor.enqueue(websocket, msg)
+
+    @classmethod
+    def add_abandon_hook(cls, hook: Callable[[str], int]):
+        """세션 이탈 시 함께 취소할 백그라운드 작업 등록 (동기 함수, 인자: sid, 반환: 취소한 LLM 호출 수)"""
+        cls._abandon_hooks.append(hook)
+
+    @classmethod
+    def abandon(cls, sid: str):
+        """세션의 마지막 소켓이 끊겼을 때 호출 (WebSocketHandler 세션 종료 리스너)"""
+        for hook in cls._abandon_hooks:
+            cls._metrics["llm_calls_avoided"] += hook(sid)
+        actor = cls._actors.get(sid)
+        if actor is None:
+            return
+        cls._metrics["dropped_messages"] += len(actor.pending)
+        actor.pending.clear()
+        # debounce 대기 중인 워커를 깨워 빈 턴을 만들지 않고 종료시킴 (재접속 후 메시지가 오면 enqueue에서 해제)
+        actor._stopped = True
+        actor._wakeup.set()
+        turn = actor.turn
+        if turn is None or turn.task.done():
+            return
+        turn.abandoned = True
+        if turn.committed:
+            # 이미 응답/상태 일부가 반영된 턴은 다음 LLM 호출 시점에 상태만 저장하고 종료
+            cls._metrics["abandoned_persisted"] += 1
+        else:
+            cls._metrics["llm_calls_avoided"] += turn.in_llm
+            cls._metrics["abandoned_cancelled"] += 1
+            turn.task.cancel()
+        actor.ctx.log.info(f"[WS]        -- Session {sid} abandoned: turn {'persist-only' if turn.committed else 'cancelled'}")
+
+    @classmethod
+    async def shutdown(cls):
+        """종료 시 모든 워커와 실행 중인 턴 취소"""
+        actors = list(cls._actors.values())
+        cls._actors.clear()
+        for actor in actors:
+            actor.worker.cancel()
+        for actor in actors:
+            try:
+                await actor.worker
+            except asyncio.CancelledError:
+                pass
+
+    def __init__(self, ctx, sid: str, run_turn: Callable[..., Awaitable[None]]):
+        self.ctx = ctx
+        self.sid = sid
+        self.run_turn = run_turn
+        self.pending: List[Tuple[Any, dict]] = []
+        self.turn: Optional[TurnHandle] = None
+        self._stopped = False       # 세션이 버려짐 (대기 메시지를 실행하지 않고 워커 종료)
+        self._wakeup = asyncio.Event()
+        self.worker = asyncio.create_task(self._run())
+
+    def enqueue(self, websocket, msg: dict):
+        self._stopped = False
+        self.pending.append((websocket, msg))
+        self._metrics["messages"] += 1
+        turn = self.turn
+        if (
+            turn is not None and not turn.committed and not turn.abandoned and not turn.task.done()
+            and len(turn.batch) < self._max_batch and sender_of(turn.batch[0][1]) == sender_of(msg)
+        ):
+            # 아직 아무것도 내보내지 않은 같은 발화자의 턴은 취소하고 새 메시지와 합쳐 다시 실행
+            turn.superseded = True
+            turn.task.cancel()
+        self._wakeup.set()
+
+    async def _debounce(self):
+        """마지막 메시지 이후 debounce_ms 동안 추가 메시지가 없거나, max_batch에 도달하거나, 발화자가 바뀔 때까지 대기"""
+        while self._batch_open():
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self._debounce_ms / 1000)
+            except asyncio.TimeoutError:
+                return
+
+    def _batch_open(self) -> bool:
+        """대기열 앞 배치에 메시지를 더 받을 수 있는지"""
+        if self._stopped or not self.pending or len(self.pending) >= self._max_batch:
+            return False
+        return sender_of(self.pending[-1][1]) == sender_of(self.pending[0][1])
+
+    def _take_batch(self) -> List[Tuple[Any, dict]]:
+        """대기열 앞에서 같은 발화자의 연속 메시지를 max_batch개까지 꺼냄 (발화자가 바뀌는 지점에서 끊음)"""
+        size = 0
+        for _, msg in self.pending[:self._max_batch]:
+            if size and sender_of(msg) != sender_of(self.pending[0][1]):
+                break
+            size += 1
+        batch = self.pending[:size]
+        del self.pending[:size]
+        return batch
+
+    async def _run(self):
+        try:
+            while self.pending:
+                await self._debounce()
+                batch = self._take_batch()
+                if not batch:
+                    # debounce 중 세션이 버려져 대기열이 비워짐
+                    continue
+
+                turn = TurnHandle(batch)
+                websocket, msg = merge_messages(batch)
+                turn.task = asyncio.create_task(self.run_turn(self.ctx, websocket, msg, turn))
+                self.turn = turn
+                await asyncio.wait({turn.task})
+                self.turn = None
+
+                if turn.task.cancelled():
+                    if turn.superseded and not turn.abandoned:
+                        # 대기열 앞에 되돌려 다음 메시지와 함께 실행
+                        self.pending[:0] = batch
+                        self._metrics["superseded_turns"] += 1
+                        self.ctx.log.info(f"[WS]        -- Turn superseded for {self.sid}: {len(batch)} message(s) requeued")
+                    continue
+                self._metrics["turns"] += 1
+                self._metrics["merged_messages"] += len(batch) - 1
+                if turn.task.exception() is not None:
+                    self._metrics["failed_turns"] += 1
+                    self.ctx.log.error(f"[WS]        -- Turn failed for {self.sid}: {turn.task.exception()}")
+        except asyncio.CancelledError:
+            if self.turn is not None:
+                self.turn.task.cancel()
+            raise
+        finally:
+            if self._actors.get(self.sid) is self:
+                del self._actors[self.sid]
+
+
+def sender_of(msg: dict) -> Tuple[Any, Any]:
+    """메시지 발화자 (chat_ws와 같은 규칙: asker가 없으면 role)"""
+    hd = msg.get("hd") or {}
+    return hd.get("asker") or hd.get("role"), hd.get("role")
+
+
+def merge_messages(batch: List[Tuple[Any, dict]]) -> Tuple[Any, dict]:
+    """
+    같은 발화자의 연속 메시지를 하나의 턴 입력으로 병합 (_take_batch가 발화자별로 나눈 배치)
+    헤더는 마지막 메시지를 따르고, 본문은 비어 있지 않은 텍스트를 줄바꿈으로 잇습니다.
+    """
+    websocket, last = batch[-1]
+    if len(batch) == 1:
+        return websocket, last
+    texts = [(msg.get("bd") or {}).get("text") or "" for _, msg in batch]
+    merged = dict(last)
+    merged["bd"] = {**(last.get("bd") or {}), "text": "\n".join(text for text in texts if text.strip())}
+    merged["merged_count"] = len(batch)
+    return websocket, merged
@@ -1,24 +1,35 @@
 from fastapi import APIRouter, WebSocket
 from src.service.messaging.ws_processor import processor
-from src.utils.chat_stream_utils import store_chat_message
-from src.service.ai.chat_state_manager import SessionStateCache, ChatStateManager, ChatStep, ChatEvent
+from src.utils.chat_stream_utils import store_chat_message, ChatHistoryCache
+from src.utils.contract_draft_utils import ContractDraftStore
+from src.service.ai.chat_state_manager import SessionStateCache, ChatStateManager, ChatStep, ChatEvent, step_ordinal
 
 from src.service.ai.asset.prompts.prompts_cfg import SYSTEM_PROMPTS
 import src.service.ai.asset.prompts.doq_prompts_chat_scenario as scenario
 from src.service.ai.asset.prompts.doq_contract_template import CONTRACT_TEMPLATE
-from src.service.ai.asset.prompts.doq_prompts_rag import QUESTION_DETECTION_PROMPT, RAG_ANSWER_PROMPT, RAG_ANSWER_ALREADY_SENT_PROMPT
+from src.service.ai.asset.prompts.doq_prompts_rag import QUESTION_DETECTION_PROMPT, RAG_ANSWER_PROMPT, RAG_ANSWER_ALREADY_SENT_PROMPT, RAG_CONTEXT_SECTION_TEMPLATE, RAG_NO_CONTEXT_TEXT, RAG_STEP_TOPIC_KEYWORDS
 from src.service.ai.asset.prompts.doq_prompts_confirmation import _CONTRACT_COMPLETION_PATTERNS, CONFIRM_KEYWORDS, PROPOSAL_KEYWORDS
 from src.service.ai.rag_manager import RAGManager
+from src.service.ai.rag_faq import has_question_marker
+from src.service.ai.chat_turn_actor import SessionTurnActor, TurnAbandoned, TurnHandle
+from src.service.ai.step_summary_queue import StepSummaryQueue
+from src.service.ai.session_context import SessionContext
 
 import src.common.common_codes as codes
+import asyncio
 import orjson
 import json
 import re
+import time
 from datetime import datetime
+from typing import Dict, List, Optional
 from langchain_core.output_parsers import JsonOutputParser
 
 router = APIRouter(prefix="/v1/session", tags=["Session"])
 
+LATE_JOIN_HISTORY_COUNT = 50     # 후속 접속자에게 보내는 최근 메시지 수
+
+
 @router.websocket("/chat")
 async def websocket_chat(websocket: WebSocket):
     ctx = websocket.app.state.ctx
@@ -34,44 +45,15 @@ async def websocket_chat(websocket: WebSocket):
     is_first_connection = len(ctx.ws_handler.session_map.get(sid, [])) == 0
     await ctx.ws_handler.connect(websocket, id=sid)
 
+    # 세션 컨텍스트(참여자 정보)는 첫 참여자 접속 시 한 번 로드해 연결 그룹에 붙여 둠
+    session_context = await _get_session_context(ctx, sid, websocket.query_params)
+
     # 연결 직후 선제 인사 전송 (최초 연결 시에만)
     if is_first_connection:
         try:
-            # Redis에서 세션 정보 로드
-            session_key = f"session:info:{sid}"
-            session_info_json = None
-            client_name = "의뢰인"
-            provider_name = "용역자"
-            contract_date = None
-            
-            try:
-                redis_client = ctx.redis_handler.get_client()
-                session_info_json = await redis_client.get(session_key)
-                if session_info_json:
-                    session_info = orjson.loads(session_info_json)
-                    client_name = session_info.get("client_name") or "의뢰인"
-                    provider_name = session_info.get("provider_name") or "용역자"
-                    contract_date = session_info.get("contract_date")
-                else:
-                    # Redis에 없으면 쿼리 파라미터에서 읽어서 Redis에 저장 (최초 1회)
-                    client_name = websocket.query_params.get("client_name") or "의뢰인"
-                    provider_name = websocket.query_params.get("provider_name") or "용역자"
-                    contract_date = websocket.query_params.get("contract_date")
-                    
-                    # Redis에 저장
-                    new_info = {
-                        "client_name": client_name,
-                        "provider_name": provider_name,
-                        "contract_date": contract_date
-                    }
-                    await redis_client.set(session_key, orjson.dumps(new_info))
-
-            except Exception as e:
-                ctx.log.warning(f"[WS]        -- Failed to load session info from Redis: {e}")
-                # 폴백: 쿼리 파라미터에서 읽기
-                client_name = websocket.query_params.get("client_name") or "의뢰인"
-                provider_name = websocket.query_params.get("provider_name") or "용역자"
-                contract_date = websocket.query_params.get("contract_date")
+            client_name = session_context.get("client_name", "의뢰인")
+            provider_name = session_context.get("provider_name", "용역자")
+            contract_date = session_context.get("contract_date")
 
             # START_MESSAGE_PROMPT 렌더링 (간단 치환)
             greeting_text = scenario.START_MESSAGE_PROMPT
@@ -106,48 +88,15 @@ async def websocket_chat(websocket: WebSocket):
         except Exception as e:
             ctx.log.warning(f"[WS]        -- Failed to send initial greeting: {e}")
     else:
-        # 후속 접속 시: Redis에서 채팅 히스토리 로드 및 전송
+        # 후속 접속 시: Redis에서 최근 채팅 히스토리 로드 및 전송
         try:
-            redis_client = ctx.redis_handler.get_client()
-            stream_key = f"session:chat:{sid}"
-            messages = await redis_client.xrange(stream_key, count=50)  # 최근 50개
-            
-            ctx.log.info(f"[WS]        -- Loading chat history for late-joined user: {len(messages)} messages")
-            
-            for msg_id, fields in messages:
+            history_messages = await _load_late_join_history(ctx, sid)
+            ctx.log.info(f"[WS]        -- Loading chat history for late-joined user: {len(history_messages)} messages")
+
+            for history_msg in history_messages:
                 try:
-                    if not isinstance(fields, dict):
-                        continue
-                    
-                    body_json = fields.get("body", "{}")
-                    participant = fields.get("participant", "user")
-                    
-                    if isinstance(body_json, str):
-                        body_data = orjson.loads(body_json)
-                    else:
-                        body_data = body_json
-                    
-                    # 히스토리 메시지 구성
-                    history_msg = {
-                        "hd": body_data.get("hd", {
-                            "sid": sid,
-                            "event": ChatEvent.CHAT_MESSAGE.value,
-                            "role": participant,
-                        }),
-                        "bd": body_data.get("bd", {"text": "", "state": codes.ResponseStatus.SUCCESS})
-                    }
-                    
-                    # 헤더 보충
-                    if "sid" not in history_msg["hd"]:
-                        history_msg["hd"]["sid"] = sid
-                    if "event" not in history_msg["hd"]:
-                        history_msg["hd"]["event"] = ChatEvent.CHAT_MESSAGE.value
-                    if "role" not in history_msg["hd"]:
-                        history_msg["hd"]["role"] = participant
-                    
                     # 새로 접속한 클라이언트에게만 히스토리 전송
                     await websocket.send_json(history_msg)
-                    
                 except Exception as hist_err:
                     ctx.log.warning(f"[WS]        -- Failed to send history message: {hist_err}")
                     continue
@@ -159,118 +108,184 @@ async def websocket_chat(websocket: WebSocket):
 
     await ctx.ws_handler.receive_and_respond(websocket, processor=processor)
 
-async def handle_llm_invocation(ctx, websocket, msg: dict):
-    """LLM 호출 처리"""
-    try:
-        sid = msg.get("sid")
-        hd = msg.get("hd", {})
-        bd = msg.get("bd", {})
-        asker = hd.get("asker") or hd.get("role")
-        user_query = bd.get("text") or ""
+    # 소켓 종료 시 지연된 상태 저장을 즉시 기록
+    await SessionStateCache.flush(sid, ctx)
 
-        async def send_json_safe(payload):
-            try:
-                # 같은 세션의 모든 클라이언트에게 브로드캐스트
-                await ctx.ws_handler.broadcast_to_session(sid, payload)
-            except Exception as send_err:
-                ctx.log.warning(f"[WS]        -- Broadcast failed: {send_err}")
-                return
-        
-        ctx.log.info(f"[WS]        -- LLM invocation (asker={asker}) in session {sid}")
-        ctx.log.debug(f"[WS]        -- Message: {msg}")
-        
-        # 1. 프롬프트 인젝션 체크 (설정 파일의 LLM 매니저 사용)
-        manager = ctx.llm_manager
-        if manager._is_prompt_injection(user_query):
-            ctx.log.warning(f"[WS]        -- Prompt injection detected: {user_query[:50]}")
-            response_text = "아직 없는 기능입니다"
+async def _load_late_join_history(ctx, sid) -> List[dict]:
+    """
+    후속 접속자에게 보낼 최근 메시지 (최신 LATE_JOIN_HISTORY_COUNT개를 시간순으로)
+    메시지에는 초안 참조만 있으므로 전송 전에 blob 저장소에서 한 번에 본문을 복원합니다.
+    """
+    redis_client = ctx.redis_handler.get_client()
+    messages = await redis_client.xrevrange(f"session:chat:{sid}", count=LATE_JOIN_HISTORY_COUNT)
+
+    history = []
+    for msg_id, fields in reversed(messages):
+        try:
+            if not isinstance(fields, dict):
+                continue
             
-            # 프롬프트 인젝션 응답에도 user_info 포함
-            user_name_val = hd.get("user_name") or hd.get("asker") or "사용자"
-            role_val = hd.get("role") or "client"
-            contract_date_val = hd.get("contract_date")
+            body_json = fields.get("body", "{}")
+            participant = fields.get("participant", "user")
             
-            response = {
-                "hd": {
+            if isinstance(body_json, str):
+                body_data = orjson.loads(body_json)
+            else:
+                body_data = body_json
+            
+            # 히스토리 메시지 구성
+            history_msg = {
+                "hd": body_data.get("hd", {
                     "sid": sid,
-                    "event": ChatEvent.LLM_RESPONSE.value,
-                    "role": "assistant",
-                    "asker": asker,
-                    "user_name": user_name_val,
-                    "role_name": role_val,
-                    "contract_date": contract_date_val,
-                },
-                "bd": {
-                    "text": response_text,
-                    "state": codes.ResponseStatus.SUCCESS
-                }
+                    "event": ChatEvent.CHAT_MESSAGE.value,
+                    "role": participant,
+                }),
+                "bd": body_data.get("bd", {"text": "", "state": codes.ResponseStatus.SUCCESS})
             }
-            
-            await store_chat_message(
-                ctx, sid, "assistant", 
-                {"hd": response["hd"], "bd": response["bd"]}
-            )
-            await send_json_safe(response)
-            return
-        
-        # Redis에서 session_info 로드 (참여자 이름 확인)
-        client_name_fixed = "의뢰인"
-        provider_name_fixed = "용역자"
-        client_business_number = "미기재"
-        client_contact = "미기재"
-        provider_business_number = "미기재"
-        provider_contact = "미기재"
-        try:
-            redis_client = ctx.redis_handler.get_client()
-            session_key = f"session:info:{sid}"
-            session_info_json = await redis_client.get(session_key)
-            if session_info_json:
-                session_info = orjson.loads(session_info_json)
-                client_name_fixed = session_info.get("client_name") or "의뢰인"
-                provider_name_fixed = session_info.get("provider_name") or "용역자"
-                client_business_number = session_info.get("client_business_number") or "미기재"
-                client_contact = session_info.get("client_contact") or "미기재"
-                provider_business_number = session_info.get("provider_business_number") or "미기재"
-                provider_contact = session_info.get("provider_contact") or "미기재"
-        except Exception as e:
-            ctx.log.warning(f"[WS]        -- Failed to load session info in handler: {e}")
-            # 폴백: 쿼리 파라미터에서 읽기 (하지만 handle_llm_invocation에는 websocket 객체가 직접 전달되지 않음)
-            # 대신 state_manager의 user_info를 활용하거나 기본값 사용
 
-        # 2. 세션 상태 로드 또는 생성
+            # 헤더 보충
+            if "sid" not in history_msg["hd"]:
+                history_msg["hd"]["sid"] = sid
+            if "event" not in history_msg["hd"]:
+                history_msg["hd"]["event"] = ChatEvent.CHAT_MESSAGE.value
+            if "role" not in history_msg["hd"]:
+                history_msg["hd"]["role"] = participant
+            history.append(history_msg)
+        except Exception as hist_err:
+            ctx.log.warning(f"[WS]        -- Failed to parse history message {msg_id}: {hist_err}")
+            continue
+
+    def pending_ref(history_msg):
+        bd = history_msg["bd"]
+        if isinstance(bd, dict) and isinstance(bd.get("contract_draft_ref"), dict) and not bd.get("contract_draft"):
+            return bd["contract_draft_ref"]
+        return None
+
+    refs = [ref for ref in map(pending_ref, history) if ref]
+    drafts = await ContractDraftStore.resolve(ctx, sid, refs) if refs else {}
+    for history_msg in history:
+        ref = pending_ref(history_msg)
+        if ref and ref.get("sha256") in drafts:
+            history_msg["bd"] = {**history_msg["bd"], "contract_draft": drafts[ref["sha256"]]}
+    return history
+
+async def handle_llm_invocation(ctx, websocket, msg: dict):
+    """
+    LLM 호출 요청 수신 (입력 기록 후 바로 반환)
+    사용자 입력은 메시지마다 즉시 기록·브로드캐스트하고, LLM 턴은 세션 턴 액터가 실행합니다.
+    같은 세션에서 debounce 창 안에 같은 발화자가 연달아 보낸 메시지는 하나의 턴으로 합쳐집니다.
+    """
+    sid = msg.get("sid")
+    async with SessionStateCache.unit_of_work(sid, ctx):
+        if not await _ingest_user_message(ctx, websocket, msg):
+            return None
+    if not sid:
+        await _run_turn(ctx, websocket, msg)
+        return None
+    SessionTurnActor.submit(ctx, sid, websocket, msg, _run_turn)
+    return None
+
+async def _run_turn(ctx, websocket, msg: dict, turn: Optional[TurnHandle] = None):
+    """턴 실행 (턴 동안의 상태 저장은 모아서 턴 종료 시 한 번에 기록)"""
+    sid = msg.get("sid")
+    try:
+        async with SessionStateCache.unit_of_work(sid, ctx):
+            await _run_llm_invocation(ctx, websocket, msg, turn)
+    except TurnAbandoned:
+        # 참여자가 모두 떠남: 남은 LLM 호출 없이 지금까지의 상태 변경만 저장
         state_manager = await SessionStateCache.get(sid, ctx)
-        if not state_manager:
-            user_info = {
-                "userId": hd.get("userId"),
-                "client_name": client_name_fixed,
-                "provider_name": provider_name_fixed,
-            }
-            state_manager = ChatStateManager(sid, user_info)
+        if state_manager:
             await SessionStateCache.save(state_manager, ctx)
+        ctx.log.info(f"[WS]        -- Turn for {sid} stopped after participants left (persist-only)")
+
+async def _send_session(ctx, sid, payload):
+    try:
+        # 같은 세션의 모든 클라이언트에게 브로드캐스트
+        await ctx.ws_handler.broadcast_to_session(sid, payload)
+    except Exception as send_err:
+        ctx.log.warning(f"[WS]        -- Broadcast failed: {send_err}")
+
+async def _get_session_context(ctx, sid, query_params=None) -> SessionContext:
+    """연결 그룹에 붙은 세션 컨텍스트 (없으면 로드 후 연결 그룹에 붙임)"""
+    context = ctx.ws_handler.get_session_context(sid)
+    if context is None:
+        context = await SessionContext.load(ctx, sid, query_params)
+        ctx.ws_handler.attach_session_context(sid, context)
+    return context
 
+async def _load_session_info(ctx, sid) -> Dict[str, str]:
+    """세션 컨텍스트의 참여자 정보 (없으면 기본값, 턴마다 Redis를 읽지 않음)"""
+    return (await _get_session_context(ctx, sid)).participant_info()
+
+async def _get_or_create_state(ctx, sid, hd: dict, session_info: Dict[str, str]) -> ChatStateManager:
+    """세션 상태 로드 또는 생성"""
+    state_manager = await SessionStateCache.get(sid, ctx)
+    if not state_manager:
+        user_info = {
+            "userId": hd.get("userId"),
+            "client_name": session_info["client_name"],
+            "provider_name": session_info["provider_name"],
+        }
+        state_manager = ChatStateManager(sid, user_info)
+        await SessionStateCache.save(state_manager, ctx)
+        ctx.log.info(f"[WS]        -- New session state created for {sid}, user: {hd.get('user_name')} ({hd.get('role')})")
+    else:
+        ctx.log.debug(f"[WS]        -- Loaded session state for {sid}, current_step: {state_manager.current_step.value}")
+    return state_manager
+
+async def _ingest_user_message(ctx, websocket, msg: dict) -> bool:
+    """
+    메시지 단위 처리: 프롬프트 인젝션 체크, 역할별 입력 기록, 스트림 저장, 다른 참여자에게 브로드캐스트
+    LLM 턴을 실행해야 하면 True
+    """
+    sid = msg.get("sid")
+    hd = msg.get("hd", {})
+    bd = msg.get("bd", {})
+    asker = hd.get("asker") or hd.get("role")
+    user_query = bd.get("text") or ""
+
+    # 1. 프롬프트 인젝션 체크 (설정 파일의 LLM 매니저 사용)
+    manager = ctx.llm_manager
+    if manager._is_prompt_injection(user_query):
+        ctx.log.warning(f"[WS]        -- Prompt injection detected: {user_query[:50]}")
+        response_text = "아직 없는 기능입니다"
         
-            # 역할 한글 표현
-            role_korean = "의뢰인(갑)" if hd.get('role') == 'client' else "용역자(을)"
-            ctx.log.info(f"[WS]        -- New session state created for {sid}, user: {hd.get('user_name')} ({hd.get('role')})")
-        else:
-            ctx.log.debug(f"[WS]        -- Loaded session state for {sid}, current_step: {state_manager.current_step.value}")
-            # 매 메시지마다 user_info 업데이트 (프론트에서 전송된 최신 정보로)
-            # if hd.get("user_name"):
-            #     state_manager.user_info["user_name"] = hd.get("user_name")
-            # if hd.get("role"):
-            #     state_manager.user_info["role"] = hd.get("role")
-            # if hd.get("contract_date"):
-            #     state_manager.user_info["contract_date"] = hd.get("contract_date")
+        # 프롬프트 인젝션 응답에도 user_info 포함
+        user_name_val = hd.get("user_name") or hd.get("asker") or "사용자"
+        role_val = hd.get("role") or "client"
+        contract_date_val = hd.get("contract_date")
         
-        # [Fix] collected_data에 참여자 이름 정보 동기화
-        if client_name_fixed and client_name_fixed != "의뢰인":
-            state_manager.collected_data["client_name"] = client_name_fixed
-        if provider_name_fixed and provider_name_fixed != "용역자":
-            state_manager.collected_data["provider_name"] = provider_name_fixed
+        response = {
+            "hd": {
+                "sid": sid,
+                "event": ChatEvent.LLM_RESPONSE.value,
+                "role": "assistant",
+                "asker": asker,
+                "user_name": user_name_val,
+                "role_name": role_val,
+                "contract_date": contract_date_val,
+            },
+            "bd": {
+                "text": response_text,
+                "state": codes.ResponseStatus.SUCCESS
+            }
+        }
+        
+        await store_chat_message(
+            ctx, sid, "assistant", 
+            {"hd": response["hd"], "bd": response["bd"]}
+        )
+        await _send_session(ctx, sid, response)
+        return False
+
+    try:
+        # 2. 세션 상태 로드 또는 생성
+        state_manager = await _get_or_create_state(ctx, sid, hd, await _load_session_info(ctx, sid))
 
         # 3. 사용자 입력 기록
         role = hd.get("role", "client")
         state_manager.add_role_input(role, user_query)
+        await SessionStateCache.save(state_manager, ctx)
         
         # 3.5. 사용자 입력을 Redis 스트림에 저장 (participant에 역할 포함)
         user_message_data = {
@@ -300,71 +315,204 @@ async def handle_llm_invocation(ctx, websocket, msg: dict):
         }
         # 발신자(websocket)를 제외하고 다른 세션 참여자들에게만 전송
         await ctx.ws_handler.broadcast_to_session(sid, user_message_broadcast, exclude_sender=websocket)
+    except Exception as e:
+        ctx.log.error(f"[WS]        -- Failed to record user message: {e}")
+        await _send_session(ctx, sid, {
+            "hd": {"sid": sid, "event": ChatEvent.LLM_ERROR.value, "role": "assistant"},
+            "bd": {"state": codes.ResponseStatus.SERVER_ERROR, "detail": str(e)}
+        })
+        return False
+    return True
+
+def _stream_body(bd: dict) -> dict:
+    """스트림 기록용 본문 (초안이 초안 키에 저장됐으면 전문 대신 contract_draft_ref만 남김)"""
+    if bd.get("contract_draft_ref") and bd.get("contract_draft"):
+        return {**bd, "contract_draft": None}
+    return bd
+
+def _cancel_speculative(task: Optional[asyncio.Task]):
+    """결과를 쓰지 않게 된 미리 시작한 LLM 호출 취소 (이미 끝났으면 예외만 회수하여 미회수 경고 방지)"""
+    if task is None:
+        return
+    if not task.done():
+        task.cancel()
+    elif not task.cancelled():
+        task.exception()
+
+
+def _classify_locally(ctx, task: str, text: str, step: str):
+    """
+    로컬 턴 분류기 판단 (판단, 확률)
+    모델이 없거나 확신도가 낮으면 판단은 None이고, 확률은 판단 로그에 함께 남겨 평가에 사용합니다.
+    """
+    classifier = getattr(ctx, "turn_classifier", None)
+    if classifier is None:
+        return None, None
+    try:
+        return classifier.decide(task, text, step)
+    except Exception as e:
+        ctx.log.warning(f"[WS]        -- Turn classifier failed ({task}): {e}")
+        return None, None
+
+def _record_decision(ctx, task: str, text: str, step: str, label: bool, started: float, prob: Optional[float]):
+    """LLM 판단을 로컬 분류기 학습 로그에 기록"""
+    decision_log = getattr(ctx, "turn_decision_log", None)
+    if decision_log is None:
+        return
+    classifier = getattr(ctx, "turn_classifier", None)
+    try:
+        decision_log.record(
+            task, text, step, label,
+            llm_ms=(time.perf_counter() - started) * 1000,
+            prob=prob,
+            model_version=classifier.version if classifier else None,
+        )
+    except Exception as e:
+        ctx.log.warning(f"[WS]        -- Failed to record turn decision: {e}")
+
+def _evaluate_step_advance_rules(ctx, state_manager, user_query, effective_user_query, chat_history, classification_result) -> Optional[Dict]:
+    """
+    단계 진행 여부를 결정적 규칙으로 판단 (결론이 나면 step_advance_meta, 아니면 None → LLM 분류)
+    우선순위: completed 가드 > 계약서 완료 패턴 > 진행 의사 패턴 > 양측 합의 > 분류 완료 > 소개 단계 자동 진행
+    """
+    def decided(advance: bool, reason: str, source: str) -> Dict:
+        return {"advance": advance, "reason": reason, "source": source, "decided_by": "rules"}
+
+    # [CRITICAL] completed 단계에서는 더 이상 단계 진행하지 않음 (무한 루프 방지)
+    if state_manager.current_step == ChatStep.COMPLETED:
+        ctx.log.info("[WS]        -- Already at COMPLETED step, no further advancement")
+        return decided(False, "이미 completed 단계 (최종 단계)", "completed_guard")
+
+    # [NEW] finalization 단계에서 계약서 완료 키워드 감지 시 completed로 강제 전환
+    if state_manager.current_step == ChatStep.FINALIZATION:
+        for pattern in _CONTRACT_COMPLETION_PATTERNS:
+            if re.search(pattern, effective_user_query, flags=re.IGNORECASE):
+                ctx.log.info(f"[WS]        -- Contract completion keyword detected: {effective_user_query}")
+                return decided(True, f"계약서 완료 키워드 감지: {effective_user_query[:30]}", "contract_completion")
+
+    # 사용자가 명확한 진행 키워드를 사용했다면 진행
+    # _CONFIRM_PATTERNS가 엄격하게 수정되었으므로(예: "다음 단계", "넘어가"), 모든 단계에서 적용 가능
+    if state_manager.check_confirm_pattern(effective_user_query):
+        ctx.log.info(f"[WS]        -- Step advance by explicit keyword pattern: {effective_user_query}")
+        return decided(True, f"진행 의사 패턴 매칭: {effective_user_query[:30]}", "keyword_override")
+
+    # [강화] 양측 합의 확인 로직: 키워드 + 양측 발화 + 순차적 동의 패턴 체크
+    # 최근 10개 대화에서 client와 provider 발화 확인
+    has_client = any("client" in line or "의뢰인" in line for line in chat_history[-10:])
+    has_provider = any("provider" in line or "용역자" in line for line in chat_history[-10:])
+    both_participated = has_client and has_provider
+    
+    # 확정/제안 키워드 (프롬프트 파일에서 관리)
+    has_confirm_keyword = any(kw in effective_user_query for kw in CONFIRM_KEYWORDS)
+    has_proposal_keyword = any(kw in effective_user_query for kw in PROPOSAL_KEYWORDS)
+    
+    # 순차적 동의 패턴 확인: 최근 2개 메시지에서 제안→수락 흐름 체크
+    sequential_agreement = False
+    if len(chat_history) >= 2:
+        prev_line = chat_history[-2]
+        curr_line = chat_history[-1]
+        # 이전: client 제안, 현재: provider 수락 or 이전: provider 제안, 현재: client 수락
+        if ("client" in prev_line and "provider" in curr_line) or ("provider" in prev_line and "client" in curr_line):
+            if any(kw in curr_line for kw in CONFIRM_KEYWORDS):
+                # [Safety] 제안 키워드가 함께 있으면 동의가 아닌 역제안으로 간주
+                if not any(kw in curr_line for kw in PROPOSAL_KEYWORDS):
+                    sequential_agreement = True
+    
+    # 진행 조건: 양측 참여 + (확정 키워드 or 순차적 동의)
+    if both_participated and (has_confirm_keyword or sequential_agreement):
+        ctx.log.info(f"[WS]        -- Step advance by mutual agreement: both participated + explicit consent")
+        return decided(True, f"양측 합의 확인 (양측 발화 + 동의 표현): {effective_user_query[:30]}", "mutual_agreement")
+    elif has_proposal_keyword and not both_participated:
+        ctx.log.info(f"[WS]        -- Proposal detected but waiting for counterpart's response")
+    elif has_confirm_keyword and not both_participated:
+        ctx.log.info(f"[WS]        -- Consent keyword detected but only one side participated, waiting for counterpart")
+
+    # 분류 결과가 단계 완료로 판단된 경우에도 진행
+    # 단, 양측 합의가 필요한 단계에서는 단순 데이터 추출(is_complete)만으로 진행하지 않음
+    if classification_result and classification_result.get("is_complete"):
+        steps_requiring_agreement = [ChatStep.WORK_SCOPE, ChatStep.WORK_PERIOD, ChatStep.BUDGET, ChatStep.REVISIONS, ChatStep.FINALIZATION]
+        if state_manager.current_step in steps_requiring_agreement:
+            # [Strict] 반드시 STEP_ADVANCE_CLASSIFICATION_PROMPT의 'advance: true' 또는 명시적 합의 키워드가 있어야 함
+            ctx.log.info(f"[WS]        -- Step {state_manager.current_step.value} requires strict agreement. Ignoring classification.is_complete.")
+        else:
+            # 합의가 덜 중요한 단계거나 초기 단계는 분류 결과 신뢰
+            ctx.log.info("[WS]        -- Step advance by classification is_complete flag")
+            return decided(True, "응답 분류에서 완료로 판단", "classification")
+
+    # 추가 폴백: 소개 단계에서 사용자가 의미 있는 입력을 하면 진행
+    if state_manager.current_step == ChatStep.INTRODUCTION and user_query.strip():
+        ctx.log.info("[WS]        -- Auto-advance from introduction due to user input")
+        return decided(True, "소개 단계 자동 진행 (사용자 입력 감지)", "auto_intro")
+
+    return None
+
+async def _run_llm_invocation(ctx, websocket, msg: dict, turn: Optional[TurnHandle] = None):
+    """
+    LLM 호출 처리 (사용자 입력은 _ingest_user_message에서 이미 기록됨)
+    turn이 주어지면 첫 응답 전송/상태 반영 직전에 commit()하여, 그 전까지만 새 메시지에 의해 취소될 수 있습니다.
+    LLM 호출은 turn.wrap()을 거치므로 참여자가 모두 떠난 뒤에는 호출하지 않습니다 (TurnAbandoned).
+    """
+    def commit_turn():
+        if turn is not None:
+            turn.commit()
+
+    transition_task: Optional[asyncio.Task] = None     # 단계 진행 결정 직후 미리 시작한 다음 단계 안내 응답
+    try:
+        sid = msg.get("sid")
+        hd = msg.get("hd", {})
+        bd = msg.get("bd", {})
+        asker = hd.get("asker") or hd.get("role")
+        user_query = bd.get("text") or ""
+
+        async def send_json_safe(payload):
+            await _send_session(ctx, sid, payload)
         
-        # 4. 대화 이력 가져오기 (Redis에서)
+        ctx.log.info(f"[WS]        -- LLM invocation (asker={asker}) in session {sid}, merged={msg.get('merged_count', 1)}")
+        ctx.log.debug(f"[WS]        -- Message: {msg}")
+        manager = ctx.llm_manager
+        generate = turn.wrap(manager.generate) if turn is not None else manager.generate
+        classify_response = turn.wrap(manager.classify_response) if turn is not None else manager.classify_response
+        
+        # 세션 컨텍스트에서 참여자 정보 확인 (접속 시 로드, Redis 재조회 없음)
+        session_info = await _load_session_info(ctx, sid)
+        client_name_fixed = session_info["client_name"]
+        provider_name_fixed = session_info["provider_name"]
+        client_business_number = session_info["client_business_number"]
+        client_contact = session_info["client_contact"]
+        provider_business_number = session_info["provider_business_number"]
+        provider_contact = session_info["provider_contact"]
+
+        # 2. 세션 상태 로드 (입력 기록 시 생성됨)
+        state_manager = await _get_or_create_state(ctx, sid, hd, session_info)
+        
+        # [Fix] collected_data에 참여자 이름 정보 동기화
+        if client_name_fixed and client_name_fixed != "의뢰인":
+            state_manager.update_data("client_name", client_name_fixed)
+        if provider_name_fixed and provider_name_fixed != "용역자":
+            state_manager.update_data("provider_name", provider_name_fixed)
+
+        role = hd.get("role", "client")
+        
+        # 4. 대화 이력 가져오기 (세션별 이력 버퍼, 없으면 Redis에서 최근 메시지 복원)
         chat_history = []
-        previous_contract_draft = None  # 이전 contract_draft 저장
-        stream_key = f"session:chat:{sid}"
+        legacy_contract_draft = None  # 초안 키 도입 전 메시지에 실린 contract_draft
         try:
-            redis_client = ctx.redis_handler.get_client()
-            messages = await redis_client.xrange(stream_key, count=20)  # 최근 20개 메시지
-            
-            # 메시지를 역순으로 처리하여 가장 최신의 contract_draft 찾기
-            for msg_id, fields in reversed(messages):
-                # fields가 dict인지 확인
-                if not isinstance(fields, dict):
-                    ctx.log.debug(f"[WS]        -- Unexpected fields type: {type(fields)}")
-                    continue
-                
-                # body는 JSON 문자열로 저장되어 있음
-                body_json = fields.get("body", "{}")
-                participant_field = fields.get("participant", "user")  # Redis에 저장된 participant 필드 사용
-                
-                # body_json을 dict로 파싱
-                if isinstance(body_json, str):
-                    try:
-                        body_data = orjson.loads(body_json)
-                    except Exception as parse_err:
-                        ctx.log.warning(f"[WS]        -- Failed to parse body JSON: {parse_err}, body_json={body_json}")
-                        continue
-                else:
-                    body_data = body_json
-                
-                # body_data가 dict여야 함
-                if not isinstance(body_data, dict):
-                    ctx.log.warning(f"[WS]        -- body_data is not dict, got {type(body_data)}: {body_data}")
-                    continue
-                
-                text = body_data.get("bd", {}).get("text", "") if isinstance(body_data.get("bd"), dict) else ""
-                
-                # 이전 contract_draft 추출 (가장 최근 것을 한 번만)
-                if previous_contract_draft is None:
-                    contract_draft_from_msg = body_data.get("bd", {}).get("contract_draft") if isinstance(body_data.get("bd"), dict) else None
-                    if contract_draft_from_msg:
-                        previous_contract_draft = contract_draft_from_msg
-                
-                # 라벨 결정: client/provider/assistant로 표기
-                if text:
-                    if participant_field in ["client", "provider"]:
-                        # 새로운 방식: participant가 직접 역할을 나타냄
-                        role_korean = "의뢰인(갑)" if participant_field == "client" else "용역자(을)"
-                        label = f"{participant_field}({role_korean})"
-                    elif participant_field == "user":
-                        # 하위 호환성: 기존 "user" 방식도 지원
-                        role_from_msg = body_data.get("hd", {}).get("role", "user") if isinstance(body_data.get("hd"), dict) else "user"
-                        role_korean = "의뢰인(갑)" if role_from_msg == "client" else "용역자(을)" if role_from_msg == "provider" else ""
-                        label = f"user({role_from_msg}/{role_korean})" if role_korean else f"user({role_from_msg})"
-                    elif participant_field == "assistant":
-                        label = "assistant"
-                    else:
-                        label = participant_field
-                    chat_history.append(f"{label}: {text}")
+            chat_history, legacy_contract_draft = await ChatHistoryCache.get(ctx, sid)
         except Exception as e:
             ctx.log.warning(f"[WS]        -- Failed to load chat history: {e}")
             import traceback
             ctx.log.debug(f"[WS]        -- Traceback: {traceback.format_exc()}")
             chat_history = []  # 이력 로드 실패 시 빈 배열로 계속 진행
 
+        # 가장 최근 contract_draft (세션별 초안 키에서 버전만 확인 후 조회)
+        previous_contract_draft = legacy_contract_draft
+        try:
+            draft_record = await ContractDraftStore.get(ctx, sid)
+            if draft_record:
+                previous_contract_draft = draft_record["draft"]
+        except Exception as e:
+            ctx.log.warning(f"[WS]        -- Failed to load contract draft: {e}")
+
         # 대화 이력 로그 출력 (디버깅용)
         ctx.log.info(f"[WS]        -- Chat history loaded: {len(chat_history)} messages")
         if chat_history:
@@ -373,83 +521,112 @@ async def handle_llm_invocation(ctx, websocket, msg: dict):
         # [NEW] 4.5. 질문 감지 및 RAG 답변 (Question Answering)
         # 사용자가 계약 내용 입력이 아닌, 용어 정의나 법률적 질문을 한 경우 먼저 답변을 제공
         question_answered = False
-        if user_query.strip():
+
+        async def send_question_answer(answer_text: str):
+            commit_turn()
+            ans_response = {
+                "hd": {
+                    "sid": sid,
+                    "event": ChatEvent.LLM_RESPONSE.value,
+                    "role": "assistant",
+                    "asker": asker,
+                    "step": state_manager.current_step.value,
+                    "user_name": "DoQ",
+                    "role_name": "assistant",
+                    "type": "question_answer"
+                },
+                "bd": {
+                    "text": answer_text,
+                    "state": codes.ResponseStatus.SUCCESS
+                }
+            }
+            await store_chat_message(ctx, sid, "assistant", {"hd": ans_response["hd"], "bd": ans_response["bd"], "sid": sid})
+            await send_json_safe(ans_response)
+
+        if user_query.strip() and not has_question_marker(user_query):
+            ctx.log.debug(f"[WS]        -- Question detection skipped: no question markers")
+        elif user_query.strip():
             try:
-                # 프롬프트 파일에서 로드한 템플릿 사용
-                detection_prompt = QUESTION_DETECTION_PROMPT.format(
-                    user_query=user_query,
-                    current_step=state_manager.current_step.value
-                )
+                # 로컬 분류기가 확신하면 질문 감지 LLM 호출 생략 (질문이면 원문을 검색어로 사용)
+                current_step_value = state_manager.current_step.value
+                local_is_question, local_prob = _classify_locally(ctx, "question", user_query, current_step_value)
+                det_parsed = None
+                if local_is_question is not None:
+                    det_parsed = {"is_question": local_is_question, "search_query": ""}
+                    ctx.log.info(f"[WS]        -- Question detection by local classifier: {local_is_question} (p={local_prob:.3f})")
+                else:
+                    detection_started = time.perf_counter()
+                    # 프롬프트 파일에서 로드한 템플릿 사용
+                    detection_prompt = QUESTION_DETECTION_PROMPT.format(
+                        user_query=user_query,
+                        current_step=state_manager.current_step.value
+                    )
                 
-                detection_res = await manager.generate(detection_prompt, temperature=0.1)
+                    detection_res = await generate(detection_prompt, temperature=0.1)
                 
-                # 파싱 로직 강화: 다양한 형식 처리
-                det_parsed = None
-                det_json_str = detection_res.strip()
+                    # 파싱 로직 강화: 다양한 형식 처리
+                    det_json_str = detection_res.strip()
                 
-                # 1차: 마크다운 코드블록에서 추출
-                det_json_match = re.search(r"```(?:json)?\s*(\{.*?\})\s*```", detection_res, re.DOTALL)
-                if det_json_match:
-                    det_json_str = det_json_match.group(1)
+                    # 1차: 마크다운 코드블록에서 추출
+                    det_json_match = re.search(r"```(?:json)?\s*(\{.*?\})\s*```", detection_res, re.DOTALL)
+                    if det_json_match:
+                        det_json_str = det_json_match.group(1)
                 
-                # 2차: 순수 JSON 객체 추출 (코드블록 없이 {...} 형태)
-                if not det_json_match:
-                    json_obj_match = re.search(r"(\{[^{}]*\"is_question\"[^{}]*\})", detection_res, re.DOTALL)
-                    if json_obj_match:
-                        det_json_str = json_obj_match.group(1)
+                    # 2차: 순수 JSON 객체 추출 (코드블록 없이 {...} 형태)
+                    if not det_json_match:
+                        json_obj_match = re.search(r"(\{[^{}]*\"is_question\"[^{}]*\})", detection_res, re.DOTALL)
+                        if json_obj_match:
+                            det_json_str = json_obj_match.group(1)
                 
-                # 3차: JSON 파싱 시도
-                try:
-                    det_parsed = orjson.loads(det_json_str)
-                except Exception:
-                    # 4차: is_question 값만 추출 (불완전한 JSON 대응)
-                    is_q_match = re.search(r'"is_question"\s*:\s*(true|false)', detection_res, re.IGNORECASE)
-                    if is_q_match:
-                        is_question_val = is_q_match.group(1).lower() == "true"
-                        search_q_match = re.search(r'"search_query"\s*:\s*"([^"]*)"', detection_res)
-                        det_parsed = {
-                            "is_question": is_question_val,
-                            "search_query": search_q_match.group(1) if search_q_match else ""
-                        }
+                    # 3차: JSON 파싱 시도
+                    try:
+                        det_parsed = orjson.loads(det_json_str)
+                    except Exception:
+                        # 4차: is_question 값만 추출 (불완전한 JSON 대응)
+                        is_q_match = re.search(r'"is_question"\s*:\s*(true|false)', detection_res, re.IGNORECASE)
+                        if is_q_match:
+                            is_question_val = is_q_match.group(1).lower() == "true"
+                            search_q_match = re.search(r'"search_query"\s*:\s*"([^"]*)"', detection_res)
+                            det_parsed = {
+                                "is_question": is_question_val,
+                                "search_query": search_q_match.group(1) if search_q_match else ""
+                            }
                 
+                    if det_parsed is not None:
+                        _record_decision(ctx, "question", user_query, current_step_value, bool(det_parsed.get("is_question")), detection_started, local_prob)
+
                 if det_parsed and det_parsed.get("is_question"):
                     search_q = det_parsed.get("search_query") or user_query
                     ctx.log.info(f"[WS]        -- Question detected: {search_q}")
-                    
-                    # RAG Search
-                    rag_manager_qa = RAGManager()
-                    rag_results_qa = rag_manager_qa.search(search_q, k=2)
-                    
-                    # Generate Answer
-                    ans_prompt = RAG_ANSWER_PROMPT.format(
-                        user_query=user_query,
-                        rag_context=rag_results_qa
-                    )
-                    
-                    rag_answer_text = await manager.generate(ans_prompt, temperature=0.7)
-                    
-                    # Send Answer Message
-                    ans_response = {
-                        "hd": {
-                            "sid": sid,
-                            "event": ChatEvent.LLM_RESPONSE.value,
-                            "role": "assistant",
-                            "asker": asker,
-                            "step": state_manager.current_step.value,
-                            "user_name": "DoQ",
-                            "role_name": "assistant",
-                            "type": "question_answer"
-                        },
-                        "bd": {
-                            "text": rag_answer_text,
-                            "state": codes.ResponseStatus.SUCCESS
-                        }
-                    }
-                    await store_chat_message(ctx, sid, "assistant", {"hd": ans_response["hd"], "bd": ans_response["bd"], "sid": sid})
-                    await send_json_safe(ans_response)
-                    
-                    question_answered = True
-                    ctx.log.info(f"[WS]        -- Sent RAG answer for question")
+
+                    # 질문으로 판단된 경우에만 미리 생성된 FAQ 답변을 확인 (일치하면 검색/답변 LLM 호출 생략)
+                    faq_match = None
+                    try:
+                        faq_match = RAGManager().match_faq(user_query, step=current_step_value)
+                    except Exception as e:
+                        ctx.log.warning(f"[WS]        -- FAQ match failed: {e}")
+                    if faq_match:
+                        await send_question_answer(faq_match["answer"])
+                        question_answered = True
+                        ctx.log.info(f"[WS]        -- Sent FAQ answer: {faq_match['id']} (similarity={faq_match['similarity']})")
+                    else:
+                        # RAG Search
+                        rag_manager_qa = RAGManager()
+                        rag_results_qa = await asyncio.to_thread(rag_manager_qa.search, search_q, 2) or RAG_NO_CONTEXT_TEXT
+
+                        # Generate Answer
+                        ans_prompt = RAG_ANSWER_PROMPT.format(
+                            user_query=user_query,
+                            rag_context=rag_results_qa
+                        )
+
+                        rag_answer_text = await generate(ans_prompt, temperature=0.7)
+
+                        # Send Answer Message
+                        await send_question_answer(rag_answer_text)
+
+                        question_answered = True
+                        ctx.log.info(f"[WS]        -- Sent RAG answer for question")
                     
             except Exception as e:
                 ctx.log.warning(f"[WS]        -- Question detection/answering failed: {e}")
@@ -465,7 +642,7 @@ async def handle_llm_invocation(ctx, websocket, msg: dict):
                     "role": role,
                     "current_date": datetime.now().strftime("%Y-%m-%d")
                 }
-                classification_result = await manager.classify_response(
+                classification_result = await classify_response(
                     user_response=user_query,
                     current_step=state_manager.current_step.value,
                     placeholders=classification_placeholders
@@ -500,8 +677,6 @@ async def handle_llm_invocation(ctx, websocket, msg: dict):
 
         # 6. 대화 로그 기반 단계 진행 의사 분류 (Gemini 호출)
         confirmation_message_sent = False
-        # chat_history를 다시 정렬 (역순으로 추출했으므로)
-        chat_history.reverse()
         conversation_context = "\n".join(chat_history[-10:])  # 최근 10개만 사용
 
         # [Enhance] llm.trigger 요청 시 user_query가 비어 있을 수 있어, 직전 사용자 발화로 대체
@@ -517,183 +692,244 @@ async def handle_llm_invocation(ctx, websocket, msg: dict):
         effective_user_query = user_query.strip() or _extract_last_user_text(chat_history)
 
         current_step_prompt = state_manager.current_step.prompt
-        should_advance = False
-        
-        # [DEBUG] 프론트 전송용 step advance 메타 정보
-        step_advance_meta = {"advance": False, "reason": "", "source": "llm"}
-        try:
-            decision_text = await manager.generate(
-                scenario.STEP_ADVANCE_CLASSIFICATION_PROMPT,
-                placeholders={
-                    "conversation_context": conversation_context,
-                    "current_step": state_manager.current_step.value,
-                    "current_step_prompt": current_step_prompt,
-                    "user_query": effective_user_query,
-                    "current_date": datetime.now().strftime("%Y-%m-%d")
-                },
-                max_output_tokens=800,
-                temperature=0.0
-            )
 
-            # 파싱 로직 강화: 다양한 형식 처리
-            decision_json_str = decision_text.strip()
-            
-            # 1차: 마크다운 코드블록에서 추출
-            decision_json_match = re.search(r"```(?:json)?\s*(\{.*?\})\s*```", decision_text, re.DOTALL)
-            if decision_json_match:
-                decision_json_str = decision_json_match.group(1)
-            
-            # 2차: 순수 JSON 객체 추출 (코드블록 없이 {...} 형태)
-            if not decision_json_match:
-                json_obj_match = re.search(r"(\{[^{}]*\"advance\"[^{}]*\})", decision_text, re.DOTALL)
-                if json_obj_match:
-                    decision_json_str = json_obj_match.group(1)
-
-            # 관대하게 파싱: 불리언 문자열/대소문자 섞여도 허용
-            parsed = None
+        # 결정적 규칙(완료 가드/계약 완료/진행 패턴/양측 합의/분류 완료/소개 단계)을 먼저 평가하고,
+        # 결론이 나면 단계 진행 분류 LLM 호출을 생략 (LLM 결과가 어차피 덮어써지는 경우)
+        step_advance_meta = _evaluate_step_advance_rules(
+            ctx, state_manager, user_query, effective_user_query, chat_history, classification_result
+        )
+        local_advance, local_advance_prob = None, None
+        if step_advance_meta is None and effective_user_query:
+            # 규칙으로 결론이 나지 않으면 로컬 분류기가 확신하는 경우에 한해 LLM 호출 생략
+            local_advance, local_advance_prob = _classify_locally(ctx, "step_advance", effective_user_query, state_manager.current_step.value)
+            if local_advance is not None:
+                step_advance_meta = {
+                    "advance": local_advance,
+                    "reason": f"local classifier p={local_advance_prob:.3f}",
+                    "source": "classifier",
+                    "decided_by": "classifier"
+                }
+        if step_advance_meta is not None:
+            ctx.log.info(f"[WS]        -- Step advance decided by {step_advance_meta['decided_by']} ({step_advance_meta['source']}), skipping LLM classification")
+        else:
+            # [DEBUG] 프론트 전송용 step advance 메타 정보
+            step_advance_meta = {"advance": False, "reason": "", "source": "llm", "decided_by": "llm"}
             try:
-                parsed = orjson.loads(decision_json_str)
-            except Exception:
-                # 3차: advance 값만 추출 (불완전한 JSON 대응)
-                adv_match = re.search(r'"advance"\s*:\s*(true|false)', decision_text, re.IGNORECASE)
-                if adv_match:
-                    advance_val = adv_match.group(1).lower() == "true"
-                    reason_match = re.search(r'"reason"\s*:\s*"([^"]*)"', decision_text)
-                    parsed = {
-                        "advance": advance_val,
-                        "reason": reason_match.group(1) if reason_match else "regex_extracted"
+                advance_started = time.perf_counter()
+                decision_text = await generate(
+                    scenario.STEP_ADVANCE_CLASSIFICATION_PROMPT,
+                    placeholders={
+                        "conversation_context": conversation_context,
+                        "current_step": state_manager.current_step.value,
+                        "current_step_prompt": current_step_prompt,
+                        "user_query": effective_user_query,
+                        "current_date": datetime.now().strftime("%Y-%m-%d")
+                    },
+                    max_output_tokens=800,
+                    temperature=0.0
+                )
+
+                # 파싱 로직 강화: 다양한 형식 처리
+                decision_json_str = decision_text.strip()
+                
+                # 1차: 마크다운 코드블록에서 추출
+                decision_json_match = re.search(r"```(?:json)?\s*(\{.*?\})\s*```", decision_text, re.DOTALL)
+                if decision_json_match:
+                    decision_json_str = decision_json_match.group(1)
+                
+                # 2차: 순수 JSON 객체 추출 (코드블록 없이 {...} 형태)
+                if not decision_json_match:
+                    json_obj_match = re.search(r"(\{[^{}]*\"advance\"[^{}]*\})", decision_text, re.DOTALL)
+                    if json_obj_match:
+                        decision_json_str = json_obj_match.group(1)
+
+                # 관대하게 파싱: 불리언 문자열/대소문자 섞여도 허용
+                parsed = None
+                try:
+                    parsed = orjson.loads(decision_json_str)
+                except Exception:
+                    # 3차: advance 값만 추출 (불완전한 JSON 대응)
+                    adv_match = re.search(r'"advance"\s*:\s*(true|false)', decision_text, re.IGNORECASE)
+                    if adv_match:
+                        advance_val = adv_match.group(1).lower() == "true"
+                        reason_match = re.search(r'"reason"\s*:\s*"([^"]*)"', decision_text)
+                        parsed = {
+                            "advance": advance_val,
+                            "reason": reason_match.group(1) if reason_match else "regex_extracted"
+                        }
+                    else:
+                        # 4차: 단순 true/false 문자열만 온 경우 처리
+                        text_lower = decision_json_str.strip().lower()
+                        if text_lower in ("true", "false"):
+                            parsed = {"advance": text_lower == "true", "reason": "boolean_only"}
+                if parsed:
+                    step_advance_meta = {
+                        "advance": bool(parsed.get("advance")),
+                        "reason": parsed.get("reason", ""),
+                        "source": "llm",
+                        "decided_by": "llm"
                     }
+                    ctx.log.info(f"[WS]        -- Step advance decision: {step_advance_meta['advance']}, reason={parsed.get('reason')}")
+                    if effective_user_query:
+                        _record_decision(ctx, "step_advance", effective_user_query, state_manager.current_step.value, step_advance_meta["advance"], advance_started, local_advance_prob)
                 else:
-                    # 4차: 단순 true/false 문자열만 온 경우 처리
-                    text_lower = decision_json_str.strip().lower()
-                    if text_lower in ("true", "false"):
-                        parsed = {"advance": text_lower == "true", "reason": "boolean_only"}
-            if parsed:
-                should_advance = bool(parsed.get("advance"))
+                    raise ValueError("Cannot parse advance decision")
+                
+            except Exception as e:
+                ctx.log.warning(f"[WS]        -- Step advance classification failed: {e}")
+                # 진행 의사 패턴은 규칙 단계에서 이미 확인했으므로 진행하지 않음
                 step_advance_meta = {
-                    "advance": should_advance,
-                    "reason": parsed.get("reason", ""),
-                    "source": "llm"
+                    "advance": False,
+                    "reason": f"LLM 파싱 실패: {str(e)[:50]}",
+                    "source": "fallback",
+                    "decided_by": "fallback"
                 }
-                ctx.log.info(f"[WS]        -- Step advance decision: {should_advance}, reason={parsed.get('reason')}")
-            else:
-                raise ValueError("Cannot parse advance decision")
-            
-        except Exception as e:
-            ctx.log.warning(f"[WS]        -- Step advance classification failed, fallback to keyword: {e}")
-            # 예외 발생 시에만 handle_user_confirm 호출 (상태 변경 포함)
-            should_advance = state_manager.handle_user_confirm(user_query)
-            step_advance_meta = {
-                "advance": should_advance,
-                "reason": f"LLM 파싱 실패, 키워드 폴백: {str(e)[:50]}",
-                "source": "fallback"
-            }
+        async def build_common_placeholders(step: ChatStep, previous_step: Optional[ChatStep]) -> dict:
+            """
+            응답 프롬프트 공통 placeholders (step 기준)
+            단계 진행 시에는 턴 확정 후 상태를 옮기기 전에 다음 단계 기준으로 미리 만들어 전환 안내 호출을 먼저 시작합니다.
+            """
+            # 역할 한글 변환
+            role_korean = "의뢰인(갑)" if state_manager.user_info.get("role") == "client" else "용역자(을)"
 
-        # [Relaxation] LLM이 False라고 했더라도, 사용자가 명확한 진행 키워드를 사용했다면 진행 (상태 변경 없이 플래그만 True)
-        # _CONFIRM_PATTERNS가 엄격하게 수정되었으므로(예: "다음 단계", "넘어가"), 모든 단계에서 적용 가능
-        if not should_advance and state_manager.check_confirm_pattern(effective_user_query):
-            should_advance = True
-            step_advance_meta = {
-                "advance": True,
-                "reason": f"진행 의사 패턴 매칭: {effective_user_query[:30]}",
-                "source": "keyword_override"
+            collected_data_json = ""
+            role_inputs_json = ""
+            try:
+                collected_data_json = orjson.dumps(state_manager.collected_data).decode()
+                # 역할별 입력은 해당 단계의 최근 입력만 전달 (대화 길이와 무관하게 프롬프트 크기 유지)
+                role_inputs_json = orjson.dumps(state_manager.role_inputs_slice(step=step.value)).decode()
+            except Exception:
+                collected_data_json = str(state_manager.collected_data)
+                role_inputs_json = str(state_manager.role_inputs_slice(step=step.value))
+
+            ctx.log.info(f"[WS]        -- Collected data: {collected_data_json[:150]}")  # 디버깅용
+
+            # 이전 단계 정보 (STEP_TRANSITION_PROMPT에서 사용)
+            previous_step_value = previous_step.value if previous_step else ChatStep.INTRODUCTION.value
+            previous_step_prompt = previous_step.prompt if previous_step else scenario.STEP_PROMPTS.get(ChatStep.INTRODUCTION.value, "")
+
+            # collected_data에서 null이 아닌 항목만 추출 (이미 수집된 정보)
+            collected_fields_summary = []
+            for key, value in state_manager.collected_data.items():
+                if value is not None and value != "":
+                    collected_fields_summary.append(f"- {key}: {value}")
+            collected_fields_str = "\n".join(collected_fields_summary) if collected_fields_summary else "아직 수집된 정보가 없습니다."
+
+            # 해당 단계의 주요 데이터가 이미 수집되었는지 확인하여 지침 생성
+            step_key_mapping = {
+                ChatStep.WORK_SCOPE: "work_scope",
+                ChatStep.WORK_PERIOD: "work_period",
+                ChatStep.BUDGET: "budget",
+                ChatStep.REVISIONS: "revision_count",
+                ChatStep.COPYRIGHT: "copyright_owner",
+                ChatStep.CONFIDENTIALITY: "confidentiality_terms",
             }
-            ctx.log.info(f"[WS]        -- Step advance override by explicit keyword pattern: {effective_user_query}")
-
-        # [강화] 양측 합의 확인 로직: 키워드 + 양측 발화 + 순차적 동의 패턴 체크
-        if not should_advance:
-            # 최근 10개 대화에서 client와 provider 발화 확인
-            has_client = any("client" in line or "의뢰인" in line for line in chat_history[-10:])
-            has_provider = any("provider" in line or "용역자" in line for line in chat_history[-10:])
-            both_participated = has_client and has_provider
-            
-            # 확정/제안 키워드 (프롬프트 파일에서 관리)
-            has_confirm_keyword = any(kw in effective_user_query for kw in CONFIRM_KEYWORDS)
-            has_proposal_keyword = any(kw in effective_user_query for kw in PROPOSAL_KEYWORDS)
-            
-            # 순차적 동의 패턴 확인: 최근 2개 메시지에서 제안→수락 흐름 체크
-            sequential_agreement = False
-            if len(chat_history) >= 2:
-                prev_line = chat_history[-2]
-                curr_line = chat_history[-1]
-                # 이전: client 제안, 현재: provider 수락 or 이전: provider 제안, 현재: client 수락
-                if ("client" in prev_line and "provider" in curr_line) or ("provider" in prev_line and "client" in curr_line):
-                    if any(kw in curr_line for kw in CONFIRM_KEYWORDS):
-                        # [Safety] 제안 키워드가 함께 있으면 동의가 아닌 역제안으로 간주
-                        if not any(kw in curr_line for kw in PROPOSAL_KEYWORDS):
-                            sequential_agreement = True
-            
-            # 진행 조건: 양측 참여 + (확정 키워드 or 순차적 동의)
-            if both_participated and (has_confirm_keyword or sequential_agreement):
-                should_advance = True
-                step_advance_meta = {
-                    "advance": True,
-                    "reason": f"양측 합의 확인 (양측 발화 + 동의 표현): {effective_user_query[:30]}",
-                    "source": "mutual_agreement"
-                }
-                ctx.log.info(f"[WS]        -- Step advance by mutual agreement: both participated + explicit consent")
-            elif has_proposal_keyword and not both_participated:
-                ctx.log.info(f"[WS]        -- Proposal detected but waiting for counterpart's response")
-            elif has_confirm_keyword and not both_participated:
-                ctx.log.info(f"[WS]        -- Consent keyword detected but only one side participated, waiting for counterpart")
-
-        # 분류 결과가 단계 완료로 판단된 경우에도 진행 플래그 설정
-        # 단, 양측 합의가 필요한 단계에서는 양측 참여 여부를 확인해야 함
-        if not should_advance and classification_result and classification_result.get("is_complete"):
-            # 양측 합의가 필수적인 단계인지 확인 (예: 예산, 기간 등)
-            steps_requiring_agreement = [ChatStep.WORK_SCOPE, ChatStep.WORK_PERIOD, ChatStep.BUDGET, ChatStep.REVISIONS, ChatStep.FINALIZATION]
-            
-            if state_manager.current_step in steps_requiring_agreement:
-                # [Strict] 합의가 필요한 단계에서는 단순 데이터 추출(is_complete)만으로 진행하지 않음
-                # 반드시 STEP_ADVANCE_CLASSIFICATION_PROMPT의 'advance: true' 또는 명시적 합의 키워드가 있어야 함
-                ctx.log.info(f"[WS]        -- Step {state_manager.current_step.value} requires strict agreement. Ignoring classification.is_complete.")
-                # should_advance = False (기본값 유지)
-            else:
-                # 합의가 덜 중요한 단계거나 초기 단계는 분류 결과 신뢰
-                should_advance = True
-                step_advance_meta = {
-                    "advance": True,
-                    "reason": "응답 분류에서 완료로 판단",
-                    "source": "classification"
-                }
-            
-            if should_advance:
-                ctx.log.info("[WS]        -- Step advance by classification is_complete flag")
-
-        # 추가 폴백: 소개 단계에서 사용자가 의미 있는 입력을 하면 진행
-        if not should_advance and state_manager.current_step == ChatStep.INTRODUCTION and user_query.strip():
-            should_advance = True
-            step_advance_meta = {
-                "advance": True,
-                "reason": "소개 단계 자동 진행 (사용자 입력 감지)",
-                "source": "auto_intro"
+            current_step_key = step_key_mapping.get(step)
+            step_specific_instruction = ""
+            if current_step_key:
+                val = state_manager.collected_data.get(current_step_key)
+                if val:
+                    step_specific_instruction = scenario.STEP_SPECIFIC_INSTRUCTION_TEMPLATE.format(
+                        current_step_key=current_step_key,
+                        val=val
+                    )
+
+            # RAG 검색 (해당 단계 주제 기반)
+            rag_context = ""
+            try:
+                rag_manager = RAGManager()
+                # 검색 쿼리 구성: 단계 + 단계 주제 키워드 (단계 주제 조항으로 필터링)
+                # 매 턴 달라지는 발화 원문을 넣지 않으므로 같은 단계의 턴들은 세션 캐시 결과를 재사용 (사용자 질문은 질문 감지/RAG 답변에서 처리)
+                search_query = " ".join([step.value, *RAG_STEP_TOPIC_KEYWORDS.get(step.value, [])])
+                rag_hits = await rag_manager.search_hits_cached(sid, search_query, k=2, step=step.value)
+                # 임계값 이상의 조항이 없으면 RAG 섹션 자체를 프롬프트에서 생략
+                if rag_hits:
+                    rag_context = RAG_CONTEXT_SECTION_TEMPLATE.format(rag_context=RAGManager.format_hits(rag_hits))
+                    ctx.log.info(f"[WS]        -- RAG context retrieved: {len(rag_hits)} hits, top={rag_hits[0].score:.3f}, {len(rag_context)} chars")
+                else:
+                    ctx.log.info(f"[WS]        -- RAG context skipped: no relevant clauses")
+            except Exception as e:
+                ctx.log.warning(f"[WS]        -- RAG search failed: {e}")
+
+            # 핵심 식별자/카테고리 기본값 보정 (이름이 없으면 템플릿이 '미기재'로 채워지는 문제 방지)
+            resolved_client_name = state_manager.collected_data.get("client_name") or client_name_fixed or "미기재"
+            resolved_provider_name = state_manager.collected_data.get("provider_name") or provider_name_fixed or "미기재"
+            resolved_client_company = state_manager.collected_data.get("client_company") or resolved_client_name
+            resolved_provider_company = state_manager.collected_data.get("provider_company") or resolved_provider_name
+            # [Modified] 카테고리 정규화 로직 제거 -> LLM이 생성 시점에 처리하도록 유도
+            # work_scope가 문장형이어도 그대로 전달
+            resolved_category = state_manager.collected_data.get("category") or state_manager.collected_data.get("work_scope") or "용역"
+
+            # 수집 데이터에 기본값을 반영 (없을 때만 세팅)
+            if not state_manager.collected_data.get("client_name"):
+                state_manager.update_data("client_name", resolved_client_name)
+            if not state_manager.collected_data.get("provider_name"):
+                state_manager.update_data("provider_name", resolved_provider_name)
+            if not state_manager.collected_data.get("client_company"):
+                state_manager.update_data("client_company", resolved_client_company)
+            if not state_manager.collected_data.get("provider_company"):
+                state_manager.update_data("provider_company", resolved_provider_company)
+            if not state_manager.collected_data.get("category"):
+                state_manager.update_data("category", resolved_category)
+
+            # [수정] 항상 전체 템플릿을 제공하여 계약서 전문 생성을 유도
+            template_to_use = CONTRACT_TEMPLATE
+
+            # [Fix] 템플릿 내의 기본 정보(이름, 회사, 카테고리 등)를 미리 치환하여 LLM에 제공
+            template_placeholders = {
+                "client_name": resolved_client_name,
+                "provider_name": resolved_provider_name,
+                "client_company": resolved_client_company,
+                "provider_company": resolved_provider_company,
+                "category": resolved_category,
+                "work_period": state_manager.collected_data.get("work_period") or "미기재",
+                "start_date": state_manager.collected_data.get("start_date") or "미기재",
+                "end_date": state_manager.collected_data.get("end_date") or "미기재",
+                "budget": state_manager.collected_data.get("budget") or "미기재",
             }
-            ctx.log.info("[WS]        -- Auto-advance from introduction due to user input")
-
-        # [NEW] finalization 단계에서 계약서 완료 키워드 감지 시 completed로 강제 전환
-        is_contract_completion_request = False
-        if state_manager.current_step == ChatStep.FINALIZATION:
-            for pattern in _CONTRACT_COMPLETION_PATTERNS:
-                if re.search(pattern, effective_user_query, flags=re.IGNORECASE):
-                    is_contract_completion_request = True
-                    should_advance = True
-                    step_advance_meta = {
-                        "advance": True,
-                        "reason": f"계약서 완료 키워드 감지: {effective_user_query[:30]}",
-                        "source": "contract_completion"
-                    }
-                    ctx.log.info(f"[WS]        -- Contract completion keyword detected: {effective_user_query}")
-                    break
-
-        # [CRITICAL] completed 단계에서는 더 이상 단계 진행하지 않음 (무한 루프 방지)
-        if state_manager.current_step == ChatStep.COMPLETED:
-            should_advance = False
-            step_advance_meta = {
-                "advance": False,
-                "reason": "이미 completed 단계 (최종 단계)",
-                "source": "completed_guard"
+            for k, v in template_placeholders.items():
+                template_to_use = template_to_use.replace(f"{{{{{k}}}}}", str(v))
+
+            # if previous_contract_draft and len(previous_contract_draft) > 50:
+            #     template_to_use = "아래 '계약서 초안'만 기준으로 수정 및 보완하세요. 전체 템플릿은 생략됨."
+
+            return {
+                "client_name": resolved_client_name,
+                "provider_name": resolved_provider_name,
+                "client_business_number": client_business_number,
+                "client_contact": client_contact,
+                "provider_business_number": provider_business_number,
+                "provider_contact": provider_contact,
+                "user_name": hd.get("user_name") or asker or "사용자",
+                "role": hd.get("role") or "client",
+                "role_korean": role_korean,
+                "contract_date": hd.get("contract_date") or "",
+                "current_date": datetime.now().strftime("%Y-%m-%d"),
+                "current_step": step.value,
+                "previous_step": previous_step_value,
+                "step_guide": step.prompt,
+                "previous_step_guide": previous_step_prompt,
+                "conversation_context": conversation_context,
+                "collected_data_json": collected_data_json,
+                "collected_fields_summary": collected_fields_str,  # 새로 추가: 가독성 좋은 요약
+                "step_specific_instruction": step_specific_instruction, # 동적 지침 추가
+                "role_inputs_json": role_inputs_json,
+                "contract_template": template_to_use,
+                "previous_contract_draft": previous_contract_draft or "없음",
+                "rag_context": rag_context,
             }
-            ctx.log.info("[WS]        -- Already at COMPLETED step, no further advancement")
+
+        summaries_synced = False
+
+        async def sync_step_summaries():
+            """이전 턴들의 백그라운드 단계 요약 반영 대기 (collected_data를 프롬프트에 넣기 직전, 턴당 한 번)"""
+            nonlocal summaries_synced
+            if sid and not summaries_synced:
+                summaries_synced = True
+                await StepSummaryQueue.wait(ctx, sid)
+
+        should_advance = step_advance_meta["advance"]
+        needs_clarification = bool(classification_result and classification_result.get("next_action") == "ask_clarification")
 
         if should_advance:
             # INTRODUCTION 단계를 포함한 모든 단계에서 진행 가능
@@ -712,6 +948,7 @@ async def handle_llm_invocation(ctx, websocket, msg: dict):
             }
             
             # introduction → work_scope 특수 케이스 처리
+            current_field = None
             if state_manager.current_step == ChatStep.INTRODUCTION:
                 if effective_user_query.strip() and state_manager.collected_data.get("work_scope") is None:
                     state_manager.update_data("work_scope", effective_user_query.strip())
@@ -719,52 +956,41 @@ async def handle_llm_invocation(ctx, websocket, msg: dict):
             else:
                 # 다른 단계에서의 입력 저장 (현재 단계 필드에)
                 current_field = current_step_to_field_mapping.get(state_manager.current_step)
-                
-                # [NEW] LLM을 이용한 단계별 최종 합의 내용 요약 및 저장
-                if current_field:
-                    try:
-                        summary_prompt = scenario.STEP_SUMMARY_PROMPT
-                        summary_text = await manager.generate(
-                            summary_prompt,
-                            placeholders={
-                                "conversation_context": conversation_context,
-                                "current_step": state_manager.current_step.value,
-                                "target_field": current_field,
-                                "current_date": datetime.now().strftime("%Y-%m-%d")
-                            },
-                            max_output_tokens=500,
-                            temperature=0.1
-                        )
-                        
-                        # JSON 파싱
-                        summary_json_match = re.search(r"```(?:json)?\s*(\{.*?\})\s*```", summary_text, re.DOTALL)
-                        if summary_json_match:
-                            summary_json_str = summary_json_match.group(1)
-                        else:
-                            summary_json_str = summary_text
-                            
-                        try:
-                            summary_parsed = orjson.loads(summary_json_str)
-                        except:
-                            summary_parsed = json.loads(summary_json_str, strict=False)
-                            
-                        extracted_value = summary_parsed.get("extracted_value")
-                        if extracted_value:
-                            state_manager.update_data(current_field, extracted_value)
-                            ctx.log.info(f"[WS]        -- Summarized and saved {current_field}: {extracted_value}")
-                        else:
-                            # 요약 실패 시 기존 방식(마지막 입력) 폴백
-                            if effective_user_query.strip() and state_manager.collected_data.get(current_field) is None:
-                                state_manager.update_data(current_field, effective_user_query.strip())
-                                ctx.log.info(f"[WS]        -- Summary failed, fallback to user input for {current_field}")
 
-                    except Exception as e:
-                        ctx.log.warning(f"[WS]        -- Step summary failed: {e}")
-                        # 예외 발생 시 기존 방식 폴백
-                        if effective_user_query.strip() and state_manager.collected_data.get(current_field) is None:
-                            state_manager.update_data(current_field, effective_user_query.strip())
+            upcoming_step = state_manager.peek_next_step()
+            await sync_step_summaries()
+
+            # [NEW] LLM을 이용한 단계별 최종 합의 내용 요약은 확정 메시지 전송 후 백그라운드에서 실행
+            # 요약이 반영되기 전까지는 기존 방식(마지막 입력)으로 채워 둠 (다음 단계 안내 프롬프트에도 포함되도록 먼저 저장)
+            summary_step = state_manager.current_step.value
+            if current_field and effective_user_query.strip() and state_manager.collected_data.get(current_field) is None:
+                state_manager.update_data(current_field, effective_user_query.strip())
+                ctx.log.info(f"[WS]        -- Saved user input for {current_field} until step summary completes")
             
+            commit_turn()
+            # 단계가 바뀌면 이전 단계 검색 결과는 다시 쓰지 않으므로 세션 검색 캐시 정리
+            RAGManager.discard(sid)
+
+            # 다음 단계 안내 응답은 단계 요약과 서로 의존하지 않으므로 진행 결정 직후 미리 시작하고, 응답을 만들 때 결과를 기다림
+            # placeholders 구성은 RAG 검색과 기본값 보정(상태 변경)을 포함하므로 턴 확정 후에 수행
+            # (완료 단계로 넘어가거나 clarification 응답이 우선하면 안내 응답을 쓰지 않으므로 시작하지 않음)
+            if upcoming_step != ChatStep.COMPLETED and not needs_clarification:
+                transition_started = time.perf_counter()
+                transition_placeholders = await build_common_placeholders(upcoming_step, state_manager.current_step)
+                transition_task = asyncio.create_task(generate(
+                    scenario.STEP_TRANSITION_PROMPT_TEMPLATE.replace("{system_prompt}", "\n".join(SYSTEM_PROMPTS)),
+                    placeholders=transition_placeholders,
+                    max_output_tokens=4000,
+                    temperature=0.7
+                ))
+                ctx.log.info(f"[WS]        -- Step transition response started speculatively for {upcoming_step.value}")
+
             next_step = state_manager.move_to_next_step()
+            if transition_task is not None and next_step != upcoming_step:
+                # 미리 시작한 안내 응답이 다른 단계 기준이면 버리고 전환 후 상태로 다시 생성
+                ctx.log.info(f"[WS]        -- Speculative step transition discarded: expected {upcoming_step.value}, moved to {next_step.value}")
+                _cancel_speculative(transition_task)
+                transition_task = None
 
             # 혹시라도 current_step이 string이면 Enum으로 변환
             if not isinstance(state_manager.current_step, ChatStep):
@@ -783,7 +1009,7 @@ async def handle_llm_invocation(ctx, websocket, msg: dict):
 
             # 진행률도 Enum 기준으로 계산 (0% ~ 100%)
             total_steps = len(ChatStep)
-            current_idx = list(ChatStep).index(state_manager.current_step)
+            current_idx = step_ordinal(state_manager.current_step)
             if total_steps > 1:
                 progress_percentage = round((current_idx / (total_steps - 1)) * 100, 1)
             else:
@@ -829,10 +1055,10 @@ async def handle_llm_invocation(ctx, websocket, msg: dict):
                     # LLM을 통해 최종 계약서 생성
                     try:
                         final_contract_prompt = scenario.FINAL_CONTRACT_GENERATION_PROMPT.format(
-                            collected_data_json=collected_data_json,
+                            collected_data_json=orjson.dumps(state_manager.collected_data).decode(),
                             contract_template=CONTRACT_TEMPLATE
                         )
-                        final_contract_draft = await manager.generate(
+                        final_contract_draft = await generate(
                             final_contract_prompt,
                             max_output_tokens=4000,
                             temperature=0.3
@@ -845,6 +1071,8 @@ async def handle_llm_invocation(ctx, websocket, msg: dict):
                 # 완료 메시지 커스터마이징
                 response_text = scenario.COMPLETION_MESSAGE
 
+            final_draft_ref = await ContractDraftStore.save(ctx, sid, final_contract_draft) if final_contract_draft else None
+
             confirmation_response = {
                 "hd": {
                     "sid": sid,
@@ -859,6 +1087,7 @@ async def handle_llm_invocation(ctx, websocket, msg: dict):
                 "bd": {
                     "text": response_text,
                     "contract_draft": final_contract_draft,  # COMPLETED일 때 계약서 전문 포함
+                    "contract_draft_ref": final_draft_ref,
                     "current_step": next_step.value,
                     "progress_percentage": 100.0 if next_step == ChatStep.COMPLETED else progress_percentage,
                     "is_completed": next_step == ChatStep.COMPLETED,  # 프론트엔드에서 세션 종료 처리용
@@ -867,10 +1096,17 @@ async def handle_llm_invocation(ctx, websocket, msg: dict):
             }
             await store_chat_message(
                 ctx, sid, "assistant",
-                {"hd": confirmation_response["hd"], "bd": confirmation_response["bd"], "sid": sid}
+                {"hd": confirmation_response["hd"], "bd": _stream_body(confirmation_response["bd"]), "sid": sid}
             )
             await send_json_safe(confirmation_response)
             confirmation_message_sent = True
+
+            # 응답 전송 후 이전 단계 요약 시작 (완료 시 collected_data 교체, 다음 턴은 필요할 때만 대기)
+            if current_field and sid:
+                StepSummaryQueue.submit(
+                    ctx, sid, summary_step, current_field,
+                    state_manager.collected_data.get(current_field), conversation_context
+                )
             
             # [NEW] COMPLETED 단계면 여기서 처리 종료 (추가 LLM 호출 불필요)
             if next_step == ChatStep.COMPLETED:
@@ -878,140 +1114,14 @@ async def handle_llm_invocation(ctx, websocket, msg: dict):
                 await SessionStateCache.save(state_manager, ctx)
                 return
 
-        # 6. 현재 step에 맞는 프롬프트 가져오기
-        # (이미 분류 시 계산됨)
+        # 7. LLM에 전달할 프롬프트 구성 (다음 단계 안내 응답은 단계 진행 결정 시 이미 시작됨)
+        if needs_clarification or transition_task is None:
+            await sync_step_summaries()
+            previous_step = state_manager.step_history[-2] if len(state_manager.step_history) >= 2 else None
+            common_placeholders = await build_common_placeholders(state_manager.current_step, previous_step)
 
-        # 7. LLM에 전달할 프롬프트 구성
-        
-        # 역할 한글 변환
-        role_korean = "의뢰인(갑)" if state_manager.user_info.get("role") == "client" else "용역자(을)"
-        
-        # 공통 placeholders 구성
-        collected_data_json = ""
-        role_inputs_json = ""
-        try:
-            collected_data_json = orjson.dumps(state_manager.collected_data).decode()
-            role_inputs_json = orjson.dumps(state_manager.role_inputs).decode()
-        except Exception:
-            collected_data_json = str(state_manager.collected_data)
-            role_inputs_json = str(state_manager.role_inputs)
-        
-        ctx.log.info(f"[WS]        -- Collected data: {collected_data_json[:150]}")  # 디버깅용
-
-        # 이전 단계 정보 (STEP_TRANSITION_PROMPT에서 사용)
-        previous_step_value = state_manager.step_history[-2].value if len(state_manager.step_history) >= 2 else ChatStep.INTRODUCTION.value
-        previous_step_prompt = state_manager.step_history[-2].prompt if len(state_manager.step_history) >= 2 else scenario.STEP_PROMPTS.get(ChatStep.INTRODUCTION.value, "")
-        
-        # collected_data에서 null이 아닌 항목만 추출 (이미 수집된 정보)
-        collected_fields_summary = []
-        for key, value in state_manager.collected_data.items():
-            if value is not None and value != "":
-                collected_fields_summary.append(f"- {key}: {value}")
-        collected_fields_str = "\n".join(collected_fields_summary) if collected_fields_summary else "아직 수집된 정보가 없습니다."
-
-        # 현재 단계의 주요 데이터가 이미 수집되었는지 확인하여 지침 생성
-        step_key_mapping = {
-            ChatStep.WORK_SCOPE: "work_scope",
-            ChatStep.WORK_PERIOD: "work_period",
-            ChatStep.BUDGET: "budget",
-            ChatStep.REVISIONS: "revision_count",
-            ChatStep.COPYRIGHT: "copyright_owner",
-            ChatStep.CONFIDENTIALITY: "confidentiality_terms",
-        }
-        current_step_key = step_key_mapping.get(state_manager.current_step)
-        step_specific_instruction = ""
-        if current_step_key:
-            val = state_manager.collected_data.get(current_step_key)
-            if val:
-                step_specific_instruction = scenario.STEP_SPECIFIC_INSTRUCTION_TEMPLATE.format(
-                    current_step_key=current_step_key,
-                    val=val
-                )
-        
-        # Redis에서 session_info 로드 (참여자 이름 확인) - 위에서 이미 로드함
-        
-        # RAG 검색 (현재 단계 + 사용자 쿼리 기반)
-        rag_context = ""
-        try:
-            rag_manager = RAGManager()
-            # 검색 쿼리 구성: 현재 단계 키워드 + 사용자 입력
-            search_query = f"{state_manager.current_step.value} {effective_user_query}"
-            rag_context = rag_manager.search(search_query, k=2)
-            if rag_context:
-                ctx.log.info(f"[WS]        -- RAG context retrieved: {len(rag_context)} chars")
-        except Exception as e:
-            ctx.log.warning(f"[WS]        -- RAG search failed: {e}")
-
-        # 핵심 식별자/카테고리 기본값 보정 (이름이 없으면 템플릿이 '미기재'로 채워지는 문제 방지)
-        resolved_client_name = state_manager.collected_data.get("client_name") or client_name_fixed or "미기재"
-        resolved_provider_name = state_manager.collected_data.get("provider_name") or provider_name_fixed or "미기재"
-        resolved_client_company = state_manager.collected_data.get("client_company") or resolved_client_name
-        resolved_provider_company = state_manager.collected_data.get("provider_company") or resolved_provider_name
-        # [Modified] 카테고리 정규화 로직 제거 -> LLM이 생성 시점에 처리하도록 유도
-        # work_scope가 문장형이어도 그대로 전달
-        resolved_category = state_manager.collected_data.get("category") or state_manager.collected_data.get("work_scope") or "용역"
-
-        # 수집 데이터에 기본값을 반영 (없을 때만 세팅)
-        if not state_manager.collected_data.get("client_name"):
-            state_manager.update_data("client_name", resolved_client_name)
-        if not state_manager.collected_data.get("provider_name"):
-            state_manager.update_data("provider_name", resolved_provider_name)
-        if not state_manager.collected_data.get("client_company"):
-            state_manager.update_data("client_company", resolved_client_company)
-        if not state_manager.collected_data.get("provider_company"):
-            state_manager.update_data("provider_company", resolved_provider_company)
-        if not state_manager.collected_data.get("category"):
-            state_manager.update_data("category", resolved_category)
-
-        # [수정] 항상 전체 템플릿을 제공하여 계약서 전문 생성을 유도
-        template_to_use = CONTRACT_TEMPLATE
-        
-        # [Fix] 템플릿 내의 기본 정보(이름, 회사, 카테고리 등)를 미리 치환하여 LLM에 제공
-        template_placeholders = {
-            "client_name": resolved_client_name,
-            "provider_name": resolved_provider_name,
-            "client_company": resolved_client_company,
-            "provider_company": resolved_provider_company,
-            "category": resolved_category,
-            "work_period": state_manager.collected_data.get("work_period") or "미기재",
-            "start_date": state_manager.collected_data.get("start_date") or "미기재",
-            "end_date": state_manager.collected_data.get("end_date") or "미기재",
-            "budget": state_manager.collected_data.get("budget") or "미기재",
-        }
-        for k, v in template_placeholders.items():
-            template_to_use = template_to_use.replace(f"{{{{{k}}}}}", str(v))
-
-        # if previous_contract_draft and len(previous_contract_draft) > 50:
-        #     template_to_use = "아래 '계약서 초안'만 기준으로 수정 및 보완하세요. 전체 템플릿은 생략됨."
-
-        common_placeholders = {
-            "client_name": resolved_client_name,
-            "provider_name": resolved_provider_name,
-            "client_business_number": client_business_number,
-            "client_contact": client_contact,
-            "provider_business_number": provider_business_number,
-            "provider_contact": provider_contact,
-            "user_name": hd.get("user_name") or asker or "사용자",
-            "role": hd.get("role") or "client",
-            "role_korean": role_korean,
-            "contract_date": hd.get("contract_date") or "",
-            "current_date": datetime.now().strftime("%Y-%m-%d"),
-            "current_step": state_manager.current_step.value,
-            "previous_step": previous_step_value,
-            "step_guide": current_step_prompt,
-            "previous_step_guide": previous_step_prompt,
-            "conversation_context": conversation_context,
-            "collected_data_json": collected_data_json,
-            "collected_fields_summary": collected_fields_str,  # 새로 추가: 가독성 좋은 요약
-            "step_specific_instruction": step_specific_instruction, # 동적 지침 추가
-            "role_inputs_json": role_inputs_json,
-            "contract_template": template_to_use,
-            "previous_contract_draft": previous_contract_draft or "없음",
-            "rag_context": rag_context,
-        }
-        
         # 분류 결과가 있으면 clarification이 필요한지 체크
-        if classification_result and classification_result.get("next_action") == "ask_clarification":
+        if needs_clarification:
             # clarification이 필요한 경우에도 LLM이 전체 응답 생성 (USER_MESSAGE + CONTRACT_DRAFT 포함)
             ctx.log.info(f"[WS]        -- Clarification needed for step: {state_manager.current_step.value}")
             full_prompt = scenario.NORMAL_RESPONSE_PROMPT_TEMPLATE.replace("{system_prompt}", "\n".join(SYSTEM_PROMPTS))
@@ -1022,17 +1132,25 @@ async def handle_llm_invocation(ctx, websocket, msg: dict):
                 "user_query": classification_result.get("clarification_needed", effective_user_query),
             }
             
-            response_text = await manager.generate(
+            response_text = await generate(
                 full_prompt,
                 placeholders=response_placeholders,
                 max_output_tokens=4000,
                 temperature=0.7
             )
+        elif confirmation_message_sent and transition_task is not None:
+            # 확정 메시지를 보낸 후, 단계 진행 결정 시 미리 시작한 다음 step의 시작 안내 응답 사용
+            waited = time.perf_counter()
+            response_text = await transition_task
+            ctx.log.info(
+                f"[WS]        -- Step transition response ready "
+                f"(started {(waited - transition_started) * 1000:.0f} ms before needed, waited {(time.perf_counter() - waited) * 1000:.0f} ms)"
+            )
         elif confirmation_message_sent:
             # 확정 메시지를 보낸 후, 다음 step의 시작 프롬프트 생성
             full_prompt = scenario.STEP_TRANSITION_PROMPT_TEMPLATE.replace("{system_prompt}", "\n".join(SYSTEM_PROMPTS))
             
-            response_text = await manager.generate(
+            response_text = await generate(
                 full_prompt,
                 placeholders=common_placeholders,
                 max_output_tokens=4000,
@@ -1053,7 +1171,7 @@ async def handle_llm_invocation(ctx, websocket, msg: dict):
             }
             
             # 8. LLM 호출
-            response_text = await manager.generate(
+            response_text = await generate(
                 full_prompt,
                 placeholders=response_placeholders,
                 max_output_tokens=4000,
@@ -1130,6 +1248,10 @@ async def handle_llm_invocation(ctx, websocket, msg: dict):
         if not contract_draft and previous_contract_draft:
             contract_draft = previous_contract_draft
 
+        # 초안 전문은 세션별 초안 키에 한 번만 저장하고 스트림 메시지에는 버전 참조만 기록
+        commit_turn()
+        draft_ref = await ContractDraftStore.save(ctx, sid, contract_draft) if contract_draft else None
+
         response = {
             "hd": {
                 "sid": sid,
@@ -1144,8 +1266,9 @@ async def handle_llm_invocation(ctx, websocket, msg: dict):
             "bd": {
                 "text": user_message,
                 "contract_draft": contract_draft,
+                "contract_draft_ref": draft_ref,
                 "current_step": state_manager.current_step.value,
-                "progress_percentage": round((list(ChatStep).index(state_manager.current_step) / len(ChatStep)) * 100, 1),
+                "progress_percentage": round((step_ordinal(state_manager.current_step) / len(ChatStep)) * 100, 1),
                 "state": codes.ResponseStatus.SUCCESS if not is_error_response else codes.ResponseStatus.SERVER_ERROR,
                 "meta": {
                     "step_advance": step_advance_meta,
@@ -1156,7 +1279,7 @@ async def handle_llm_invocation(ctx, websocket, msg: dict):
         
         await store_chat_message(
             ctx, sid, "assistant",
-            {"hd": response["hd"], "bd": response["bd"]}
+            {"hd": response["hd"], "bd": _stream_body(response["bd"])}
         )
         
         ctx.log.info(f"[WS]        -- LLM response sent (step: {state_manager.current_step.value}, status: {'ERROR' if is_error_response else 'OK'})")
@@ -1180,4 +1303,7 @@ async def handle_llm_invocation(ctx, websocket, msg: dict):
                 "contract_date": error_contract_date,
             },
             "bd": {"state": codes.ResponseStatus.SERVER_ERROR, "detail": str(e)}
-        })
\ No newline at end of file
+        })
+    finally:
+        # 응답에 쓰이지 않은 미리 시작한 호출 정리 (턴 취소/완료 단계/예외 등)
+        _cancel_speculative(transition_task)
\ No newline at end of file
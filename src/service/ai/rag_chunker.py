@@ -0,0 +1,125 @@
+"""
+계약서 조항 단위 청크 분할 모듈
+'제N조' 조문 헤딩을 경계로 문서를 나누고, 긴 조문은 번호 항목(①, 1., (1) 등) 단위로 묶어 분할합니다.
+각 청크에는 ChatStep 값에 대응하는 주제 비트마스크를 태깅하여 단계별 검색 필터에 사용합니다.
+"""
+import re
+from typing import Any, Dict, List, Tuple
+
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from src.service.ai.asset.prompts.doq_prompts_rag import RAG_STEP_TOPIC_KEYWORDS
+
+# 비트 위치 = 목록 순서 (manifest에 함께 기록)
+RAG_TOPICS = list(RAG_STEP_TOPIC_KEYWORDS.keys())
+
+_ARTICLE_RE = re.compile(r"^\s*제\s*\d+\s*조(?:\s*의\s*\d+)?(?:\s*[\(（][^\)）\n]*[\)）])?")
+_CLAUSE_RE = re.compile(r"^\s*(?:[①-⑳]|\d{1,2}\.\s|\(\d{1,2}\)|\d{1,2}\)|[가-하]\.\s)")
+
+
+def topic_mask(text: str, heading: str = "") -> int:
+    """
+    조문 제목에 키워드가 있거나 본문에 2회 이상 등장하면 해당 주제로 태깅
+    """
+    mask = 0
+    for bit, topic in enumerate(RAG_TOPICS):
+        keywords = RAG_STEP_TOPIC_KEYWORDS[topic]
+        if heading and any(kw in heading for kw in keywords):
+            mask |= 1 << bit
+        elif sum(text.count(kw) for kw in keywords) >= 2:
+            mask |= 1 << bit
+    return mask
+
+
+def retag_chunk(text: str) -> int:
+    """저장된 청크의 주제 재계산 (첫 줄이 조문 헤딩이면 헤딩으로 사용)"""
+    first_line = text.split("\n", 1)[0]
+    match = _ARTICLE_RE.match(first_line)
+    return topic_mask(text, match.group(0) if match else "")
+
+
+def topic_bit(topic: str) -> int:
+    """주제 이름의 비트 (없으면 0)"""
+    return 1 << RAG_TOPICS.index(topic) if topic in RAG_TOPICS else 0
+
+
+class ClauseChunker:
+    """조문/항목 경계 기반 청크 분할기"""
+
+    def __init__(self, max_chars: int = 800, fallback_chunk_size: int = 1000, fallback_overlap: int = 200):
+        self.max_chars = max_chars
+        self._fallback = RecursiveCharacterTextSplitter(chunk_size=fallback_chunk_size, chunk_overlap=fallback_overlap)
+        # 헤딩을 덧붙일 여유를 두고 분할
+        self._hard_split = RecursiveCharacterTextSplitter(chunk_size=max(max_chars - 100, 100), chunk_overlap=0)
+
+    def split_pages(self, pages: List[Tuple[str, Dict[str, Any]]]) -> List[Tuple[str, int, int]]:
+        """
+        페이지 목록을 (청크 텍스트, 시작 페이지, 주제 마스크) 목록으로 분할합니다.
+        조문 헤딩이 하나도 없는 문서는 일반 문자 수 기준 분할로 대체합니다.
+        """
+        lines = []
+        for page_content, metadata in pages:
+            page = metadata.get("page", -1)
+            lines.extend((line, page) for line in page_content.splitlines() if line.strip())
+
+        sections = self._split_sections(lines)
+        if not any(heading for heading, _ in sections):
+            return [
+                (chunk, metadata.get("page", -1), topic_mask(chunk))
+                for page_content, metadata in pages
+                for chunk in self._fallback.split_text(page_content)
+            ]
+
+        chunks = []
+        for heading, section_lines in sections:
+            for text, page in self._split_section(heading, section_lines):
+                chunks.append((text, page, topic_mask(text, heading)))
+        return chunks
+
+    @staticmethod
+    def _split_sections(lines: List[Tuple[str, int]]) -> List[Tuple[str, List[Tuple[str, int]]]]:
+        """조문 헤딩 기준으로 (헤딩, 줄 목록) 분할 (첫 조문 이전은 헤딩 없음)"""
+        sections = [("", [])]
+        for line, page in lines:
+            match = _ARTICLE_RE.match(line)
+            if match:
+                sections.append((match.group(0).strip(), []))
+            sections[-1][1].append((line, page))
+        return [(heading, section_lines) for heading, section_lines in sections if section_lines]
+
+    def _split_section(self, heading: str, lines: List[Tuple[str, int]]) -> List[Tuple[str, int]]:
+        """조문이 max_chars를 넘으면 번호 항목 단위로 묶어서 분할 (각 조각에 조문 헤딩을 붙임)"""
+        text = "\n".join(line for line, _ in lines)
+        if len(text) <= self.max_chars:
+            return [(text, lines[0][1])]
+
+        # 번호 항목 시작 줄 기준 그룹화
+        groups = []
+        for line, page in lines:
+            if not groups or _CLAUSE_RE.match(line):
+                groups.append(([], page))
+            groups[-1][0].append(line)
+
+        pieces = []
+        current, current_page = [], None
+        prefix = f"{heading}\n" if heading else ""
+        for group_lines, page in groups:
+            group_text = "\n".join(group_lines)
+            if current and len(prefix) + len("\n".join(current)) + len(group_text) + 1 > self.max_chars:
+                pieces.append(("\n".join(current), current_page))
+                current, current_page = [], None
+            current.append(group_text)
+            current_page = page if current_page is None else current_page
+        if current:
+            pieces.append(("\n".join(current), current_page))
+
+        results = []
+        for idx, (piece, page) in enumerate(pieces):
+            piece_prefix = "" if idx == 0 else prefix
+            if len(piece_prefix) + len(piece) <= self.max_chars:
+                results.append((f"{piece_prefix}{piece}", page))
+            else:
+                # 단일 항목이 지나치게 긴 경우 문자 수 기준으로 추가 분할 (조각마다 헤딩 유지)
+                parts = self._hard_split.split_text(piece)
+                results.extend(((prefix if i or idx else "") + part, page) for i, part in enumerate(parts))
+        return results
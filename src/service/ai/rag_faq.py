@@ -0,0 +1,201 @@
+"""
+FAQ 답변 뱅크
+표준계약서 관련 정의/관행 질문에 대해 RAG 인덱스 조항에 근거한 답변을 오프라인으로 미리 생성하고,
+런타임에는 LLM 호출 없이 문자 n-gram 유사도로 매칭하여 즉시 답변합니다.
+뱅크는 인덱스 버전 디렉토리에 faq.json으로 저장되므로 인덱스가 재빌드되면 다시 생성해야 합니다.
+
+오프라인 빌드:
+    python -m src.service.ai.rag_faq --index-path faiss_index
+"""
+import os
+import re
+import math
+import argparse
+from collections import Counter
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import orjson
+
+from src.service.ai.rag_store import RAGIndexSnapshot
+from src.service.ai.rag_chunker import topic_bit
+from src.service.ai.asset.prompts.doq_prompts_rag import QUESTION_MARKER_PATTERNS, RAG_ANSWER_PROMPT, RAG_FAQ_QUESTIONS
+
+FAQ_FILE = "faq.json"
+FAQ_VERSION = 1
+
+_NON_WORD_RE = re.compile(r"[^\w]")
+_QUESTION_MARKER_RES = [re.compile(pattern) for pattern in QUESTION_MARKER_PATTERNS]
+
+
+def has_question_marker(text: str) -> bool:
+    """질문 표지(물음표, 의문사, 의문형 어미, 설명 요청)가 있는지 (없으면 질문 감지 LLM 호출 생략)"""
+    return any(pattern.search(text) for pattern in _QUESTION_MARKER_RES)
+
+
+def _ngrams(text: str, n: int = 2) -> Counter:
+    """공백/문장부호를 제거한 문자 n-gram 빈도"""
+    compact = _NON_WORD_RE.sub("", text.lower())
+    if len(compact) < n:
+        return Counter([compact]) if compact else Counter()
+    return Counter(compact[i:i + n] for i in range(len(compact) - n + 1))
+
+
+def _cosine(a: Counter, b: Counter) -> float:
+    if not a or not b:
+        return 0.0
+    dot = sum(count * b[gram] for gram, count in a.items() if gram in b)
+    norm = math.sqrt(sum(c * c for c in a.values())) * math.sqrt(sum(c * c for c in b.values()))
+    return dot / norm if norm else 0.0
+
+
+class FAQMatcher:
+    """메모리 상의 FAQ 매처 (질문 변형별 n-gram 벡터와 코사인 유사도 비교)"""
+
+    def __init__(self, entries: Optional[List[Dict[str, Any]]] = None, version: Optional[str] = None, mtime: float = 0.0, min_similarity: float = 0.72):
+        self.entries = entries or []
+        self.version = version
+        self.mtime = mtime
+        self.min_similarity = min_similarity
+        self._variants = [
+            (_ngrams(question), entry)
+            for entry in self.entries
+            for question in entry["questions"]
+        ]
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @classmethod
+    def load(cls, snapshot_path: Optional[str], min_similarity: float = 0.72) -> "FAQMatcher":
+        """인덱스 버전 디렉토리의 faq.json 로드 (없거나 버전이 다르면 빈 매처)"""
+        if not snapshot_path:
+            return cls(min_similarity=min_similarity)
+        faq_path = os.path.join(snapshot_path, FAQ_FILE)
+        if not os.path.exists(faq_path):
+            return cls(min_similarity=min_similarity)
+        try:
+            with open(faq_path, "rb") as f:
+                bank = orjson.loads(f.read())
+        except Exception as e:
+            print(f"Failed to load FAQ bank: {e}")
+            return cls(min_similarity=min_similarity)
+        if bank.get("faq_version") != FAQ_VERSION or bank.get("index_version") != os.path.basename(snapshot_path):
+            print(f"FAQ bank ignored: built for {bank.get('index_version')}")
+            return cls(min_similarity=min_similarity)
+        return cls(bank["entries"], bank["index_version"], os.path.getmtime(faq_path), min_similarity)
+
+    def match(self, query: str, step: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        가장 유사한 FAQ 항목 (min_similarity 미만이면 None)
+        step이 주어지면 같은 단계 항목을 약간 우대합니다.
+        질문 표지가 없는 발화(조건 제시/동의)는 FAQ 질문과 단어가 겹쳐도 매칭하지 않습니다.
+        """
+        if not has_question_marker(query):
+            return None
+        query_grams = _ngrams(query)
+        best, best_score = None, 0.0
+        for grams, entry in self._variants:
+            score = _cosine(query_grams, grams)
+            if step and entry.get("step") == step:
+                score += 0.02
+            if score > best_score:
+                best, best_score = entry, score
+        if best is None or best_score < self.min_similarity:
+            return None
+        return {**best, "similarity": round(best_score, 3)}
+
+
+class FAQBankBuilder:
+    """
+    오프라인 FAQ 뱅크 빌더
+    대표 질문으로 조항을 검색하고, 임계값 이상의 조항이 있는 질문만 RAG_ANSWER_PROMPT로 답변을 생성합니다.
+    """
+
+    def __init__(self, snapshot: RAGIndexSnapshot, embeddings, generate: Callable[[str], str], k: int = 2, min_score: float = 0.6):
+        self.snapshot = snapshot
+        self.embeddings = embeddings
+        self.generate = generate
+        self.k = k
+        self.min_score = min_score
+
+    def build(self, questions: List[Dict[str, Any]] = RAG_FAQ_QUESTIONS) -> Dict[str, Any]:
+        entries = []
+        for item in questions:
+            question = item["questions"][0]
+            query_vector = self.embeddings.embed_query(question)
+            results = [
+                (score, idx)
+                for score, idx in self.snapshot.search(query_vector, self.k, topic_mask=topic_bit(item.get("step", "")))
+                if score >= self.min_score
+            ]
+            if not results:
+                print(f"Skip FAQ {item['id']}: no grounding clause")
+                continue
+
+            rag_context = "\n\n".join(f"[참고 조항]\n{self.snapshot.chunks.text(idx)}" for _, idx in results)
+            answer = self.generate(RAG_ANSWER_PROMPT.format(user_query=question, rag_context=rag_context)).strip()
+            if not answer:
+                continue
+
+            entries.append({
+                "id": item["id"],
+                "step": item.get("step"),
+                "questions": item["questions"],
+                "answer": answer,
+                "grounding": [
+                    {"chunk_id": int(idx), "score": round(float(score), 4), **self.snapshot.chunks.metadata(idx)}
+                    for score, idx in results
+                ],
+            })
+            print(f"FAQ {item['id']}: grounded on {len(results)} clauses")
+
+        return {
+            "faq_version": FAQ_VERSION,
+            "index_version": self.snapshot.version,
+            "created_at": datetime.now().isoformat(),
+            "entries": entries,
+        }
+
+    def write(self, bank: Dict[str, Any]) -> str:
+        """인덱스 버전 디렉토리에 원자적으로 기록"""
+        faq_path = os.path.join(self.snapshot.path, FAQ_FILE)
+        tmp_path = f"{faq_path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(orjson.dumps(bank, option=orjson.OPT_INDENT_2))
+        os.replace(tmp_path, faq_path)
+        return faq_path
+
+
+def main():
+    import google.generativeai as genai
+    from langchain_google_genai import GoogleGenerativeAIEmbeddings
+    from src.service.conf.gemini_api_key import GEMINI_API_KEY
+
+    parser = argparse.ArgumentParser(description="Build the FAQ answer bank for the current RAG index")
+    parser.add_argument("--index-path", default="faiss_index")
+    parser.add_argument("--model", default="gemini-2.0-flash")
+    parser.add_argument("--k", type=int, default=2)
+    parser.add_argument("--min-score", type=float, default=0.6)
+    args = parser.parse_args()
+
+    snapshot = RAGIndexSnapshot.open(args.index_path)
+    if snapshot is None:
+        raise SystemExit(f"No RAG index found in {args.index_path}")
+
+    api_key = os.environ.get("GEMINI_API_KEY") or GEMINI_API_KEY
+    genai.configure(api_key=api_key)
+    model = genai.GenerativeModel(args.model)
+    embeddings = GoogleGenerativeAIEmbeddings(model="models/embedding-001", google_api_key=api_key)
+
+    def generate(prompt: str) -> str:
+        return model.generate_content(prompt, generation_config=genai.types.GenerationConfig(temperature=0.3)).text
+
+    builder = FAQBankBuilder(snapshot, embeddings, generate, k=args.k, min_score=args.min_score)
+    bank = builder.build()
+    path = builder.write(bank)
+    print(f"FAQ bank saved: {path} ({len(bank['entries'])} entries, index {snapshot.version})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+RAG 인덱스 증분 빌드 모듈
+reference/ 디렉토리의 PDF별 content hash를 manifest로 관리하여,
+추가/변경된 파일만 파싱·임베딩하고 나머지 파일의 청크/임베딩은 이전 버전에서 재사용합니다.
+"""
+import os
+import hashlib
+import multiprocessing
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.service.ai.rag_chunker import ClauseChunker, retag_chunk
+from src.service.ai.asset.prompts.doq_prompts_rag import RAG_STEP_TOPIC_KEYWORDS
+from src.service.ai.rag_store import (
+    RAGIndexSnapshot,
+    index_build_params,
+    normalize_vectors,
+    read_legacy_index,
+    resolve_index_params,
+    write_snapshot,
+)
+
+
+def file_sha256(file_path: str) -> str:
+    """파일 내용 기반 sha256 (manifest 비교용)"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _load_pdf_pages(file_path: str) -> List[Tuple[str, Dict[str, Any]]]:
+    """PDF 페이지 파싱 (프로세스 풀에서 실행되므로 모듈 최상위 함수로 유지)"""
+    from langchain_community.document_loaders import PyPDFLoader
+
+    docs = PyPDFLoader(file_path).load()
+    return [(doc.page_content, doc.metadata) for doc in docs]
+
+
+class RAGIndexBuilder:
+    """manifest 기반 증분 인덱스 빌더"""
+
+    def __init__(
+        self,
+        reference_dir: str,
+        index_path: str,
+        embeddings,
+        max_chunk_chars: int = 800,
+        embed_batch_size: int = 64,
+        embed_concurrency: int = 4,
+        parse_workers: Optional[int] = None,
+        index_params: Optional[Dict[str, Any]] = None,
+    ):
+        self.reference_dir = reference_dir
+        self.index_path = index_path
+        self.embeddings = embeddings
+        self.chunker = ClauseChunker(max_chars=max_chunk_chars)
+        self.embed_batch_size = embed_batch_size
+        self.embed_concurrency = embed_concurrency
+        self.parse_workers = parse_workers
+        self.index_params = resolve_index_params(index_params)
+
+    def scan_reference_files(self) -> Dict[str, str]:
+        """reference 디렉토리의 PDF 목록과 content hash"""
+        if not os.path.exists(self.reference_dir):
+            return {}
+        return {
+            filename: file_sha256(os.path.join(self.reference_dir, filename))
+            for filename in sorted(os.listdir(self.reference_dir))
+            if filename.endswith(".pdf")
+        }
+
+    @staticmethod
+    def diff(manifest_files: Dict[str, Any], current: Dict[str, str]) -> Tuple[List[str], List[str]]:
+        """(추가/변경된 파일, 삭제된 파일)"""
+        changed = [
+            name for name, sha in current.items()
+            if manifest_files.get(name, {}).get("sha256") != sha
+        ]
+        removed = [name for name in manifest_files if name not in current]
+        return changed, removed
+
+    # ------------------------
+    # legacy import
+    # ------------------------
+    def import_legacy(self) -> Optional[RAGIndexSnapshot]:
+        """
+        이전 형식(LangChain FAISS) 인덱스를 현재 형식의 새 버전으로 변환 (임베딩 API 호출 없음)
+        현재 reference 디렉토리에 있는 파일의 청크만 옮기며, 이전 인덱스는 그 파일 내용으로 만들어졌다고 보고
+        현재 content hash를 기록합니다. 따라서 이후 빌드는 변경/추가된 파일만 새 청크 분할로 임베딩합니다.
+        """
+        legacy = read_legacy_index(self.index_path)
+        if legacy is None:
+            return None
+        vectors, legacy_texts, legacy_metadatas = legacy
+        current = self.scan_reference_files()
+
+        # 이전 인덱스는 macOS에서 빌드되어 파일명이 NFD일 수 있으므로 NFC로 맞춰 비교
+        names = {unicodedata.normalize("NFC", name): name for name in current}
+        rows_by_file: Dict[str, List[int]] = {}
+        for i, metadata in enumerate(legacy_metadatas):
+            name = names.get(unicodedata.normalize("NFC", os.path.basename(str(metadata.get("source", "")))))
+            if name is not None:
+                rows_by_file.setdefault(name, []).append(i)
+        if not rows_by_file:
+            return None
+
+        texts, metadatas, rows, files = [], [], [], []
+        for name, file_rows in rows_by_file.items():
+            files.append({"name": name, "sha256": current[name], "start": len(texts), "count": len(file_rows)})
+            for i in file_rows:
+                texts.append(legacy_texts[i])
+                metadatas.append({"source": name, "page": int(legacy_metadatas[i].get("page", -1)), "topics": retag_chunk(legacy_texts[i])})
+            rows.extend(file_rows)
+
+        version = write_snapshot(self.index_path, normalize_vectors(vectors[rows]), texts, metadatas, files, self.index_params, RAG_STEP_TOPIC_KEYWORDS)
+        print(f"Legacy RAG index converted to {version} ({len(texts)} chunks from {len(files)} files, no re-embedding).")
+        return RAGIndexSnapshot.open(self.index_path, self.index_params)
+
+    # ------------------------
+    # build
+    # ------------------------
+    def build(self, snapshot: Optional[RAGIndexSnapshot] = None) -> Optional[RAGIndexSnapshot]:
+        """
+        변경분만 반영한 새 버전을 기록하고 로드하여 반환합니다.
+        변경이 없으면 전달받은 snapshot을 그대로 반환합니다.
+        인덱스 빌드 파라미터만 바뀐 경우 기존 임베딩으로 인덱스만 다시 만듭니다.
+        """
+        prev_files = {entry["name"]: entry for entry in snapshot.manifest["files"]} if snapshot else {}
+        current = self.scan_reference_files()
+        changed, removed = self.diff(prev_files, current)
+        index_changed = snapshot is not None and snapshot.manifest.get("index") != index_build_params(self.index_params)
+        topics_changed = snapshot is not None and snapshot.manifest.get("topics") != RAG_STEP_TOPIC_KEYWORDS
+        if not changed and not removed and not index_changed and not topics_changed:
+            return snapshot
+
+        print(f"Updating RAG index: {len(changed)} changed, {len(removed)} removed, index={self.index_params['type']}")
+
+        # 변경 없는 파일의 청크/임베딩은 이전 버전에서 재사용
+        texts, metadatas, vector_parts, files = [], [], [], []
+        for name, entry in prev_files.items():
+            if name in changed or name in removed:
+                continue
+            start, count = entry["start"], entry["count"]
+            texts.extend(snapshot.chunks.text(i) for i in range(start, start + count))
+            metadatas.extend(snapshot.chunks.metadata(i) for i in range(start, start + count))
+            if topics_changed:
+                # 주제 키워드가 바뀌면 재임베딩 없이 태그만 다시 계산
+                for i in range(len(texts) - count, len(texts)):
+                    metadatas[i]["topics"] = retag_chunk(texts[i])
+            vector_parts.append(np.asarray(snapshot.vectors[start:start + count]))
+            files.append({"name": name, "sha256": entry["sha256"], "start": len(texts) - count, "count": count})
+
+        pages_by_file = self._parse_parallel(changed)
+
+        new_texts, new_metadatas = [], []
+        for name, pages in pages_by_file.items():
+            start = len(texts) + len(new_texts)
+            for chunk, page, topics in self.chunker.split_pages(pages):
+                new_texts.append(chunk)
+                new_metadatas.append({"source": name, "page": page, "topics": topics})
+            files.append({"name": name, "sha256": current[name], "start": start, "count": len(texts) + len(new_texts) - start})
+
+        if new_texts:
+            vector_parts.append(normalize_vectors(self._embed_parallel(new_texts)))
+        texts.extend(new_texts)
+        metadatas.extend(new_metadatas)
+
+        if not texts:
+            print("No documents found to index.")
+            return None
+
+        version = write_snapshot(self.index_path, np.concatenate(vector_parts), texts, metadatas, files, self.index_params, RAG_STEP_TOPIC_KEYWORDS)
+        print(f"RAG index {version} saved ({len(new_texts)} chunks embedded, {len(texts)} total).")
+        return RAGIndexSnapshot.open(self.index_path, self.index_params)
+
+    def _parse_parallel(self, filenames: List[str]) -> Dict[str, List[Tuple[str, Dict[str, Any]]]]:
+        """
+        PDF 파싱을 프로세스 풀에서 병렬 실행 (실패한 파일은 제외)
+        서버 프로세스(이벤트 루프 + Redis 소켓/락을 가진 멀티스레드 프로세스)의 스레드에서도 호출되므로,
+        fork 대신 spawn으로 워커를 만들어 부모의 락 상태를 물려받지 않게 합니다.
+        """
+        if not filenames:
+            return {}
+        paths = [os.path.join(self.reference_dir, name) for name in filenames]
+        results = {}
+        with ProcessPoolExecutor(max_workers=self.parse_workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+            futures = {executor.submit(_load_pdf_pages, path): name for path, name in zip(paths, filenames)}
+            for future, name in futures.items():
+                try:
+                    results[name] = future.result()
+                    print(f"Loaded {name}")
+                except Exception as e:
+                    print(f"Failed to load {name}: {e}")
+        return results
+
+    def _embed_parallel(self, texts: List[str]) -> List[List[float]]:
+        """배치 단위 임베딩을 스레드 풀에서 동시 호출 (입력 순서 유지)"""
+        batches = [texts[i:i + self.embed_batch_size] for i in range(0, len(texts), self.embed_batch_size)]
+        with ThreadPoolExecutor(max_workers=self.embed_concurrency) as executor:
+            results = executor.map(self.embeddings.embed_documents, batches)
+        vectors = []
+        for batch_vectors in results:
+            vectors.extend(batch_vectors)
+        return vectors
@@ -1,9 +1,83 @@
 import os
-from langchain_community.document_loaders import PyPDFLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+import re
+import fcntl
+import asyncio
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
-from langchain_community.vectorstores import FAISS
 from src.service.conf.gemini_api_key import GEMINI_API_KEY
+from src.service.ai.rag_index_builder import RAGIndexBuilder
+from src.service.ai.rag_store import CURRENT_FILE, RAGIndexSnapshot, read_current_version, resolve_index_params
+from src.service.ai.rag_chunker import topic_bit
+from src.service.ai.rag_faq import FAQ_FILE, FAQMatcher
+
+BUILD_LOCK_FILE = ".build.lock"
+SNAPSHOT_ACQUIRE_RETRIES = 3    # 검색 시작 시 교체 직후 닫힌 스냅샷을 다시 읽는 최대 횟수
+
+
+@dataclass
+class RAGHit:
+    """검색 결과 조항 (score는 정규화 벡터 내적 = 코사인 유사도)"""
+    chunk_id: int
+    score: float
+    text: str
+    source: str
+    page: int
+
+
+class RAGSessionCache:
+    """
+    세션별 검색 결과 캐시
+    키: (인덱스 버전, 단계, 정규화된 쿼리) / 세션의 단계가 바뀌면 해당 세션 캐시를 비웁니다.
+    """
+
+    _NORMALIZE_RE = re.compile(r"[^\w\s]")
+
+    def __init__(self, max_sessions: int = 1024, max_entries: int = 8):
+        self.max_sessions = max_sessions
+        self.max_entries = max_entries
+        # sid -> (step, OrderedDict[key, hits])
+        self._sessions: "OrderedDict[str, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def normalize_query(cls, query: str) -> str:
+        """대소문자/문장부호/공백 차이를 무시"""
+        return " ".join(cls._NORMALIZE_RE.sub(" ", query.lower()).split())
+
+    def _entries(self, sid: str, step: Optional[str]) -> "OrderedDict":
+        cached = self._sessions.get(sid)
+        if cached is None or cached[0] != step:
+            # 단계 전환 시 이전 단계 결과는 폐기
+            cached = (step, OrderedDict())
+            self._sessions[sid] = cached
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        self._sessions.move_to_end(sid)
+        return cached[1]
+
+    def get(self, sid: str, key: tuple, step: Optional[str]) -> Optional[List[RAGHit]]:
+        entries = self._entries(sid, step)
+        hits = entries.get(key)
+        if hits is None:
+            self.misses += 1
+            return None
+        entries.move_to_end(key)
+        self.hits += 1
+        return hits
+
+    def put(self, sid: str, key: tuple, step: Optional[str], hits: List[RAGHit]):
+        entries = self._entries(sid, step)
+        entries[key] = hits
+        while len(entries) > self.max_entries:
+            entries.popitem(last=False)
+
+    def drop(self, sid: str):
+        self._sessions.pop(sid, None)
+
 
 class RAGManager:
     _instance = None
@@ -13,62 +87,244 @@ class RAGManager:
             cls._instance = super(RAGManager, cls).__new__(cls)
         return cls._instance
 
-    def __init__(self, reference_dir: str = "reference", index_path: str = "faiss_index"):
+    def __init__(
+        self,
+        reference_dir: str = "reference",
+        index_path: str = "faiss_index",
+        index_params: Optional[Dict[str, Any]] = None,
+        min_score: float = 0.0,
+        faq_min_similarity: float = 0.72,
+    ):
         if hasattr(self, "initialized") and self.initialized:
             return
-            
+
         self.reference_dir = reference_dir
         self.index_path = index_path
         self.embeddings = GoogleGenerativeAIEmbeddings(model="models/embedding-001", google_api_key=GEMINI_API_KEY)
-        self.vector_store = self._load_or_create_index()
+        self.index_params = resolve_index_params(index_params)
+        self.min_score = min_score
+        self.faq_min_similarity = faq_min_similarity
+        self.builder = RAGIndexBuilder(reference_dir, index_path, self.embeddings, index_params=self.index_params)
+        # snapshot은 교체만 하고 수정하지 않으므로, 검색 중인 요청은 참조한 이전 버전을 끝까지 사용 (마지막 검색이 끝나면 닫힘)
+        self.snapshot: Optional[RAGIndexSnapshot] = None
+        self._reload_lock = asyncio.Lock()
+        self.session_cache = RAGSessionCache()
+        self.snapshot = self._load_or_create_index()
+        self.faq = FAQMatcher()
+        self._refresh_faq()
         self.initialized = True
 
-    def _load_or_create_index(self):
-        if os.path.exists(self.index_path):
-            try:
-                # allow_dangerous_deserialization is needed for loading local FAISS index
-                return FAISS.load_local(self.index_path, self.embeddings, allow_dangerous_deserialization=True)
-            except Exception as e:
-                print(f"Failed to load index: {e}. Rebuilding...")
-        
-        return self._build_index()
+    @property
+    def version(self) -> Optional[str]:
+        """현재 사용 중인 인덱스 버전 (캐시 키 용도)"""
+        snapshot = self.snapshot
+        return snapshot.version if snapshot else None
 
-    def _build_index(self):
-        documents = []
+    def _load_or_create_index(self):
         if not os.path.exists(self.reference_dir):
             print(f"Reference directory not found: {self.reference_dir}")
-            return None
+            return self._open_current()
 
         print(f"Building RAG index from {self.reference_dir}...")
-        for filename in os.listdir(self.reference_dir):
-            if filename.endswith(".pdf"):
-                file_path = os.path.join(self.reference_dir, filename)
-                try:
-                    loader = PyPDFLoader(file_path)
-                    documents.extend(loader.load())
-                    print(f"Loaded {filename}")
-                except Exception as e:
-                    print(f"Failed to load {filename}: {e}")
-        
-        if not documents:
-            print("No documents found to index.")
-            return None
+        try:
+            return self._build_locked()
+        except Exception as e:
+            print(f"Failed to build RAG index: {e}")
+            return self._open_current()
+
+    def _open_current(self) -> Optional[RAGIndexSnapshot]:
+        """CURRENT가 가리키는 버전 로드 (이미 사용 중인 버전이면 그대로 반환)"""
+        if self.snapshot and read_current_version(self.index_path) == self.snapshot.version:
+            return self.snapshot
+        try:
+            # 벡터는 mmap, 청크 텍스트는 offset 인덱스로 지연 로드 (pickle 미사용)
+            return RAGIndexSnapshot.open(self.index_path, self.index_params) or self.snapshot
+        except Exception as e:
+            print(f"Failed to load index: {e}")
+            return self.snapshot
 
-        text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-        splits = text_splitter.split_documents(documents)
-        
-        vector_store = FAISS.from_documents(documents=splits, embedding=self.embeddings)
-        vector_store.save_local(self.index_path)
-        print("RAG index built and saved.")
-        return vector_store
-
-    def search(self, query: str, k: int = 3) -> str:
-        if not self.vector_store:
-            return ""
-        
+    def _build_locked(self) -> Optional[RAGIndexSnapshot]:
+        """
+        워커 간 파일 잠금 하에 증분 빌드
+        다른 워커가 먼저 빌드했다면 그 결과를 기준으로 변경분만 반영합니다.
+        """
+        os.makedirs(self.index_path, exist_ok=True)
+        with open(os.path.join(self.index_path, BUILD_LOCK_FILE), "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                base = self._open_current()
+                if base is None:
+                    # 이전 형식 인덱스만 있으면 재임베딩 없이 변환한 버전에서 시작 (변경된 파일만 임베딩)
+                    base = self.builder.import_legacy()
+                snapshot = self.builder.build(base)
+                if base is not None and base is not snapshot and base is not self.snapshot:
+                    # 빌드 기준으로만 연 중간 버전은 사용하지 않으므로 바로 닫음 (잠금 해제 → 다음 빌드에서 정리 가능)
+                    base.close()
+                return snapshot
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    async def reload(self, rebuild: bool = True) -> Optional[str]:
+        """
+        백그라운드 스레드에서 새 인덱스를 빌드(또는 로드)한 뒤 원자적으로 교체합니다.
+        rebuild=False면 다른 워커가 기록한 CURRENT 버전만 반영합니다.
+        """
+        async with self._reload_lock:
+            try:
+                snapshot = await asyncio.to_thread(self._build_locked if rebuild else self._open_current)
+            except Exception as e:
+                print(f"RAG reload failed: {e}")
+                return self.version
+            if snapshot is not None and snapshot is not self.snapshot:
+                previous = self.version
+                self._swap(snapshot)
+                print(f"RAG index swapped: {previous} -> {snapshot.version}")
+            self._refresh_faq()
+        return self.version
+
+    def _swap(self, snapshot: RAGIndexSnapshot):
+        """새 스냅샷으로 교체하고, 이전 스냅샷은 진행 중인 검색이 끝나면 mmap/파일 핸들을 해제"""
+        previous = self.snapshot
+        self.snapshot = snapshot
+        if previous is not None and previous is not snapshot:
+            previous.retire()
+
+    @property
+    def reloading(self) -> bool:
+        """인덱스 재빌드/재로드 진행 중 여부"""
+        return self._reload_lock.locked()
+
+    @contextmanager
+    def _use_snapshot(self):
+        """
+        검색 동안 현재 스냅샷이 닫히지 않도록 참조 (교체 직후 닫힌 스냅샷이면 새 스냅샷을 다시 읽음)
+        닫혔는데 교체되지 않은 스냅샷(종료 중 등)이거나 재시도 횟수를 넘으면 None (검색 생략)
+        """
+        snapshot = None
+        for _ in range(SNAPSHOT_ACQUIRE_RETRIES):
+            current = self.snapshot
+            if current is None:
+                break
+            if current.acquire():
+                snapshot = current
+                break
+            if self.snapshot is current:
+                break
+        try:
+            yield snapshot
+        finally:
+            if snapshot is not None:
+                snapshot.release()
+
+    def _refresh_faq(self):
+        """현재 인덱스 버전의 FAQ 뱅크를 (변경된 경우에만) 다시 로드"""
+        snapshot = self.snapshot
+        path = snapshot.path if snapshot else None
+        faq_path = os.path.join(path, FAQ_FILE) if path else None
+        mtime = os.path.getmtime(faq_path) if faq_path and os.path.exists(faq_path) else 0.0
+        if self.faq.version == (snapshot.version if snapshot else None) and self.faq.mtime == mtime:
+            return
+        self.faq = FAQMatcher.load(path, self.faq_min_similarity)
+        print(f"FAQ bank loaded: {len(self.faq)} entries (index {self.faq.version})")
+
+    def match_faq(self, query: str, step: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """미리 생성된 FAQ 답변 매칭 (LLM 호출 없음)"""
+        return self.faq.match(query, step)
+
+    def update_index(self):
+        """reference 디렉토리 변경분을 현재 인덱스에 병합 (동기 호출용)"""
+        snapshot = self._build_locked()
+        if snapshot is not None:
+            self._swap(snapshot)
+        self._refresh_faq()
+        return self.snapshot
+
+    async def watch(self, debounce_ms: int = 2000):
+        """
+        reference PDF 변경 시 재빌드, 다른 워커의 CURRENT 교체나 FAQ 뱅크 갱신 시 재로드
+        """
+        from watchfiles import awatch
+
+        os.makedirs(self.index_path, exist_ok=True)
+        watch_paths = [path for path in (self.reference_dir, self.index_path) if os.path.exists(path)]
+
+        def _watch_filter(_change, path: str) -> bool:
+            return path.endswith(".pdf") or os.path.basename(path) in (CURRENT_FILE, FAQ_FILE)
+
+        print(f"Watching RAG sources: {watch_paths}")
+        async for changes in awatch(*watch_paths, watch_filter=_watch_filter, debounce=debounce_ms):
+            if any(path.endswith(".pdf") for _, path in changes):
+                await self.reload(rebuild=True)
+            else:
+                await self.reload(rebuild=False)
+
+    def search_hits(self, query: str, k: int = 3, step: Optional[str] = None, min_score: Optional[float] = None) -> List[RAGHit]:
+        """
+        step(ChatStep 값)이 주어지면 해당 단계 주제로 태깅된 조항만 검색합니다.
+        주제가 없는 단계(introduction 등)는 전체 코퍼스를 검색합니다.
+        min_score(미지정 시 설정값) 미만의 조항은 제외하므로 빈 목록이 반환될 수 있습니다.
+        """
         try:
-            docs = self.vector_store.similarity_search(query, k=k)
-            return "\n\n".join([f"[참고 조항]\n{doc.page_content}" for doc in docs])
+            return self._search_hits(query, k, step, min_score)
         except Exception as e:
             print(f"RAG search failed: {e}")
-            return ""
+            return []
+
+    def _search_hits(self, query: str, k: int, step: Optional[str], min_score: Optional[float]) -> List[RAGHit]:
+        if not self.snapshot:
+            return []
+
+        threshold = self.min_score if min_score is None else min_score
+        query_vector = self.embeddings.embed_query(query)
+
+        hits = []
+        with self._use_snapshot() as snapshot:
+            if not snapshot:
+                return []
+            results = snapshot.search(query_vector, k, topic_mask=topic_bit(step) if step else 0)
+            for score, idx in results:
+                if score < threshold:
+                    continue
+                metadata = snapshot.chunks.metadata(idx)
+                hits.append(RAGHit(
+                    chunk_id=int(idx),
+                    score=float(score),
+                    text=snapshot.chunks.text(idx),
+                    source=metadata["source"],
+                    page=metadata["page"],
+                ))
+        return hits
+
+    async def search_hits_cached(self, sid: str, query: str, k: int = 3, step: Optional[str] = None) -> List[RAGHit]:
+        """
+        같은 세션·단계에서 동일한 쿼리면 이전 결과를 재사용 (임베딩/검색 생략)
+        인덱스가 교체되면 버전이 키에 포함되어 자동으로 새로 검색합니다.
+        캐시는 이벤트 루프에서 확인하고, 임베딩/검색만 스레드에서 실행합니다 (턴 처리 중 이벤트 루프를 막지 않음).
+        """
+        key = (self.version, step, k, self.session_cache.normalize_query(query))
+        hits = self.session_cache.get(sid, key, step)
+        if hits is None:
+            try:
+                hits = await asyncio.to_thread(self._search_hits, query, k, step, None)
+            except Exception as e:
+                # 실패 결과는 캐시하지 않음
+                print(f"RAG search failed: {e}")
+                return []
+            self.session_cache.put(sid, key, step, hits)
+        return hits
+
+    @classmethod
+    def discard(cls, sid: str):
+        """세션 검색 캐시 정리 (단계 전환 시, WebSocketHandler 세션 종료 리스너)"""
+        instance = cls._instance
+        if instance is not None and getattr(instance, "initialized", False):
+            instance.session_cache.drop(sid)
+
+    @staticmethod
+    def format_hits(hits: List[RAGHit]) -> str:
+        """프롬프트 주입용 문자열"""
+        return "\n\n".join([f"[참고 조항]\n{hit.text}" for hit in hits])
+
+    def search(self, query: str, k: int = 3, step: Optional[str] = None) -> str:
+        """search_hits 결과를 프롬프트용 문자열로 반환 (관련 조항이 없으면 빈 문자열)"""
+        return self.format_hits(self.search_hits(query, k, step))
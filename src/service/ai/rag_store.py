@@ -0,0 +1,473 @@
+"""
+RAG 인덱스 온디스크 저장 포맷
+- vectors.faiss : FAISS 인덱스 (flat / hnsw / ivfpq, mmap IO 플래그로 로드하여 워커 간 OS 페이지 캐시 공유)
+- vectors.npy   : 정규화된 임베딩 원본 (증분 병합 시 재임베딩 없이 재사용)
+- chunks.bin    : 청크 텍스트(UTF-8)를 이어 붙인 파일
+- chunks.idx    : 청크별 (offset, length, source, page, topics) 고정 길이 레코드
+- manifest.json : 파일별 content hash 및 청크 범위
+빌드 결과는 index_path/<version>/ 에 기록되고, CURRENT 파일 교체로 원자적으로 활성화됩니다.
+버전 이름은 "<ns 타임스탬프 20자리>-<content hash>"로 이름순 = 생성순이며, 워커가 열어 둔 버전은 공유 잠금(.lock)으로 표시되어 정리하지 않습니다.
+이전 형식(LangChain FAISS.save_local의 index.faiss + index.pkl)은 read_legacy_index로 읽어 재임베딩 없이 변환합니다.
+"""
+import os
+import mmap
+import fcntl
+import pickle
+import time
+import shutil
+import threading
+import hashlib
+from typing import Any, Dict, List, Optional, Tuple
+
+import faiss
+import numpy as np
+import orjson
+
+CURRENT_FILE = "CURRENT"
+MANIFEST_FILE = "manifest.json"
+VECTORS_FILE = "vectors.npy"
+FAISS_FILE = "vectors.faiss"
+CHUNKS_FILE = "chunks.bin"
+CHUNK_INDEX_FILE = "chunks.idx"
+MANIFEST_VERSION = 3
+VERSION_LOCK_FILE = ".lock"
+
+# 이전 형식 (LangChain FAISS.save_local)
+LEGACY_FAISS_FILE = "index.faiss"
+LEGACY_DOCSTORE_FILE = "index.pkl"
+KEEP_VERSIONS = 2
+
+# 인덱스 타입별 빌드/검색 파라미터 기본값 (config의 rag.index로 덮어씀)
+DEFAULT_INDEX_PARAMS = {
+    "type": "flat",                # "flat" | "hnsw" | "ivfpq"
+    "hnsw_m": 32,
+    "hnsw_ef_construction": 200,
+    "hnsw_ef_search": 64,
+    "ivf_nlist": 256,
+    "ivf_nprobe": 16,
+    "pq_m": 48,
+    "pq_nbits": 8,
+    "pq_refine_k_factor": 8,       # 0이면 PQ 근사 점수를 그대로 사용, 그 외에는 k*factor 후보를 원본 벡터로 재정렬
+}
+
+SEARCH_TIME_PARAMS = ("hnsw_ef_search", "ivf_nprobe", "pq_refine_k_factor")
+
+CHUNK_INDEX_DTYPE = np.dtype([
+    ("offset", "<u8"),
+    ("length", "<u4"),
+    ("source", "<u4"),
+    ("page", "<i4"),
+    ("topics", "<u4"),   # 주제 비트마스크 (비트 순서는 manifest의 topics 키 순서)
+])
+
+# 주제 필터 결과가 이 크기 이하이면 해당 벡터만 대상으로 정확 검색 (그보다 크면 ID selector로 ANN 인덱스에서 필터 검색)
+EXACT_FILTER_LIMIT = 2_048
+
+
+def normalize_vectors(vectors) -> np.ndarray:
+    """코사인 유사도(inner product) 검색을 위한 L2 정규화"""
+    arr = np.ascontiguousarray(np.asarray(vectors, dtype="float32"))
+    if arr.ndim == 1:
+        arr = arr.reshape(1, -1)
+    faiss.normalize_L2(arr)
+    return arr
+
+
+def resolve_index_params(index_params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    return {**DEFAULT_INDEX_PARAMS, **(index_params or {})}
+
+
+def index_build_params(index_params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """manifest에 기록하는 빌드 파라미터 (검색 시점 파라미터는 재빌드 대상이 아님)"""
+    params = resolve_index_params(index_params)
+    return {key: value for key, value in params.items() if key not in SEARCH_TIME_PARAMS}
+
+
+def build_faiss_index(vectors: np.ndarray, index_params: Optional[Dict[str, Any]] = None):
+    """
+    설정된 타입으로 inner product 인덱스를 생성합니다.
+    ivfpq는 학습 데이터가 부족하면 flat으로 대체합니다.
+    """
+    params = resolve_index_params(index_params)
+    dim = vectors.shape[1]
+    index_type = params["type"]
+
+    if index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, params["hnsw_m"], faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = params["hnsw_ef_construction"]
+    elif index_type == "ivfpq":
+        pq_m, nbits = params["pq_m"], params["pq_nbits"]
+        # nlist당 최소 39개, PQ 코드북당 최소 2^nbits개의 학습 벡터가 필요
+        nlist = min(params["ivf_nlist"], len(vectors) // 39)
+        if dim % pq_m != 0 or nlist < 1 or len(vectors) < (1 << nbits):
+            print(f"Not enough vectors ({len(vectors)}) or invalid pq_m for ivfpq; using flat index")
+            return build_faiss_index(vectors, {**params, "type": "flat"})
+        quantizer = faiss.IndexFlatIP(dim)
+        index = faiss.IndexIVFPQ(quantizer, dim, nlist, pq_m, nbits, faiss.METRIC_INNER_PRODUCT)
+        index = faiss.IndexRefineFlat(index)
+        index.train(vectors)
+    elif index_type == "flat":
+        index = faiss.IndexFlatIP(dim)
+    else:
+        raise ValueError(f"Unsupported RAG index type: {index_type}")
+
+    if len(vectors):
+        index.add(vectors)
+    configure_search(index, params)
+    return index
+
+
+def configure_search(index, index_params: Optional[Dict[str, Any]] = None):
+    """검색 시점 파라미터(efSearch, nprobe) 적용"""
+    params = resolve_index_params(index_params)
+    if isinstance(index, faiss.IndexRefine):
+        index.k_factor = max(params["pq_refine_k_factor"], 1)
+        index = faiss.downcast_index(index.base_index)
+    if isinstance(index, faiss.IndexHNSW):
+        index.hnsw.efSearch = params["hnsw_ef_search"]
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        ivf.nprobe = params["ivf_nprobe"]
+
+
+class ChunkStore:
+    """offset 인덱스 기반 청크 텍스트 저장소 (필요한 청크만 지연 디코딩)"""
+
+    def __init__(self, path: str, sources: List[str]):
+        self.sources = sources
+        self._records = np.load(os.path.join(path, CHUNK_INDEX_FILE), mmap_mode="r", allow_pickle=False)
+        self._file = open(os.path.join(path, CHUNKS_FILE), "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def text(self, idx: int) -> str:
+        record = self._records[idx]
+        offset = int(record["offset"])
+        return self._data[offset:offset + int(record["length"])].decode("utf-8")
+
+    def metadata(self, idx: int) -> Dict[str, Any]:
+        record = self._records[idx]
+        return {"source": self.sources[int(record["source"])], "page": int(record["page"]), "topics": int(record["topics"])}
+
+    def topic_ids(self, mask: int) -> np.ndarray:
+        """주제 마스크에 해당하는 청크 번호"""
+        return np.flatnonzero(self._records["topics"] & mask)
+
+    def close(self):
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._file.close()
+
+    @staticmethod
+    def write(path: str, texts: List[str], metadatas: List[Dict[str, Any]], sources: List[str]):
+        source_ids = {source: i for i, source in enumerate(sources)}
+        records = np.zeros(len(texts), dtype=CHUNK_INDEX_DTYPE)
+        offset = 0
+        with open(os.path.join(path, CHUNKS_FILE), "wb") as f:
+            for i, (text, metadata) in enumerate(zip(texts, metadatas)):
+                encoded = text.encode("utf-8")
+                f.write(encoded)
+                records[i] = (
+                    offset,
+                    len(encoded),
+                    source_ids[metadata["source"]],
+                    metadata.get("page", -1),
+                    metadata.get("topics", 0),
+                )
+                offset += len(encoded)
+        # np.save는 확장자를 강제하므로 파일 객체로 기록
+        with open(os.path.join(path, CHUNK_INDEX_FILE), "wb") as f:
+            np.save(f, records, allow_pickle=False)
+
+
+class RAGIndexSnapshot:
+    """특정 버전의 인덱스 + 청크 저장소 (읽기 전용)"""
+
+    def __init__(self, path: str, version: str, index, chunks: ChunkStore, manifest: Dict[str, Any]):
+        self.path = path
+        self.version = version
+        self.index = index
+        self.chunks = chunks
+        self.manifest = manifest
+        self._vectors = None
+        self._topic_ids: Dict[int, np.ndarray] = {}
+        self._topic_params: Dict[int, tuple] = {}     # 주제 마스크 -> (검색 파라미터, 참조 유지용 selector/bitmap)
+        self._lock = threading.Lock()
+        self._refs = 0              # 이 스냅샷으로 진행 중인 검색 수
+        self._retired = False       # 새 버전으로 교체됨 (진행 중인 검색이 끝나면 닫음)
+        self._closed = False
+        # 열려 있는 동안 버전 디렉토리에 공유 잠금을 유지하여 다른 워커의 빌드가 정리하지 않도록 함
+        self._version_lock = open(os.path.join(path, VERSION_LOCK_FILE), "a")
+        fcntl.flock(self._version_lock, fcntl.LOCK_SH)
+
+    @property
+    def vectors(self) -> np.ndarray:
+        """빌드용 임베딩 원본 (mmap)"""
+        if self._vectors is None:
+            self._vectors = np.load(os.path.join(self.path, VECTORS_FILE), mmap_mode="r", allow_pickle=False)
+        return self._vectors
+
+    @classmethod
+    def open(cls, index_path: str, index_params: Optional[Dict[str, Any]] = None) -> Optional["RAGIndexSnapshot"]:
+        """CURRENT가 가리키는 버전을 로드 (없으면 None)"""
+        version = read_current_version(index_path)
+        if not version:
+            return None
+        path = os.path.join(index_path, version)
+        with open(os.path.join(path, MANIFEST_FILE), "rb") as f:
+            manifest = orjson.loads(f.read())
+        if manifest.get("version") != MANIFEST_VERSION:
+            return None
+        index = _read_index_mmap(os.path.join(path, FAISS_FILE))
+        configure_search(index, index_params)
+        chunks = ChunkStore(path, [entry["name"] for entry in manifest["files"]])
+        return cls(path, version, index, chunks, manifest)
+
+    def search(self, query_vector, k: int, topic_mask: int = 0):
+        """
+        (score, chunk_idx) 목록 반환 (score는 코사인 유사도)
+        topic_mask가 주어지면 해당 주제로 태깅된 청크만 검색합니다.
+        """
+        if self.index.ntotal == 0:
+            return []
+        query = normalize_vectors(query_vector)
+        if topic_mask:
+            ids = self._topic_ids.get(topic_mask)
+            if ids is None:
+                ids = self._topic_ids[topic_mask] = self.chunks.topic_ids(topic_mask)
+            if len(ids) == 0:
+                return []
+            if len(ids) <= EXACT_FILTER_LIMIT:
+                return self._search_subset(query[0], ids, k)
+            scores, ids = self.index.search(query, k, params=self._filter_params(topic_mask, ids))
+        else:
+            scores, ids = self.index.search(query, k)
+        return [(float(score), int(idx)) for score, idx in zip(scores[0], ids[0]) if idx >= 0]
+
+    def _search_subset(self, query: np.ndarray, ids: np.ndarray, k: int):
+        """필터된 청크 벡터만 대상으로 정확 검색 (mmap된 벡터 사용)"""
+        scores = np.asarray(self.vectors[ids]) @ query
+        top = np.argpartition(-scores, min(k, len(ids)) - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(float(scores[i]), int(ids[i])) for i in top]
+
+    def _filter_params(self, topic_mask: int, ids: np.ndarray):
+        """
+        주제 필터용 faiss 검색 파라미터 (주제 마스크별로 캐시)
+        인덱스가 검색 중에 selector로 후보를 거르므로 HNSW/IVF-PQ 인덱스를 그대로 사용하며,
+        파라미터 객체를 넘기면 인덱스에 설정된 efSearch/nprobe/k_factor 대신 쓰이므로 현재 값을 옮겨 담습니다.
+        selector와 비트맵은 faiss가 참조만 하므로 파라미터와 함께 보관합니다.
+        """
+        cached = self._topic_params.get(topic_mask)
+        if cached is not None:
+            return cached[0]
+        bitmap = np.zeros(self.index.ntotal, dtype=bool)
+        bitmap[ids] = True
+        bitmap = np.packbits(bitmap, bitorder="little")
+        selector = faiss.IDSelectorBitmap(self.index.ntotal, faiss.swig_ptr(bitmap))
+        params, refs = _selector_params(self.index, selector)
+        self._topic_params[topic_mask] = (params, (selector, bitmap, refs))
+        return params
+
+    def acquire(self) -> bool:
+        """검색 시작 (이미 닫힌 스냅샷이면 False)"""
+        with self._lock:
+            if self._closed:
+                return False
+            self._refs += 1
+            return True
+
+    def release(self):
+        """검색 종료 (교체된 스냅샷이면 마지막 검색이 끝날 때 닫음)"""
+        with self._lock:
+            self._refs -= 1
+            close_now = self._retired and self._refs == 0
+        if close_now:
+            self.close()
+
+    def retire(self):
+        """새 버전으로 교체된 스냅샷 정리 (진행 중인 검색이 없으면 바로 닫음)"""
+        with self._lock:
+            self._retired = True
+            close_now = self._refs == 0
+        if close_now:
+            self.close()
+
+    def close(self):
+        """mmap과 파일 핸들을 해제하고 버전 디렉토리 잠금을 놓음"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self.chunks.close()
+        self.index = None
+        self._vectors = None
+        self._topic_params.clear()
+        self._topic_ids.clear()
+        self._version_lock.close()
+
+
+def _selector_params(index, selector):
+    """인덱스 타입에 맞는 SearchParameters (현재 검색 시점 파라미터 유지)"""
+    if isinstance(index, faiss.IndexRefine):
+        base_params, refs = _selector_params(faiss.downcast_index(index.base_index), selector)
+        params = faiss.IndexRefineSearchParameters(k_factor=index.k_factor, base_index_params=base_params)
+        return params, (base_params, refs)
+    if isinstance(index, faiss.IndexHNSW):
+        return faiss.SearchParametersHNSW(sel=selector, efSearch=index.hnsw.efSearch), None
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        return faiss.SearchParametersIVF(sel=selector, nprobe=ivf.nprobe), None
+    return faiss.SearchParameters(sel=selector), None
+
+
+def _read_index_mmap(file_path: str):
+    """mmap 로드 시도 후 실패하면 일반 로드 (인덱스 타입에 따라 mmap 미지원)"""
+    try:
+        return faiss.read_index(file_path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+    except Exception:
+        return faiss.read_index(file_path)
+
+
+class _LegacyObject:
+    """이전 형식 docstore/Document 대용 (pickle 상태만 보관)"""
+
+    def __setstate__(self, state):
+        self.state = state
+
+
+class _LegacyDocstoreUnpickler(pickle.Unpickler):
+    """
+    LangChain docstore pickle을 langchain_community 없이 읽는 제한된 Unpickler
+    InMemoryDocstore/Document와 기본 컨테이너 외의 클래스는 로드하지 않습니다 (임의 코드 실행 방지).
+    """
+
+    _ALLOWED = {
+        ("langchain_community.docstore.in_memory", "InMemoryDocstore"),
+        ("langchain.docstore.in_memory", "InMemoryDocstore"),
+        ("langchain_core.documents.base", "Document"),
+        ("langchain.schema.document", "Document"),
+    }
+    _BUILTINS = {"dict": dict, "list": list, "tuple": tuple, "set": set, "frozenset": frozenset}
+
+    def find_class(self, module: str, name: str):
+        if (module, name) in self._ALLOWED:
+            return type(name, (_LegacyObject,), {})
+        if module == "builtins" and name in self._BUILTINS:
+            return self._BUILTINS[name]
+        if module == "copyreg" and name == "_reconstructor":
+            import copyreg
+            return copyreg._reconstructor
+        raise pickle.UnpicklingError(f"Unexpected class in legacy docstore: {module}.{name}")
+
+
+def read_legacy_index(index_path: str) -> Optional[Tuple[np.ndarray, List[str], List[Dict[str, Any]]]]:
+    """
+    이전 형식 인덱스의 (벡터, 청크 텍스트, 메타데이터) (없으면 None)
+    벡터는 인덱스에서 그대로 복원하므로 임베딩 API를 호출하지 않습니다.
+    """
+    faiss_path = os.path.join(index_path, LEGACY_FAISS_FILE)
+    docstore_path = os.path.join(index_path, LEGACY_DOCSTORE_FILE)
+    if not (os.path.exists(faiss_path) and os.path.exists(docstore_path)):
+        return None
+
+    index = faiss.read_index(faiss_path)
+    vectors = index.reconstruct_n(0, index.ntotal)
+    with open(docstore_path, "rb") as f:
+        docstore, id_map = _LegacyDocstoreUnpickler(f).load()
+    documents = docstore.state["_dict"]
+
+    texts, metadatas = [], []
+    for i in range(index.ntotal):
+        state = documents[id_map[i]].state
+        fields = state.get("__dict__", state)
+        texts.append(fields["page_content"])
+        metadatas.append(dict(fields.get("metadata") or {}))
+    return vectors, texts, metadatas
+
+
+def read_current_version(index_path: str) -> Optional[str]:
+    current_path = os.path.join(index_path, CURRENT_FILE)
+    if not os.path.exists(current_path):
+        return None
+    with open(current_path, "r", encoding="utf-8") as f:
+        return f.read().strip() or None
+
+
+def write_snapshot(
+    index_path: str,
+    vectors: np.ndarray,
+    texts: List[str],
+    metadatas: List[Dict[str, Any]],
+    files: List[Dict[str, Any]],
+    index_params: Optional[Dict[str, Any]] = None,
+    topics: Optional[Dict[str, List[str]]] = None,
+) -> str:
+    """
+    새 버전 디렉토리에 인덱스를 기록하고 CURRENT를 교체합니다.
+    기존 버전 파일은 수정하지 않으므로 mmap 중인 다른 워커에 영향이 없습니다.
+    """
+    digest = hashlib.sha256("".join(entry["sha256"] for entry in files).encode()).hexdigest()[:8]
+    # 같은 초에 여러 번 빌드되어도 순서가 유지되도록 ns 단위 이름을 쓰고, 시계가 되돌아가도 CURRENT보다 앞서지 않게 함
+    current = read_current_version(index_path)
+    stamp = max(time.time_ns(), _version_stamp(current) + 1 if current else 0)
+    version = f"{stamp:020d}-{digest}"
+    path = os.path.join(index_path, version)
+    os.makedirs(path, exist_ok=True)
+
+    vectors = np.ascontiguousarray(vectors, dtype="float32")
+    with open(os.path.join(path, VECTORS_FILE), "wb") as f:
+        np.save(f, vectors, allow_pickle=False)
+
+    params = resolve_index_params(index_params)
+    index = build_faiss_index(vectors, params)
+    faiss.write_index(index, os.path.join(path, FAISS_FILE))
+
+    ChunkStore.write(path, texts, metadatas, [entry["name"] for entry in files])
+
+    manifest = {"version": MANIFEST_VERSION, "dim": int(vectors.shape[1]), "index": index_build_params(params), "topics": topics or {}, "files": files}
+    with open(os.path.join(path, MANIFEST_FILE), "wb") as f:
+        f.write(orjson.dumps(manifest, option=orjson.OPT_INDENT_2))
+
+    tmp_path = os.path.join(index_path, f"{CURRENT_FILE}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(tmp_path, os.path.join(index_path, CURRENT_FILE))
+
+    _prune_old_versions(index_path, keep=version)
+    return version
+
+
+def _version_stamp(version: str) -> int:
+    """버전 이름의 생성 시각 (이전 형식 YYYYmmddHHMMSS도 ns 이름보다 앞에 정렬됨)"""
+    try:
+        return int(version.split("-", 1)[0])
+    except ValueError:
+        return 0
+
+
+def _prune_old_versions(index_path: str, keep: str):
+    """
+    최근 KEEP_VERSIONS개(새 CURRENT와 직전 버전)를 제외한 이전 버전 디렉토리 삭제
+    워커가 아직 열어 둔 버전(공유 잠금 보유)은 건너뛰고 다음 빌드 때 다시 시도합니다.
+    """
+    versions = sorted(
+        (
+            name for name in os.listdir(index_path)
+            if os.path.isdir(os.path.join(index_path, name)) and os.path.exists(os.path.join(index_path, name, MANIFEST_FILE))
+        ),
+        key=lambda name: (_version_stamp(name), name),
+    )
+    for name in versions[:-KEEP_VERSIONS]:
+        if name == keep:
+            continue
+        path = os.path.join(index_path, name)
+        with open(os.path.join(path, VERSION_LOCK_FILE), "a") as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                continue
+            shutil.rmtree(path, ignore_errors=True)
@@ -0,0 +1,138 @@
+"""
+세션 컨텍스트 (참여자 정보)
+session:info:{sid}의 참여자 이름/사업자번호/연락처는 세션 중에 바뀌지 않으므로, 첫 참여자가 접속할 때 한 번 읽어
+세션 연결 그룹(WebSocketHandler)에 붙여 두고 턴마다 다시 읽지 않습니다.
+정보를 바꿀 때는 update()로 Redis에 기록하고 session:info:refresh 채널로 알려, 각 워커가 붙여 둔 컨텍스트를 다시 읽게 합니다.
+"""
+import asyncio
+from typing import Any, Dict, Optional
+
+import orjson
+
+INFO_PREFIX = "session:info:"
+REFRESH_CHANNEL = "session:info:refresh"
+
+# 참여자 정보 기본값 (session:info에 없거나 비어 있을 때)
+PARTICIPANT_DEFAULTS = {
+    "client_name": "의뢰인",
+    "provider_name": "용역자",
+    "client_business_number": "미기재",
+    "client_contact": "미기재",
+    "provider_business_number": "미기재",
+    "provider_contact": "미기재",
+}
+
+# 갱신 API로 바꿀 수 있는 필드
+UPDATABLE_FIELDS = (
+    "client_name", "provider_name", "contract_date",
+    "client_business_number", "client_contact", "provider_business_number", "provider_contact",
+)
+
+
+class SessionContext:
+    """세션 연결 그룹에 붙는 참여자 정보"""
+
+    __slots__ = ("sid", "info")
+
+    def __init__(self, sid: str, info: Optional[Dict[str, Any]] = None):
+        self.sid = sid
+        self.info = info or {}
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.info.get(key) or default
+
+    def participant_info(self) -> Dict[str, str]:
+        """기본값이 채워진 참여자 정보"""
+        return {key: self.info.get(key) or default for key, default in PARTICIPANT_DEFAULTS.items()}
+
+    @staticmethod
+    def _key(sid: str) -> str:
+        return f"{INFO_PREFIX}{sid}"
+
+    @classmethod
+    async def fetch(cls, ctx, sid: str) -> Optional[Dict[str, Any]]:
+        """Redis의 session:info (Redis 저장에 실패해 메모리에만 둔 세션 정보도 확인)"""
+        raw = await ctx.redis_handler.get_client().get(cls._key(sid))
+        if raw:
+            return orjson.loads(raw)
+        return getattr(ctx, "sessions", {}).get(sid)
+
+    @classmethod
+    async def load(cls, ctx, sid: str, query_params=None) -> "SessionContext":
+        """
+        세션 정보 로드
+        session:info가 없으면 접속 쿼리 파라미터로 만들어 저장하고(최초 1회), Redis 오류 시에는 쿼리 파라미터만 사용합니다.
+        """
+        def from_query() -> Dict[str, Any]:
+            params = query_params or {}
+            return {
+                "client_name": params.get("client_name") or PARTICIPANT_DEFAULTS["client_name"],
+                "provider_name": params.get("provider_name") or PARTICIPANT_DEFAULTS["provider_name"],
+                "contract_date": params.get("contract_date"),
+            }
+
+        try:
+            info = await cls.fetch(ctx, sid)
+            if info is None and query_params is not None:
+                info = from_query()
+                await ctx.redis_handler.get_client().set(cls._key(sid), orjson.dumps(info))
+        except Exception as e:
+            ctx.log.warning(f"[WS]        -- Failed to load session info from Redis: {e}")
+            info = from_query() if query_params is not None else None
+        return cls(sid, info)
+
+    async def refresh(self, ctx):
+        """명시적 갱신 (Redis 값으로 교체, 읽기 실패 시 기존 값 유지)"""
+        try:
+            info = await self.fetch(ctx, self.sid)
+        except Exception as e:
+            ctx.log.warning(f"[WS]        -- Failed to refresh session info for {self.sid}: {e}")
+            return
+        if info is not None:
+            self.info = info
+
+    @classmethod
+    async def update(cls, ctx, sid: str, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        session:info 일부 필드 갱신 (TTL 유지) 후 모든 워커에 갱신 알림
+        세션 정보가 없으면 None
+        """
+        client = ctx.redis_handler.get_client()
+        info = await cls.fetch(ctx, sid)
+        if info is None:
+            return None
+        info = {**info, **{key: value for key, value in fields.items() if key in UPDATABLE_FIELDS}}
+        await client.set(cls._key(sid), orjson.dumps(info), keepttl=True)
+
+        context = ctx.ws_handler.get_session_context(sid)
+        if context is not None:
+            context.info = info
+        await client.publish(REFRESH_CHANNEL, sid)
+        return info
+
+    @classmethod
+    async def listen_refresh(cls, ctx, retry_sec: float = 1.0):
+        """다른 워커의 세션 정보 갱신 알림 구독 (이 워커에 연결 그룹이 있는 세션만 다시 읽음)"""
+        while True:
+            pubsub = None
+            try:
+                pubsub = ctx.redis_handler.client.pubsub(ignore_subscribe_messages=True)
+                await pubsub.subscribe(REFRESH_CHANNEL)
+                ctx.log.info(f"[WS]        -- Subscribed to {REFRESH_CHANNEL}")
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    context = ctx.ws_handler.get_session_context(message["data"])
+                    if context is not None:
+                        await context.refresh(ctx)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                ctx.log.warning(f"[WS]        -- Session info refresh listener failed: {e}")
+            finally:
+                if pubsub is not None:
+                    try:
+                        await pubsub.reset()
+                    except Exception:
+                        pass
+            await asyncio.sleep(retry_sec)
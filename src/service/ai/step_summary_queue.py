@@ -0,0 +1,183 @@
+"""
+단계 요약 백그라운드 큐
+단계가 진행될 때 이전 단계의 최종 합의 내용 요약(STEP_SUMMARY_PROMPT)은 확정 메시지를 보낸 뒤 백그라운드에서 실행하고,
+완료되면 collected_data의 해당 필드를 요약 값으로 교체합니다. 그동안 필드에는 사용자 입력(폴백 값)이 들어 있습니다.
+
+순서 보장:
+    같은 세션의 요약은 LLM 호출은 동시에 진행하되, collected_data 반영은 제출 순서대로 합니다.
+    다음 턴은 collected_data를 프롬프트에 넣기 직전에만 wait()로 남은 요약을 기다립니다 (질문 답변/단계 판단은 기다리지 않음).
+    요약을 기다리는 사이 필드가 다른 값으로 바뀌었으면(이후 턴의 입력) 요약으로 덮어쓰지 않습니다.
+    순서 보장은 워커 안에서만 적용되며, 다른 워커의 턴에는 CAS 저장의 필드 단위 rebase로 반영됩니다.
+
+세션 이탈:
+    참여자가 모두 떠나면(SessionTurnActor.abandon) 아직 LLM 호출 중인 요약은 취소하고 폴백 값을 유지합니다.
+    요약 값을 이미 받은 작업은 추가 호출이 없으므로 그대로 반영합니다.
+"""
+import asyncio
+import json
+import re
+from datetime import datetime
+from typing import Any, Dict, Optional, Set
+
+import orjson
+
+import src.service.ai.asset.prompts.doq_prompts_chat_scenario as scenario
+from src.service.ai.chat_state_manager import SessionStateCache
+
+
+async def summarize_step(ctx, conversation_context: str, step: str, field: str) -> Optional[str]:
+    """LLM을 이용한 단계별 최종 합의 내용 요약 (실패 시 None)"""
+    try:
+        summary_text = await ctx.llm_manager.generate(
+            scenario.STEP_SUMMARY_PROMPT,
+            placeholders={
+                "conversation_context": conversation_context,
+                "current_step": step,
+                "target_field": field,
+                "current_date": datetime.now().strftime("%Y-%m-%d")
+            },
+            max_output_tokens=500,
+            temperature=0.1
+        )
+
+        # JSON 파싱
+        summary_json_match = re.search(r"```(?:json)?\s*(\{.*?\})\s*```", summary_text, re.DOTALL)
+        if summary_json_match:
+            summary_json_str = summary_json_match.group(1)
+        else:
+            summary_json_str = summary_text
+
+        try:
+            summary_parsed = orjson.loads(summary_json_str)
+        except Exception:
+            summary_parsed = json.loads(summary_json_str, strict=False)
+
+        return summary_parsed.get("extracted_value")
+    except Exception as e:
+        ctx.log.warning(f"[WS]        -- Step summary failed: {e}")
+        return None
+
+
+class StepSummaryQueue:
+    """
+    세션별 단계 요약 작업
+    세션마다 마지막으로 제출된 작업만 보관하며, 각 작업은 이전 작업의 반영이 끝난 뒤 반영하므로 마지막 작업 완료 = 모두 반영입니다.
+    """
+
+    _jobs: Dict[str, asyncio.Task] = {}    # sid -> 마지막으로 제출된 요약 작업
+    _running: Set[asyncio.Task] = set()     # 진행 중인 모든 작업 (종료 시 취소용)
+    _summarizing: Dict[str, Set[asyncio.Task]] = {}     # sid -> 요약 LLM 호출 중인 작업 (세션 이탈 시 취소용)
+    _wait_sec = 10.0
+
+    _metrics = {
+        "submitted": 0,
+        "applied": 0,           # 요약 값으로 교체
+        "failed": 0,            # 요약 실패 (폴백 값 유지)
+        "stale": 0,             # 요약 대기 중 필드가 바뀌어 반영하지 않음
+        "waits": 0,             # 다음 턴이 남은 요약을 기다린 횟수
+        "wait_timeouts": 0,     # 기다리다 시간 초과로 현재 값으로 진행
+        "cancelled": 0,         # 세션 이탈로 취소한 요약 LLM 호출
+    }
+
+    @classmethod
+    def configure(cls, wait_sec: float = 10.0):
+        cls._wait_sec = wait_sec
+
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        return {"pending_sessions": len(cls._jobs), "running": len(cls._running), "wait_sec": cls._wait_sec, **cls._metrics}
+
+    @classmethod
+    def submit(cls, ctx, sid: str, step: str, field: str, base_value: Any, conversation_context: str):
+        """
+        요약 작업 제출 (바로 반환)
+        base_value는 제출 시점의 필드 값이며, 요약 완료 시 값이 그대로일 때만 교체합니다.
+        """
+        previous = cls._jobs.get(sid)
+        task = asyncio.create_task(cls._run(ctx, sid, step, field, base_value, conversation_context, previous))
+        cls._jobs[sid] = task
+        cls._running.add(task)
+        cls._summarizing.setdefault(sid, set()).add(task)
+        cls._metrics["submitted"] += 1
+
+        def done(finished: asyncio.Task):
+            cls._running.discard(finished)
+            cls._summarized(sid, finished)
+            if cls._jobs.get(sid) is finished:
+                del cls._jobs[sid]
+        task.add_done_callback(done)
+
+    @classmethod
+    def _summarized(cls, sid: str, task: asyncio.Task):
+        """요약 LLM 호출이 끝난 작업 (이후 세션 이탈 시 취소 대상 아님)"""
+        tasks = cls._summarizing.get(sid)
+        if tasks is not None:
+            tasks.discard(task)
+            if not tasks:
+                del cls._summarizing[sid]
+
+    @classmethod
+    def cancel(cls, sid: str) -> int:
+        """
+        세션의 요약 LLM 호출 취소 (SessionTurnActor 이탈 훅, 필드에는 폴백 값이 이미 저장되어 있음)
+        취소한 호출 수를 반환합니다.
+        """
+        tasks = [task for task in cls._summarizing.pop(sid, ()) if not task.done()]
+        for task in tasks:
+            task.cancel()
+        cls._metrics["cancelled"] += len(tasks)
+        return len(tasks)
+
+    @classmethod
+    async def _run(cls, ctx, sid: str, step: str, field: str, base_value, conversation_context: str, previous: Optional[asyncio.Task]):
+        value = await summarize_step(ctx, conversation_context, step, field)
+        cls._summarized(sid, asyncio.current_task())
+        if previous is not None:
+            # 반영 순서는 제출 순서 (이전 작업 실패/취소와 무관하게 진행)
+            await asyncio.wait({previous})
+        if not value:
+            cls._metrics["failed"] += 1
+            return
+        try:
+            state_manager = await SessionStateCache.get(sid, ctx)
+            if state_manager is None:
+                return
+            if state_manager.collected_data.get(field) != base_value:
+                cls._metrics["stale"] += 1
+                ctx.log.info(f"[WS]        -- Step summary for {field} skipped: field changed while summarizing ({sid})")
+                return
+            state_manager.update_data(field, value)
+            await SessionStateCache.save(state_manager, ctx)
+        except Exception as e:
+            ctx.log.warning(f"[WS]        -- Failed to apply step summary for {sid}: {e}")
+            return
+        cls._metrics["applied"] += 1
+        ctx.log.info(f"[WS]        -- Summarized and saved {field}: {value}")
+
+    @classmethod
+    async def wait(cls, ctx, sid: str) -> bool:
+        """
+        세션의 남은 요약이 모두 반영될 때까지 대기 (collected_data를 읽기 직전에 호출)
+        wait_sec 안에 끝나지 않으면 False를 반환하고 현재 값으로 진행합니다 (늦게 끝난 요약은 이후에 반영).
+        """
+        task = cls._jobs.get(sid)
+        if task is None:
+            return True
+        cls._metrics["waits"] += 1
+        done, _ = await asyncio.wait({task}, timeout=cls._wait_sec)
+        if not done:
+            cls._metrics["wait_timeouts"] += 1
+            ctx.log.warning(f"[WS]        -- Step summary for {sid} still pending after {cls._wait_sec}s, continuing with current data")
+            return False
+        return True
+
+    @classmethod
+    async def shutdown(cls):
+        """종료 시 진행 중인 요약 취소 (필드에는 폴백 값이 이미 저장되어 있음)"""
+        tasks = list(cls._running)
+        cls._jobs.clear()
+        cls._summarizing.clear()
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,386 @@
+"""
+로컬 턴 분류기
+질문 감지(question)와 단계 진행 판단(step_advance)은 매 턴 Gemini 왕복이 드는 이진 분류이므로,
+운영 중 기록한 입력/LLM 판단 로그로 문자 n-gram 로지스틱 회귀(NumPy)를 오프라인 학습해 먼저 사용합니다.
+확신도(max(p, 1-p))가 min_confidence 미만일 때만 기존 LLM 호출로 넘어갑니다.
+모델은 model_dir/<version>/ 에 기록되고 CURRENT 파일 교체로 활성화됩니다 (RAG 인덱스와 같은 방식).
+
+판단 로그에는 기본적으로 사용자 원문 대신 해시된 n-gram 특징만 남기며 (raw_text=True일 때만 원문 기록),
+기록은 백그라운드 스레드에서 처리하여 이벤트 루프를 막지 않습니다.
+
+오프라인 학습:
+    python -m src.service.ai.turn_classifier --log logs/turn_decisions.jsonl --model-dir turn_classifier
+"""
+import os
+import re
+import time
+import zlib
+import queue
+import shutil
+import hashlib
+import argparse
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import orjson
+
+TASKS = ("question", "step_advance")
+
+CURRENT_FILE = "CURRENT"
+WEIGHTS_FILE = "weights.npz"
+META_FILE = "meta.json"
+MODEL_VERSION = 1
+KEEP_VERSIONS = 3
+
+DEFAULT_DIM = 1 << 16
+NGRAM_RANGE = (1, 3)
+
+_SPACE_RE = re.compile(r"\s+")
+
+
+def hashed_ngrams(text: str, step: Optional[str] = None, dim: int = DEFAULT_DIM) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    해시된 문자 n-gram (인덱스, 빈도)
+    문장부호('?' 등)도 질문 신호이므로 제거하지 않고, 단계는 별도 토큰 하나로 추가합니다.
+    해시는 프로세스마다 달라지는 hash() 대신 crc32를 사용합니다.
+    """
+    compact = f" {_SPACE_RE.sub(' ', text.lower()).strip()} "
+    grams = [
+        compact[i:i + n]
+        for n in range(NGRAM_RANGE[0], NGRAM_RANGE[1] + 1)
+        for i in range(len(compact) - n + 1)
+    ]
+    if step:
+        grams.append(f"\x00step={step}")
+    if not grams:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    ids = np.fromiter((zlib.crc32(gram.encode("utf-8")) % dim for gram in grams), dtype=np.int64, count=len(grams))
+    return np.unique(ids, return_counts=True)
+
+
+def _normalize(ids: np.ndarray, counts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    values = counts.astype(np.float32)
+    if len(values):
+        values /= np.linalg.norm(values)
+    return ids, values
+
+
+def featurize(text: str, step: Optional[str] = None, dim: int = DEFAULT_DIM) -> Tuple[np.ndarray, np.ndarray]:
+    """해시된 문자 n-gram 특징 (인덱스, L2 정규화된 값)"""
+    return _normalize(*hashed_ngrams(text, step, dim))
+
+
+def sample_features(sample: Dict[str, Any], dim: int = DEFAULT_DIM) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    판단 로그 표본의 특징 (원문이 있으면 원문에서, 없으면 기록된 해시 특징에서)
+    해시 특징은 기록 시점의 dim으로 저장되므로, 2의 거듭제곱 dim끼리는 나머지 연산으로 더 작은 dim에 접을 수 있습니다.
+    """
+    if sample.get("text"):
+        return featurize(sample["text"], sample.get("step"), dim)
+    features = sample["features"]
+    if dim > features["dim"] or features["dim"] % dim:
+        raise ValueError(f"logged features (dim={features['dim']}) cannot be folded to dim={dim}")
+    ids = np.asarray(features["ids"], dtype=np.int64) % dim
+    counts = np.asarray(features["counts"], dtype=np.int64)
+    folded = np.unique(ids)
+    return _normalize(folded, np.bincount(np.searchsorted(folded, ids), weights=counts, minlength=len(folded)))
+
+
+def _sigmoid(z: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-np.clip(z, -30.0, 30.0)))
+
+
+def _stack(samples: List[Dict[str, Any]], dim: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray, int]:
+    """샘플 목록을 (행, 열, 값) COO 배열로 변환"""
+    rows, cols, vals = [], [], []
+    for row, sample in enumerate(samples):
+        ids, values = sample_features(sample, dim)
+        rows.append(np.full(len(ids), row, dtype=np.int64))
+        cols.append(ids)
+        vals.append(values)
+    if not rows:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32), 0
+    return np.concatenate(rows), np.concatenate(cols), np.concatenate(vals), len(samples)
+
+
+def train_logreg(samples: List[Dict[str, Any]], dim: int = DEFAULT_DIM, epochs: int = 300, lr: float = 0.5, l2: float = 1e-4) -> Tuple[np.ndarray, float]:
+    """
+    전체 배치 AdaGrad 로지스틱 회귀
+    LLM 판단은 한쪽 레이블에 치우치므로 클래스 빈도의 역수로 가중합니다.
+    """
+    rows, cols, vals, n = _stack(samples, dim)
+    labels = np.array([1.0 if sample["label"] else 0.0 for sample in samples], dtype=np.float64)
+    positives = labels.sum()
+    sample_weight = np.where(labels > 0, n / (2 * max(positives, 1.0)), n / (2 * max(n - positives, 1.0)))
+
+    weights = np.zeros(dim, dtype=np.float64)
+    bias = 0.0
+    grad_sq = np.full(dim, 1e-8)
+    bias_sq = 1e-8
+    for _ in range(epochs):
+        logits = np.bincount(rows, weights=weights[cols] * vals, minlength=n) + bias
+        error = (_sigmoid(logits) - labels) * sample_weight / n
+        grad = np.bincount(cols, weights=vals * error[rows], minlength=dim) + l2 * weights
+        grad_bias = error.sum()
+        grad_sq += grad * grad
+        bias_sq += grad_bias * grad_bias
+        weights -= lr * grad / np.sqrt(grad_sq)
+        bias -= lr * grad_bias / np.sqrt(bias_sq)
+    return weights.astype(np.float32), float(bias)
+
+
+def predict_many(weights: np.ndarray, bias: float, samples: List[Dict[str, Any]]) -> np.ndarray:
+    rows, cols, vals, n = _stack(samples, len(weights))
+    return _sigmoid(np.bincount(rows, weights=weights[cols] * vals, minlength=n) + bias)
+
+
+def agreement_report(probs: np.ndarray, labels: np.ndarray, min_confidence: float) -> Dict[str, Any]:
+    """전체 일치율과, 확신도 임계값 이상인 표본의 비율(coverage) 및 그 안에서의 일치율"""
+    predicted = probs >= 0.5
+    confident = np.maximum(probs, 1.0 - probs) >= min_confidence
+    covered = int(confident.sum())
+    return {
+        "samples": int(len(labels)),
+        "agreement": round(float((predicted == labels).mean()), 4) if len(labels) else None,
+        "coverage": round(covered / len(labels), 4) if len(labels) else None,
+        "confident_agreement": round(float((predicted[confident] == labels[confident]).mean()), 4) if covered else None,
+    }
+
+
+class TurnDecisionLog:
+    """
+    LLM이 내린 판단을 학습용 JSONL로 기록 (한 줄 = 한 판단)
+    record()는 대기열에 넣기만 하고, 특징 계산과 파일 기록은 백그라운드 스레드가 처리합니다.
+    기본적으로 원문 대신 해시된 n-gram 빈도(features)만 기록하며, raw_text=True일 때만 원문(text)을 함께 남깁니다.
+    """
+
+    def __init__(self, path: str, raw_text: bool = False, max_queue: int = 10_000):
+        self.path = path
+        self.raw_text = raw_text
+        self.dropped = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue(maxsize=max_queue)
+        self._writer = threading.Thread(target=self._write_loop, name="turn-decision-log", daemon=True)
+        self._writer.start()
+
+    def record(self, task: str, text: str, step: Optional[str], label: bool, llm_ms: float, prob: Optional[float] = None, model_version: Optional[str] = None):
+        entry = {
+            "ts": time.time(),
+            "task": task,
+            "step": step,
+            "text": text,
+            "label": bool(label),
+            "llm_ms": round(llm_ms, 1),
+            "prob": None if prob is None else round(prob, 4),
+            "model_version": model_version,
+        }
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            # 기록이 밀리면 학습 표본 일부를 버리고 요청 처리는 막지 않음
+            self.dropped += 1
+
+    def _encode(self, entry: Dict[str, Any]) -> bytes:
+        if not self.raw_text:
+            ids, counts = hashed_ngrams(entry.pop("text"), entry["step"])
+            entry["features"] = {"dim": DEFAULT_DIM, "ids": ids.tolist(), "counts": counts.tolist()}
+        return orjson.dumps(entry) + b"\n"
+
+    def _write_loop(self):
+        with open(self.path, "ab") as f:
+            stopped = False
+            while not stopped:
+                entries = [self._queue.get()]
+                # 밀린 항목은 한 번에 기록
+                while True:
+                    try:
+                        entries.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                stopped = None in entries
+                lines = [self._encode(entry) for entry in entries if entry is not None]
+                if lines:
+                    f.write(b"".join(lines))
+                    f.flush()
+
+    def close(self, timeout: float = 5.0):
+        """남은 기록을 파일에 쓰고 스레드 종료 (서버 종료 시 호출)"""
+        self._queue.put(None)
+        self._writer.join(timeout)
+
+    @staticmethod
+    def read(path: str) -> List[Dict[str, Any]]:
+        """손상된 줄(동시 기록 중단 등)은 건너뜀"""
+        entries = []
+        with open(path, "rb") as f:
+            for line in f:
+                try:
+                    entry = orjson.loads(line)
+                except orjson.JSONDecodeError:
+                    continue
+                if entry.get("task") in TASKS and (entry.get("text") or entry.get("features")):
+                    entries.append(entry)
+        return entries
+
+
+class TurnClassifier:
+    """학습된 작업별 가중치로 확신도가 높은 경우에만 판단을 반환"""
+
+    def __init__(self, version: str, models: Dict[str, Tuple[np.ndarray, float]], meta: Dict[str, Any], min_confidence: float = 0.9):
+        self.version = version
+        self.models = models
+        self.meta = meta
+        self.min_confidence = min_confidence
+        self._metrics = {task: {"decided": 0, "deferred": 0} for task in models}
+
+    @classmethod
+    def load(cls, model_dir: str, min_confidence: float = 0.9) -> Optional["TurnClassifier"]:
+        """CURRENT가 가리키는 버전을 로드 (없거나 형식 버전이 다르면 None)"""
+        version = read_current_version(model_dir)
+        if not version:
+            return None
+        path = os.path.join(model_dir, version)
+        with open(os.path.join(path, META_FILE), "rb") as f:
+            meta = orjson.loads(f.read())
+        if meta.get("format") != MODEL_VERSION:
+            return None
+        models = {}
+        with np.load(os.path.join(path, WEIGHTS_FILE), allow_pickle=False) as data:
+            for task in meta["tasks"]:
+                models[task] = (data[f"{task}_weights"], float(data[f"{task}_bias"]))
+        return cls(version, models, meta, min_confidence)
+
+    def predict(self, task: str, text: str, step: Optional[str] = None) -> Optional[float]:
+        """작업의 양성 확률 (해당 작업 모델이 없으면 None)"""
+        model = self.models.get(task)
+        if model is None or not text.strip():
+            return None
+        weights, bias = model
+        ids, values = featurize(text, step, len(weights))
+        return float(_sigmoid(np.dot(weights[ids], values) + bias))
+
+    def predict_logged(self, task: str, sample: Dict[str, Any]) -> Optional[float]:
+        """판단 로그 표본(원문 또는 해시 특징)의 양성 확률 (평가용)"""
+        model = self.models.get(task)
+        if model is None:
+            return None
+        weights, bias = model
+        ids, values = sample_features(sample, len(weights))
+        return float(_sigmoid(np.dot(weights[ids], values) + bias))
+
+    def decide(self, task: str, text: str, step: Optional[str] = None) -> Tuple[Optional[bool], Optional[float]]:
+        """(판단, 확률) - 확신도가 min_confidence 미만이면 판단은 None (LLM으로 넘김)"""
+        prob = self.predict(task, text, step)
+        if prob is None:
+            return None, None
+        if max(prob, 1.0 - prob) < self.min_confidence:
+            self._metrics[task]["deferred"] += 1
+            return None, prob
+        self._metrics[task]["decided"] += 1
+        return prob >= 0.5, prob
+
+    def stats(self) -> Dict[str, Any]:
+        return {"version": self.version, "min_confidence": self.min_confidence, "tasks": self._metrics}
+
+
+def read_current_version(model_dir: str) -> Optional[str]:
+    current_path = os.path.join(model_dir, CURRENT_FILE)
+    if not os.path.exists(current_path):
+        return None
+    with open(current_path, "r", encoding="utf-8") as f:
+        return f.read().strip() or None
+
+
+def _version_stamp(version: str) -> int:
+    """버전 이름의 생성 시각 (이전 형식 YYYYmmddHHMMSS도 ns 이름보다 앞에 정렬됨)"""
+    try:
+        return int(version.split("-", 1)[0])
+    except ValueError:
+        return 0
+
+
+def write_model(model_dir: str, models: Dict[str, Tuple[np.ndarray, float]], meta: Dict[str, Any]) -> str:
+    """새 버전 디렉토리에 기록하고 CURRENT 교체 (기존 버전은 수정하지 않음)"""
+    digest = hashlib.sha256(b"".join(weights.tobytes() for weights, _ in models.values())).hexdigest()[:8]
+    # RAG 인덱스 버전과 같은 ns 단위 이름 (같은 초에 여러 번 학습하거나 시계가 되돌아가도 CURRENT보다 앞서지 않음)
+    current = read_current_version(model_dir)
+    stamp = max(time.time_ns(), _version_stamp(current) + 1 if current else 0)
+    version = f"{stamp:020d}-{digest}"
+    path = os.path.join(model_dir, version)
+    os.makedirs(path, exist_ok=True)
+
+    arrays = {}
+    for task, (weights, bias) in models.items():
+        arrays[f"{task}_weights"] = weights
+        arrays[f"{task}_bias"] = np.array(bias, dtype=np.float32)
+    with open(os.path.join(path, WEIGHTS_FILE), "wb") as f:
+        np.savez_compressed(f, **arrays)
+    with open(os.path.join(path, META_FILE), "wb") as f:
+        f.write(orjson.dumps({**meta, "format": MODEL_VERSION, "version": version, "tasks": list(models)}, option=orjson.OPT_INDENT_2))
+
+    tmp_path = os.path.join(model_dir, f"{CURRENT_FILE}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(tmp_path, os.path.join(model_dir, CURRENT_FILE))
+
+    versions = sorted(
+        (name for name in os.listdir(model_dir) if os.path.exists(os.path.join(model_dir, name, META_FILE))),
+        key=lambda name: (_version_stamp(name), name),
+    )
+    for name in versions[:-KEEP_VERSIONS]:
+        if name != version:
+            shutil.rmtree(os.path.join(model_dir, name), ignore_errors=True)
+    return version
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the local turn classifier from logged LLM decisions")
+    parser.add_argument("--log", default="logs/turn_decisions.jsonl")
+    parser.add_argument("--model-dir", default="turn_classifier")
+    parser.add_argument("--holdout", type=float, default=0.2, help="평가용으로 남길 최신 표본 비율")
+    parser.add_argument("--min-samples", type=int, default=200, help="작업별 최소 학습 표본 수")
+    parser.add_argument("--min-confidence", type=float, default=0.9, help="평가 리포트용 확신도 임계값")
+    parser.add_argument("--epochs", type=int, default=300)
+    parser.add_argument("--dim", type=int, default=DEFAULT_DIM)
+    args = parser.parse_args()
+
+    entries = TurnDecisionLog.read(args.log)
+    models, metrics = {}, {}
+    trained_until = 0.0
+    for task in TASKS:
+        samples = sorted((e for e in entries if e["task"] == task), key=lambda e: e["ts"])
+        if len(samples) < args.min_samples:
+            print(f"Skip {task}: {len(samples)} samples (< {args.min_samples})")
+            continue
+        # 시간순으로 나눠 최신 표본으로 평가 (운영 분포 변화 반영)
+        split = int(len(samples) * (1.0 - args.holdout))
+        train, holdout = samples[:split], samples[split:]
+        weights, bias = train_logreg(train, dim=args.dim, epochs=args.epochs)
+        labels = np.array([bool(e["label"]) for e in holdout])
+        metrics[task] = {
+            "train": len(train),
+            "trained_until": train[-1]["ts"],
+            **agreement_report(predict_many(weights, bias, holdout), labels, args.min_confidence),
+        }
+        models[task] = (weights, bias)
+        trained_until = max(trained_until, train[-1]["ts"])
+        print(f"{task}: {metrics[task]}")
+
+    if not models:
+        raise SystemExit("No task has enough samples; keep logging decisions and retry")
+
+    version = write_model(args.model_dir, models, {
+        "dim": args.dim,
+        "ngram_range": list(NGRAM_RANGE),
+        "trained_until": trained_until,
+        "holdout_min_confidence": args.min_confidence,
+        "holdout": metrics,
+    })
+    print(f"Turn classifier saved: {os.path.join(args.model_dir, version)}")
+
+
+if __name__ == "__main__":
+    main()
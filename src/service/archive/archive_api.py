@@ -1,9 +1,11 @@
 from fastapi import APIRouter, Request, HTTPException
 from typing import List, Dict, Any, Optional
+import re
 import orjson
 
 from src.service.ai.chat_state_manager import SessionStateCache
 from src.utils.redis_stream_utils import redis_stream_range
+from src.utils.contract_draft_utils import ContractDraftStore
 import src.common.common_codes as codes
 
 router = APIRouter(prefix="/v1/archive", tags=["Archive"])
@@ -60,6 +62,8 @@ async def get_session_archive(sid: str, request: Request):
             }
             
         session_state = state_manager.to_dict()
+        # 역할별 입력 전체 기록은 별도 로그에서 조회
+        session_state["role_inputs"] = await SessionStateCache.load_role_inputs(sid, ctx)
         
         # 2. 채팅 내역 조회 (Redis Stream)
         stream_key = f"session:chat:{sid}"
@@ -82,11 +86,15 @@ async def get_session_archive(sid: str, request: Request):
                 ctx.log.warning(f"[ARCHIVE] Failed to parse message {msg_id}: {parse_err}")
                 continue
                 
+        # 3. 최신 계약서 초안 (메시지에는 contract_draft_ref만 기록되며, 이전 버전은 /draft/{sha256}으로 조회)
+        contract_draft = await ContractDraftStore.get(ctx, sid)
+
         return {
             "state": codes.ResponseStatus.SUCCESS,
             "data": {
                 "state": session_state,
-                "chat_history": chat_history
+                "chat_history": chat_history,
+                "contract_draft": contract_draft
             }
         }
         
@@ -96,3 +104,33 @@ async def get_session_archive(sid: str, request: Request):
             "state": codes.ResponseStatus.SERVER_ERROR,
             "detail": str(e)
         }
+
+@router.get("/session/{sid}/draft/{sha256}", response_model=Dict[str, Any])
+async def get_session_draft(sid: str, sha256: str, request: Request):
+    """
+    채팅 메시지의 contract_draft_ref가 가리키는 계약서 초안 본문을 조회합니다.
+    해당 세션이 저장한 버전만 조회할 수 있습니다.
+    """
+    ctx = request.app.state.ctx
+    if not re.fullmatch(r"[0-9a-f]{64}", sha256):
+        return {
+            "state": codes.ResponseStatus.BAD_REQUEST,
+            "detail": "Invalid draft hash"
+        }
+    try:
+        contract_draft = await ContractDraftStore.get_version(ctx, sid, sha256)
+        if contract_draft is None:
+            return {
+                "state": codes.ResponseStatus.NOT_FOUND,
+                "detail": f"Draft {sha256} not found for session {sid}"
+            }
+        return {
+            "state": codes.ResponseStatus.SUCCESS,
+            "data": {"sha256": sha256, "contract_draft": contract_draft}
+        }
+    except Exception as e:
+        ctx.log.error(f"[ARCHIVE] Failed to get draft {sha256} of session {sid}: {e}")
+        return {
+            "state": codes.ResponseStatus.SERVER_ERROR,
+            "detail": str(e)
+        }
@@ -3,6 +3,7 @@
 from fastapi import APIRouter, Request, HTTPException
 from pydantic import BaseModel
 from src.common.id_generator import generate_sid
+from src.service.ai.session_context import SessionContext
 import src.utils.redis_basic_utils as ru
 import orjson
 from typing import Optional
@@ -22,6 +23,15 @@ class SessionConnectRequest(BaseModel):
 class SessionConnectResponse(BaseModel):
     sid: str
 
+class SessionInfoUpdateRequest(BaseModel):
+    client_name: Optional[str] = None
+    provider_name: Optional[str] = None
+    contract_date: Optional[str] = None
+    client_business_number: Optional[str] = None
+    client_contact: Optional[str] = None
+    provider_business_number: Optional[str] = None
+    provider_contact: Optional[str] = None
+
 # 세션 연결 및 ID 발급
 @router.post("/connect", response_model=SessionConnectResponse)
 async def connect_session(request: Request, body: SessionConnectRequest):
@@ -67,3 +77,20 @@ async def connect_session(request: Request, body: SessionConnectRequest):
         ctx.sessions[sid] = session_info
 
     return {"sid": sid}
+
+# 세션 정보 갱신
+@router.patch("/{sid}/info")
+async def update_session_info(sid: str, request: Request, body: SessionInfoUpdateRequest):
+    """
+    참여자 정보 일부를 갱신하고, 진행 중인 세션의 컨텍스트를 모든 워커에서 다시 읽게 합니다.
+    (채팅 턴은 접속 시 로드한 세션 컨텍스트를 사용하므로 session:info는 이 API로만 변경)
+    """
+    ctx = request.app.state.ctx
+    fields = body.model_dump(exclude_none=True)
+    if not fields:
+        raise HTTPException(status_code=400, detail="변경할 필드가 없습니다.")
+
+    info = await SessionContext.update(ctx, sid, fields)
+    if info is None:
+        raise HTTPException(status_code=404, detail="세션 정보를 찾을 수 없습니다.")
+    return {"sid": sid, "info": info}
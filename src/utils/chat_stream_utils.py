@@ -1,7 +1,160 @@
 # utils/chat_stream_utils.py
+import bisect
 import orjson
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
 from utils.redis_stream_utils import redis_stream_add
 
+
+def _stream_id_key(message_id: str) -> Tuple[int, int]:
+    """Redis Stream ID("ms-seq")의 정렬 키"""
+    ms, _, seq = message_id.partition("-")
+    return int(ms), int(seq or 0)
+
+
+def format_history_entry(participant: str, body: Any) -> Tuple[Optional[str], Optional[str]]:
+    """
+    스트림 메시지 한 건을 (대화 이력 라인, contract_draft)로 변환
+    라벨 형식: "client(의뢰인(갑)): 내용", "user(client/의뢰인(갑)): 내용"(하위 호환), "assistant: 내용"
+    """
+    if not isinstance(body, dict):
+        return None, None
+    bd = body.get("bd") if isinstance(body.get("bd"), dict) else {}
+    text = bd.get("text", "")
+    draft = bd.get("contract_draft") or None
+    if not text:
+        return None, draft
+
+    if participant in ["client", "provider"]:
+        # 새로운 방식: participant가 직접 역할을 나타냄
+        role_korean = "의뢰인(갑)" if participant == "client" else "용역자(을)"
+        label = f"{participant}({role_korean})"
+    elif participant == "user":
+        # 하위 호환성: 기존 "user" 방식도 지원
+        role_from_msg = body.get("hd", {}).get("role", "user") if isinstance(body.get("hd"), dict) else "user"
+        role_korean = "의뢰인(갑)" if role_from_msg == "client" else "용역자(을)" if role_from_msg == "provider" else ""
+        label = f"user({role_from_msg}/{role_korean})" if role_korean else f"user({role_from_msg})"
+    elif participant == "assistant":
+        label = "assistant"
+    else:
+        label = participant
+    return f"{label}: {text}", draft
+
+
+class _HistoryWindow:
+    """세션 하나의 최근 이력 (스트림 ID 순 정렬)"""
+
+    __slots__ = ("entries", "ids", "synced_id", "draft", "draft_key")
+
+    def __init__(self):
+        self.entries: List[Tuple[Tuple[int, int], str]] = []   # (ID 키, 포맷된 라인)
+        self.ids = set()                # entries에 들어 있거나 이미 처리한 ID 키
+        self.synced_id: Optional[str] = None  # Redis에서 마지막으로 확인한 최신 ID
+        self.draft: Optional[str] = None
+        self.draft_key: Tuple[int, int] = (0, 0)
+
+    def add(self, message_id: str, line: Optional[str], draft: Optional[str], window: int):
+        key = _stream_id_key(message_id)
+        if key in self.ids:
+            return
+        self.ids.add(key)
+        if draft and key > self.draft_key:
+            self.draft, self.draft_key = draft, key
+        if line is not None:
+            bisect.insort(self.entries, (key, line))
+            if len(self.entries) > window:
+                del self.entries[:len(self.entries) - window]
+        # 창 밖으로 밀려난 ID는 다시 들어올 일이 없으므로 정리
+        if len(self.ids) > window * 4:
+            oldest = self.entries[0][0] if self.entries else key
+            self.ids = {k for k in self.ids if k >= oldest}
+
+
+class ChatHistoryCache:
+    """
+    세션별 최근 대화 이력 링 버퍼 (포맷된 라인 + 메시지에 실린 최신 contract_draft)
+    초안은 ContractDraftStore의 초안 키에 저장되므로, 여기서 찾는 초안은 초안 키 도입 전 메시지의 호환용입니다.
+    store_chat_message가 기록한 메시지는 다시 파싱하지 않고 바로 반영하고,
+    턴 시작 시에는 마지막 동기화 이후의 스트림 항목만 XREVRANGE로 확인해 다른 워커가 기록한 메시지를 채웁니다.
+    버퍼가 없을 때(첫 턴/제거 후)만 최근 window개를 XREVRANGE로 다시 읽습니다.
+    """
+
+    _windows: "OrderedDict[str, _HistoryWindow]" = OrderedDict()
+    _window = 20
+    _max_sessions = 1000
+
+    _metrics = {
+        "hits": 0,
+        "misses": 0,
+        "appended": 0,          # store_chat_message에서 바로 반영한 메시지
+        "parsed": 0,            # Redis에서 읽어 파싱한 메시지 (복원 + 다른 워커가 기록한 메시지)
+        "evictions": 0,
+    }
+
+    @classmethod
+    def configure(cls, window: int = 20, max_sessions: int = 1000):
+        cls._window = max(1, window)
+        cls._max_sessions = max(1, max_sessions)
+
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        return {"sessions": len(cls._windows), "window": cls._window, "max_sessions": cls._max_sessions, **cls._metrics}
+
+    @classmethod
+    def append(cls, sid: str, message_id: str, participant: str, msg: dict):
+        """기록 직후 반영 (버퍼가 없으면 다음 조회 때 복원되므로 무시)"""
+        window = cls._windows.get(sid)
+        if window is None or not message_id:
+            return
+        line, draft = format_history_entry(participant, msg)
+        window.add(message_id, line, draft, cls._window)
+        cls._metrics["appended"] += 1
+
+    @classmethod
+    def discard(cls, sid: str):
+        """세션의 마지막 소켓이 끊겼을 때 호출 (WebSocketHandler 세션 종료 리스너)"""
+        cls._windows.pop(sid, None)
+
+    @classmethod
+    async def get(cls, ctx, sid: str, stream_key: Optional[str] = None) -> Tuple[List[str], Optional[str]]:
+        """(시간순 대화 이력 라인, 최신 contract_draft)"""
+        key = stream_key or f"session:chat:{sid}"
+        client = ctx.redis_handler.get_client()
+        window = cls._windows.get(sid)
+        if window is None:
+            cls._metrics["misses"] += 1
+            window = _HistoryWindow()
+            messages = await client.xrevrange(key, count=cls._window)
+        else:
+            cls._metrics["hits"] += 1
+            cls._windows.move_to_end(sid)
+            min_id = f"({window.synced_id}" if window.synced_id else "-"
+            messages = await client.xrevrange(key, max="+", min=min_id, count=cls._window)
+
+        for message_id, fields in messages:
+            if not isinstance(fields, dict) or _stream_id_key(message_id) in window.ids:
+                continue
+            body = fields.get("body", "{}")
+            if isinstance(body, str):
+                try:
+                    body = orjson.loads(body)
+                except Exception as parse_err:
+                    ctx.log.warning(f"[WS]        -- Failed to parse body JSON: {parse_err}, body_json={body}")
+                    continue
+            line, draft = format_history_entry(fields.get("participant", "user"), body)
+            window.add(message_id, line, draft, cls._window)
+            cls._metrics["parsed"] += 1
+        if messages:
+            window.synced_id = max((message_id for message_id, _ in messages), key=_stream_id_key)
+
+        if sid not in cls._windows:
+            cls._windows[sid] = window
+            while len(cls._windows) > cls._max_sessions:
+                cls._windows.popitem(last=False)
+                cls._metrics["evictions"] += 1
+        return [line for _, line in window.entries], window.draft
+
+
 async def store_chat_message(ctx, sid: str, participant: str, msg: dict, stream_key: str | None = None):
     """
     세션별 Redis Stream에 채팅 메시지를 저장합니다.
@@ -37,6 +190,8 @@ async def store_chat_message(ctx, sid: str, participant: str, msg: dict, stream_
             "body": body_json
         }
         message_id = await redis_stream_add(ctx, key, payload)
+        if message_id and stream_key is None:
+            ChatHistoryCache.append(sid, message_id, participant, msg)
         ctx.log.debug("WS", f"++ Chat saved to stream {key} > {message_id}")
         return message_id
     except Exception as e:
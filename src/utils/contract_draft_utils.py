@@ -0,0 +1,182 @@
+# utils/contract_draft_utils.py
+"""
+세션별 최신 계약서 초안 포인터
+session:contract_draft:{sid} 해시에는 최신 초안의 sha256과 버전만 두고, 본문은 세션별 blob 저장소(blob:contract_draft:{sid}:{sha256})에
+zstd로 압축해 내용 주소로 한 번만 저장합니다. 채팅 스트림 메시지에는 {"version", "sha256"} 참조만 기록합니다.
+새 초안은 직전 초안과의 차분으로 압축되므로, 몇 줄씩 바뀌는 초안이 버전마다 쌓여도 Redis 사용량이 작게 유지됩니다.
+내용이 같으면(sha256 동일) 버전을 올리지 않으므로 같은 초안을 매 턴 다시 저장해도 기록이 늘지 않습니다.
+
+세션이 저장한 sha256은 session:contract_draft_versions:{sid} 집합에 기록하며, 다른 세션의 초안은 조회할 수 없습니다.
+만료(ttl_sec)를 두면 저장할 때마다 포인터/버전 집합/세션의 모든 blob 만료를 함께 갱신하므로,
+차분 체인의 부모(같은 세션의 이전 버전)가 자식보다 먼저 만료되지 않습니다.
+"""
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from src.utils.redis_blob_utils import blob_sha256, redis_blob_key, redis_blob_put, redis_blob_get, redis_blob_get_many, redis_blob_stats
+
+DRAFT_PREFIX = "session:contract_draft:"
+DRAFT_VERSIONS_PREFIX = "session:contract_draft_versions:"
+DRAFT_NAMESPACE = "contract_draft"
+
+# KEYS[1] = 초안 포인터 해시, KEYS[2] = 세션 초안 sha256 집합
+# ARGV = [sha256, updated_at, ttl_sec(0이면 만료 없음), 세션 blob 키 접두사]
+# 반환: {버전, 변경 여부}
+# blob 키는 버전 집합에서 만들어 만료만 갱신 (단일 Redis 기준, 클러스터 슬롯은 고려하지 않음)
+_SAVE_DRAFT_SCRIPT = """
+local version
+local changed = 0
+if redis.call('HGET', KEYS[1], 'sha256') == ARGV[1] then
+    version = tonumber(redis.call('HGET', KEYS[1], 'version'))
+else
+    version = redis.call('HINCRBY', KEYS[1], 'version', 1)
+    redis.call('HSET', KEYS[1], 'sha256', ARGV[1], 'updated_at', ARGV[2])
+    changed = 1
+end
+redis.call('SADD', KEYS[2], ARGV[1])
+local ttl = tonumber(ARGV[3])
+if ttl > 0 then
+    redis.call('EXPIRE', KEYS[1], ttl)
+    redis.call('EXPIRE', KEYS[2], ttl)
+    for _, sha in ipairs(redis.call('SMEMBERS', KEYS[2])) do
+        redis.call('EXPIRE', ARGV[4] .. sha, ttl)
+    end
+end
+return {version, changed}
+"""
+
+
+class ContractDraftStore:
+    """
+    최신 초안 조회/저장
+    워커 메모리에는 세션별 (버전, sha256, 만료 갱신 시각)만 두고, 본문은 blob 저장소의 복원 캐시를 사용합니다.
+    """
+
+    _cache: "OrderedDict[str, Tuple[int, str, Optional[float]]]" = OrderedDict()
+    _max_sessions = 1000
+    _ttl_sec = 0                        # 마지막 저장 이후 초안 보관 기간 (0이면 만료 없음)
+    _scripts: Dict[int, Any] = {}       # id(redis client) -> 등록된 스크립트
+
+    _metrics = {
+        "saved": 0,             # 새 버전으로 기록
+        "unchanged": 0,         # 내용이 같아 버전 유지
+    }
+
+    @classmethod
+    def configure(cls, max_sessions: int = 1000, ttl_sec: int = 0):
+        cls._max_sessions = max(1, max_sessions)
+        cls._ttl_sec = max(0, int(ttl_sec))
+
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        return {
+            "sessions": len(cls._cache), "max_sessions": cls._max_sessions, "ttl_sec": cls._ttl_sec,
+            **cls._metrics, "blobs": redis_blob_stats(),
+        }
+
+    @staticmethod
+    def namespace(sid: str) -> str:
+        """세션별 blob 네임스페이스 (차분 체인이 세션 안에서만 이어짐)"""
+        return f"{DRAFT_NAMESPACE}:{sid}"
+
+    @staticmethod
+    def ref(version: int, sha256: str) -> Dict[str, Any]:
+        """채팅 메시지에 기록하는 초안 참조"""
+        return {"version": version, "sha256": sha256}
+
+    @classmethod
+    def discard(cls, sid: str):
+        """세션의 마지막 소켓이 끊겼을 때 호출 (WebSocketHandler 세션 종료 리스너)"""
+        cls._cache.pop(sid, None)
+
+    @classmethod
+    def _remember(cls, sid: str, version: int, sha256: str, refreshed_at: Optional[float] = None):
+        cls._cache[sid] = (version, sha256, refreshed_at)
+        cls._cache.move_to_end(sid)
+        while len(cls._cache) > cls._max_sessions:
+            cls._cache.popitem(last=False)
+
+    @classmethod
+    def _alive(cls, cached: Optional[Tuple[int, str, Optional[float]]]) -> bool:
+        """
+        캐시된 최신 초안 blob이 Redis에 남아 있다고 보장되는지 (차분 부모로 쓰거나 다시 기록하지 않아도 되는지)
+        만료가 있으면 이 워커가 만료를 갱신한 시각이 보관 기간의 절반 이내일 때만 보장합니다.
+        """
+        if cached is None:
+            return False
+        if not cls._ttl_sec:
+            return True
+        return cached[2] is not None and time.time() - cached[2] < cls._ttl_sec / 2
+
+    @classmethod
+    def _save_script(cls, client):
+        script = cls._scripts.get(id(client))
+        if script is None:
+            cls._scripts = {id(client): client.register_script(_SAVE_DRAFT_SCRIPT)}
+            script = cls._scripts[id(client)]
+        return script
+
+    @classmethod
+    async def save(cls, ctx, sid: str, draft: str) -> Optional[Dict[str, Any]]:
+        """초안 저장 후 참조 반환 (실패 시 None → 호출 측은 메시지에 전문을 그대로 기록)"""
+        # 만료가 보장되지 않는 버전은 차분 부모로 쓰지 않음 (부모가 사라지면 자식 체인 전체를 복원할 수 없음)
+        cached = cls._cache.get(sid)
+        alive = cls._alive(cached)
+        namespace = cls.namespace(sid)
+        try:
+            sha256 = blob_sha256(draft)
+            if not (alive and cached[1] == sha256):
+                sha256 = await redis_blob_put(
+                    ctx, namespace, draft, parent_sha=cached[1] if alive else None, ttl_sec=cls._ttl_sec or None
+                )
+            if sha256 is None:
+                return None
+            client = ctx.redis_handler.get_client()
+            now = time.time()
+            version, changed = await cls._save_script(client)(
+                keys=[f"{DRAFT_PREFIX}{sid}", f"{DRAFT_VERSIONS_PREFIX}{sid}"],
+                args=[sha256, now, cls._ttl_sec, redis_blob_key(namespace, "")],
+            )
+        except Exception as e:
+            ctx.log.warning(f"[WS]        -- Failed to save contract draft for {sid}: {e}")
+            return None
+        version = int(version)
+        cls._metrics["saved" if changed else "unchanged"] += 1
+        cls._remember(sid, version, sha256, now)
+        return cls.ref(version, sha256)
+
+    @classmethod
+    async def get(cls, ctx, sid: str) -> Optional[Dict[str, Any]]:
+        """최신 초안 {"version", "sha256", "draft"} (저장된 초안이 없으면 None)"""
+        key = f"{DRAFT_PREFIX}{sid}"
+        client = ctx.redis_handler.get_client()
+        version, sha256 = await client.hmget(key, ["version", "sha256"])
+        if version is None:
+            cls._cache.pop(sid, None)
+            return None
+
+        draft = await redis_blob_get(ctx, cls.namespace(sid), sha256) if sha256 else None
+        if draft is None:
+            return None
+        # 조회만으로는 만료를 갱신하지 않으므로, 이 워커의 다음 저장은 전체 압축본으로 시작
+        cached = cls._cache.get(sid)
+        refreshed_at = cached[2] if cached and cached[1] == sha256 else None
+        cls._remember(sid, int(version), sha256, refreshed_at)
+        return {"version": int(version), "sha256": sha256, "draft": draft}
+
+    @classmethod
+    async def get_version(cls, ctx, sid: str, sha256: str) -> Optional[str]:
+        """세션이 저장한 초안 버전의 본문 (이 세션의 버전 집합에 없는 sha256이면 None)"""
+        client = ctx.redis_handler.get_client()
+        if not await client.sismember(f"{DRAFT_VERSIONS_PREFIX}{sid}", sha256):
+            return None
+        return await redis_blob_get(ctx, cls.namespace(sid), sha256)
+
+    @classmethod
+    async def resolve(cls, ctx, sid: str, refs: Iterable[Dict[str, Any]]) -> Dict[str, str]:
+        """세션 메시지의 초안 참조들을 본문으로 복원 (sha256 -> 본문, 한 번의 MGET)"""
+        shas = [ref["sha256"] for ref in refs if isinstance(ref, dict) and ref.get("sha256")]
+        if not shas:
+            return {}
+        return await redis_blob_get_many(ctx, cls.namespace(sid), shas)
@@ -69,16 +69,42 @@ async def redis_search_by_prefix(ctx, prefix):
         return {}
 
 
+# 주어진 prefix로 시작하는 키 목록 (SCAN 기반, 값은 조회하지 않음)
+# - return: 키 리스트
+async def redis_scan_keys(ctx, prefix):
+    try:
+        client = ctx.redis_handler.client
+        keys = [k async for k in client.scan_iter(match=f"{prefix}*")]
+        ctx.log.debug("REDIS", f"SCAN prefix: {prefix}, found: {len(keys)} keys")
+        return keys
+    except RedisError as e:
+        ctx.log.error("REDIS", f"-- SCAN error: {prefix}, {str(e)}")
+        return []
+
+
+# 키의 자료형 조회
+# - return: "string" | "hash" | "list" | ... | "none"
+async def redis_type(ctx, key):
+    try:
+        client = ctx.redis_handler.client
+        key_type = await client.type(key)
+        ctx.log.debug("REDIS", f"== TYPE {key} > {key_type}")
+        return key_type
+    except RedisError as e:
+        ctx.log.error("REDIS", f"-- TYPE error: {key}, {str(e)}")
+        return "none"
+
+
 # 주어진 키 삭제
 # - return: 삭제된 키가 있으면 True, 없으면 False
-async def redis_delete(ctx, key):
+async def redis_delete(ctx, *keys):
     try:
         client = ctx.redis_handler.client
-        result = await client.delete(key)
-        ctx.log.debug("REDIS", f"-- DELETE {key} > {result}")
+        result = await client.delete(*keys)
+        ctx.log.debug("REDIS", f"-- DELETE {keys} > {result}")
         return result > 0
     except RedisError as e:
-        ctx.log.error("REDIS", f"-- DELETE error: {key}, {str(e)}")
+        ctx.log.error("REDIS", f"-- DELETE error: {keys}, {str(e)}")
         return False
 
 
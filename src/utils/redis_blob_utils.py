@@ -0,0 +1,183 @@
+# utils/redis_blob_utils.py
+"""
+내용 주소 지정(content-addressed) blob 저장소
+blob:{namespace}:{sha256} 키에 zstd로 압축한 본문을 한 번만 저장합니다 (같은 내용은 SET NX로 다시 기록하지 않음).
+조금씩 수정되며 누적되는 본문(계약서 초안)은 직전 버전을 zstd 원문 사전으로 써서 차분만 압축하고,
+복원 체인이 길어지지 않도록 MAX_DELTA_DEPTH 단계마다 전체 압축본을 저장합니다.
+값이 바이너리이므로 decode_responses=False 클라이언트(RedisHandler.get_binary_client)를 사용합니다.
+차분 blob은 부모가 없으면 복원할 수 없으므로, 만료(ttl_sec)를 쓰는 경우 호출 측이 같은 체인의 blob을 함께 갱신해야 합니다.
+
+blob 형식: MAGIC(4) + depth(1) + [부모 sha256(32, depth > 0일 때)] + zstd 프레임
+"""
+import hashlib
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+
+import zstandard as zstd
+from redis.exceptions import RedisError
+
+BLOB_PREFIX = "blob:"
+MAGIC = b"DQB1"
+MAX_DELTA_DEPTH = 8
+ZSTD_LEVEL = 3
+
+_CACHE_MAX = 256
+_cache: "OrderedDict[Tuple[str, str], Tuple[str, int]]" = OrderedDict()   # (namespace, sha) -> (본문, depth)
+
+_metrics = {
+    "put": 0,               # 새로 기록한 blob
+    "put_bytes": 0,         # 기록한 압축 크기 합
+    "put_raw_bytes": 0,     # 기록한 원문 크기 합
+    "delta": 0,             # 직전 버전 차분으로 기록한 blob
+    "cache_hits": 0,
+    "fetched": 0,           # Redis에서 읽어 복원한 blob
+    "corrupt": 0,           # 해시 불일치/형식 오류
+}
+
+
+def blob_sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def encode_blob(text: str, parent: Optional[Tuple[str, str, int]] = None) -> Tuple[bytes, int]:
+    """
+    본문을 blob으로 압축 (parent = (sha256, 본문, depth)이면 부모를 사전으로 한 차분)
+    반환: (blob, depth)
+    """
+    data = text.encode("utf-8")
+    if parent is not None and parent[2] < MAX_DELTA_DEPTH:
+        parent_sha, parent_text, parent_depth = parent
+        dictionary = zstd.ZstdCompressionDict(parent_text.encode("utf-8"), dict_type=zstd.DICT_TYPE_RAWCONTENT)
+        frame = zstd.ZstdCompressor(level=ZSTD_LEVEL, dict_data=dictionary).compress(data)
+        depth = parent_depth + 1
+        return MAGIC + bytes([depth]) + bytes.fromhex(parent_sha) + frame, depth
+    return MAGIC + b"\x00" + zstd.ZstdCompressor(level=ZSTD_LEVEL).compress(data), 0
+
+
+def parse_blob(payload: bytes) -> Tuple[int, Optional[str], bytes]:
+    """(depth, 부모 sha256, zstd 프레임)"""
+    if payload[:4] != MAGIC:
+        raise ValueError("unknown blob format")
+    depth = payload[4]
+    if depth == 0:
+        return 0, None, payload[5:]
+    return depth, payload[5:37].hex(), payload[37:]
+
+
+def decode_blob(frame: bytes, parent_text: Optional[str] = None) -> str:
+    if parent_text is None:
+        return zstd.ZstdDecompressor().decompress(frame).decode("utf-8")
+    dictionary = zstd.ZstdCompressionDict(parent_text.encode("utf-8"), dict_type=zstd.DICT_TYPE_RAWCONTENT)
+    return zstd.ZstdDecompressor(dict_data=dictionary).decompress(frame).decode("utf-8")
+
+
+def redis_blob_stats() -> Dict[str, int]:
+    return {"cached": len(_cache), **_metrics}
+
+
+def redis_blob_key(namespace: str, sha: str) -> str:
+    return f"{BLOB_PREFIX}{namespace}:{sha}"
+
+
+def _remember(namespace: str, sha: str, text: str, depth: int):
+    _cache[(namespace, sha)] = (text, depth)
+    _cache.move_to_end((namespace, sha))
+    while len(_cache) > _CACHE_MAX:
+        _cache.popitem(last=False)
+
+
+async def _resolve(ctx, namespace: str, sha: str, payloads: Optional[Dict[str, bytes]] = None) -> Optional[Tuple[str, int]]:
+    """blob 복원 (부모 체인은 캐시 → 미리 읽은 payloads → Redis 순으로 조회)"""
+    cached = _cache.get((namespace, sha))
+    if cached is not None:
+        _metrics["cache_hits"] += 1
+        _cache.move_to_end((namespace, sha))
+        return cached
+
+    payload = payloads.get(sha) if payloads else None
+    if payload is None:
+        payload = await ctx.redis_handler.get_binary_client().get(redis_blob_key(namespace, sha))
+    if payload is None:
+        return None
+
+    try:
+        depth, parent_sha, frame = parse_blob(payload)
+        parent_text = None
+        if parent_sha is not None:
+            parent = await _resolve(ctx, namespace, parent_sha, payloads)
+            if parent is None:
+                raise ValueError(f"missing parent blob {parent_sha}")
+            parent_text = parent[0]
+        text = decode_blob(frame, parent_text)
+        if blob_sha256(text) != sha:
+            raise ValueError("content hash mismatch")
+    except Exception as e:
+        _metrics["corrupt"] += 1
+        ctx.log.error("REDIS", f"-- Blob decode error: {redis_blob_key(namespace, sha)}, {e}")
+        return None
+
+    _metrics["fetched"] += 1
+    _remember(namespace, sha, text, depth)
+    return text, depth
+
+
+async def redis_blob_put(ctx, namespace: str, text: str, parent_sha: Optional[str] = None,
+                         ttl_sec: Optional[int] = None) -> Optional[str]:
+    """
+    본문을 저장하고 sha256 반환 (실패 시 None)
+    parent_sha가 주어지고 복원 가능하면 그 버전과의 차분으로 저장합니다.
+    ttl_sec이 주어지면 새 blob에 만료를 두며, 캐시에 있어도 Redis에서 만료됐을 수 있으므로 SET NX로 다시 확인합니다.
+    """
+    sha = blob_sha256(text)
+    if not ttl_sec and (namespace, sha) in _cache:
+        return sha
+    try:
+        parent = None
+        if parent_sha and parent_sha != sha:
+            resolved = await _resolve(ctx, namespace, parent_sha)
+            if resolved is not None:
+                parent = (parent_sha, resolved[0], resolved[1])
+        payload, depth = encode_blob(text, parent)
+        created = await ctx.redis_handler.get_binary_client().set(redis_blob_key(namespace, sha), payload, nx=True, ex=ttl_sec or None)
+    except RedisError as e:
+        ctx.log.error("REDIS", f"-- Blob SET error: {redis_blob_key(namespace, sha)}, {str(e)}")
+        return None
+    if created:
+        _metrics["put"] += 1
+        _metrics["put_bytes"] += len(payload)
+        _metrics["put_raw_bytes"] += len(text.encode("utf-8"))
+        if depth:
+            _metrics["delta"] += 1
+    else:
+        # 다른 워커가 먼저 기록한 blob은 실제 체인 깊이를 모르므로, 다음 버전은 전체 압축본으로 저장되게 함
+        depth = MAX_DELTA_DEPTH
+    _remember(namespace, sha, text, depth)
+    return sha
+
+
+async def redis_blob_get(ctx, namespace: str, sha: str) -> Optional[str]:
+    try:
+        resolved = await _resolve(ctx, namespace, sha)
+    except RedisError as e:
+        ctx.log.error("REDIS", f"-- Blob GET error: {redis_blob_key(namespace, sha)}, {str(e)}")
+        return None
+    return resolved[0] if resolved else None
+
+
+async def redis_blob_get_many(ctx, namespace: str, shas: Iterable[str]) -> Dict[str, str]:
+    """여러 blob을 한 번의 MGET으로 읽어 복원 (없는 blob은 결과에서 제외)"""
+    wanted = list(dict.fromkeys(shas))
+    missing = [sha for sha in wanted if (namespace, sha) not in _cache]
+    result: Dict[str, str] = {}
+    try:
+        payloads = {}
+        if missing:
+            values = await ctx.redis_handler.get_binary_client().mget([redis_blob_key(namespace, sha) for sha in missing])
+            payloads = {sha: value for sha, value in zip(missing, values) if value is not None}
+        for sha in wanted:
+            resolved = await _resolve(ctx, namespace, sha, payloads)
+            if resolved is not None:
+                result[sha] = resolved[0]
+    except RedisError as e:
+        ctx.log.error("REDIS", f"-- Blob MGET error: {namespace}, {str(e)}")
+    return result
@@ -60,4 +60,16 @@ async def redis_hget(ctx, key, field):
         return value
     except RedisError as e:
         ctx.log.error("REDIS", f"-- HGET error: {key}[{field}], {str(e)}")
-        return None
\ No newline at end of file
+        return None
+
+# 해시 구조의 전체 필드 조회
+# - return: {field: value} 딕셔너리 (없거나 에러 시 빈 딕셔너리)
+async def redis_hgetall(ctx, key):
+    try:
+        client = ctx.redis_handler.client
+        value = await client.hgetall(key)
+        ctx.log.debug("REDIS", f"== HGETALL {key} > {len(value)} fields")
+        return value
+    except RedisError as e:
+        ctx.log.error("REDIS", f"-- HGETALL error: {key}, {str(e)}")
+        return {}
@@ -10,4 +10,29 @@ async def redis_lpush(ctx, key: str, value: str):
         await client.lpush(key, value)
         ctx.log.debug("REDIS", f"<< LPUSH {key} = {value}")
     except Exception as e:
-        ctx.log.error("REDIS", f"-- LPUSH error: {key}, {e}")
\ No newline at end of file
+        ctx.log.error("REDIS", f"-- LPUSH error: {key}, {e}")
+
+# 리스트 끝에 값 추가 (우측 삽입, 다중 값)
+# - return: 추가 후 리스트 길이 또는 None (에러 시)
+async def redis_rpush(ctx, key: str, *values):
+    try:
+        client = ctx.redis_handler.client
+        length = await client.rpush(key, *values)
+        ctx.log.debug("REDIS", f">> RPUSH {key} += {len(values)} items > {length}")
+        return length
+    except RedisError as e:
+        ctx.log.error("REDIS", f"-- RPUSH error: {key}, {e}")
+        return None
+
+
+# 리스트 범위 조회
+# - return: 값 리스트 (에러 시 빈 리스트)
+async def redis_lrange(ctx, key: str, start: int = 0, end: int = -1):
+    try:
+        client = ctx.redis_handler.client
+        values = await client.lrange(key, start, end)
+        ctx.log.debug("REDIS", f"== LRANGE {key} [{start}:{end}] > {len(values)} items")
+        return values
+    except RedisError as e:
+        ctx.log.error("REDIS", f"-- LRANGE error: {key}, {e}")
+        return []
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+ChatStateManager 직렬화 / 메모리 마이크로 벤치마크
+세션 상태가 메모리에 수천 개 상주하므로, 인스턴스당 메모리와 주요 변환 경로의 왕복 비용을 측정합니다.
+
+측정 항목:
+    to_dict/from_dict   딕셔너리 왕복 (archive, 레거시 키 이전 경로)
+    to_json             orjson 직렬화 (to_dict 포함)
+    take/from_redis     변경 필드 직렬화 후 Redis 해시 + 입력 리스트에서 복원 (SessionStateCache 경로)
+    move/jump           단계 이동 (진행률 계산 포함)
+    memory              tracemalloc 기준 인스턴스당 할당량
+
+사용법:
+    python test/bench_chat_state.py
+    python test/bench_chat_state.py --sessions 5000 --inputs 20 --repeat 5
+"""
+
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.service.ai.chat_state_manager import ChatStateManager, ChatStep
+
+
+def make_session(idx: int, inputs: int) -> ChatStateManager:
+    """대화가 몇 단계 진행된 세션 상태"""
+    manager = ChatStateManager(f"bench-{idx}", {"userId": f"user-{idx}", "client_name": "김의뢰", "provider_name": "이제공"})
+    manager.move_to_next_step()
+    for i in range(inputs):
+        role = "client" if i % 2 == 0 else "provider"
+        manager.add_role_input(role, f"{i}번째 입력입니다. 로고 디자인 3종과 명함 시안을 2주 안에 부탁드립니다.")
+    manager.update_data("work_scope", "로고 디자인 3종, 명함 시안 2종")
+    manager.update_data("work_period", "2주")
+    manager.update_data("budget", "300만원")
+    manager.move_to_next_step()
+    manager.move_to_next_step()
+    return manager
+
+
+def timed(label: str, count: int, fn, repeat: int):
+    """repeat회 중 가장 빠른 실행 기준 건당 시간 (us)"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    print(f"{label:<20}{best / count * 1e6:>10.2f} us/op")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ChatStateManager serialization/memory micro-benchmark")
+    parser.add_argument("--sessions", type=int, default=2000)
+    parser.add_argument("--inputs", type=int, default=10, help="세션당 role_inputs 수")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    sessions = [make_session(i, args.inputs) for i in range(args.sessions)]
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"Sessions: {args.sessions}, role_inputs/session: {args.inputs}")
+    print(f"{'memory':<20}{(after - before) / args.sessions:>10.0f} B/session")
+
+    dicts = [manager.to_dict() for manager in sessions]
+    restored = [ChatStateManager.from_dict(data) for data in dicts]
+    assert [m.to_dict() for m in restored] == dicts, "to_dict/from_dict round-trip mismatch"
+
+    # SessionStateCache가 기록하는 형태 (해시 필드 + 입력 리스트 항목)
+    snapshots = []
+    for manager in restored:
+        manager.mark_all_dirty()
+        fields, _, _, items = manager.take_changes()
+        snapshots.append((fields, items))
+    assert ChatStateManager.from_redis(*snapshots[0]).to_dict() == dicts[0], "from_redis round-trip mismatch"
+
+    count = len(sessions)
+    timed("to_dict/from_dict", count, lambda: [ChatStateManager.from_dict(m.to_dict()) for m in sessions], args.repeat)
+    timed("to_json", count, lambda: [m.to_json() for m in sessions], args.repeat)
+    timed("from_redis", count, lambda: [ChatStateManager.from_redis(f, i) for f, i in snapshots], args.repeat)
+
+    def take_all():
+        for manager in restored:
+            manager.mark_all_dirty()
+            manager.take_changes()
+    timed("take_changes(all)", count, take_all, args.repeat)
+
+    manager = sessions[0]
+
+    def move_cycle():
+        for _ in range(count):
+            manager.jump_to_step(ChatStep.INTRODUCTION)
+            manager.move_to_next_step()
+    timed("jump+move", count, move_cycle, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
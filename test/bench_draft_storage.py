@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+계약서 초안 저장 공간 벤치마크
+한 세션 동안 초안이 턴마다 몇 줄씩 바뀌는 상황을 만들어, 채팅 스트림에 기록되는 바이트 수를 저장 방식별로 비교합니다.
+Redis 없이 실행되며, 메시지 본문은 store_chat_message와 같은 orjson 직렬화 크기로 계산합니다.
+
+저장 방식:
+    inline        assistant 메시지마다 contract_draft 전문 포함 (이전 방식)
+    zstd          버전마다 전체 압축본 blob + 메시지에는 참조만
+    zstd+delta    직전 버전을 사전으로 한 차분 blob (redis_blob_utils 기본 동작)
+
+사용법:
+    python test/bench_draft_storage.py
+    python test/bench_draft_storage.py --turns 60 --edits 3 --seed 7
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+import orjson
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.service.ai.asset.prompts.doq_contract_template import CONTRACT_TEMPLATE
+from src.utils.redis_blob_utils import MAX_DELTA_DEPTH, blob_sha256, encode_blob, parse_blob, decode_blob
+
+FIELDS = {
+    "category": "브랜드 로고 디자인",
+    "client_company": "주식회사 두큐",
+    "provider_company": "이제공 디자인 스튜디오",
+    "client_name": "김의뢰",
+    "provider_name": "이제공",
+    "work_scope": "로고 디자인 시안 3종, 명함 시안 2종",
+    "work_period": "2주",
+    "budget": "300만원",
+    "revision_count": "3회",
+}
+
+
+def draft_versions(turns: int, edits: int, rng: random.Random):
+    """단계가 진행되며 자리표시자가 채워지고, 턴마다 edits개 줄의 표현이 조금씩 바뀌는 초안"""
+    text = CONTRACT_TEMPLATE
+    names = list(FIELDS)
+    versions = []
+    for turn in range(turns):
+        if turn < len(names):
+            text = text.replace("{{" + names[turn] + "}}", FIELDS[names[turn]])
+        lines = text.split("\n")
+        for _ in range(edits):
+            idx = rng.randrange(len(lines))
+            if lines[idx].strip():
+                lines[idx] = f"{lines[idx]} (협의 {turn}차 반영)"
+        text = "\n".join(lines)
+        versions.append(text)
+    return versions
+
+
+def message_body(text: str, draft, ref=None) -> bytes:
+    """store_chat_message가 기록하는 assistant 메시지 본문 (핵심 필드만)"""
+    return orjson.dumps({
+        "hd": {"event": "llm.response", "role": "assistant", "step": "budget"},
+        "bd": {"text": text, "contract_draft": draft, "contract_draft_ref": ref, "current_step": "budget", "state": {"code": "S0000"}},
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Contract draft storage size benchmark")
+    parser.add_argument("--turns", type=int, default=30, help="초안이 포함된 assistant 메시지 수")
+    parser.add_argument("--edits", type=int, default=2, help="턴마다 바뀌는 줄 수")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    versions = draft_versions(args.turns, args.edits, random.Random(args.seed))
+    reply = "예산을 300만원으로 반영했습니다. 다음으로 수정 횟수를 정해주세요."
+
+    inline = sum(len(message_body(reply, draft)) for draft in versions)
+    refs = sum(len(message_body(reply, None, {"version": i + 1, "sha256": blob_sha256(d)})) for i, d in enumerate(versions))
+
+    full_blobs = sum(len(encode_blob(draft)[0]) for draft in set(versions))
+
+    delta_blobs, blobs = 0, {}
+    parent = None
+    start = time.perf_counter()
+    for draft in versions:
+        sha = blob_sha256(draft)
+        if sha in blobs:
+            continue
+        payload, depth = encode_blob(draft, parent)
+        blobs[sha] = payload
+        delta_blobs += len(payload)
+        parent = (sha, draft, depth)
+    encode_ms = (time.perf_counter() - start) * 1000
+
+    # 최신 버전 복원 (체인 최대 MAX_DELTA_DEPTH단계)
+    def restore(sha):
+        _, parent_sha, frame = parse_blob(blobs[sha])
+        return decode_blob(frame, restore(parent_sha) if parent_sha else None)
+
+    latest = blob_sha256(versions[-1])
+    start = time.perf_counter()
+    assert restore(latest) == versions[-1], "delta chain round-trip mismatch"
+    decode_ms = (time.perf_counter() - start) * 1000
+
+    raw = len(versions[-1].encode("utf-8"))
+    print(f"Turns: {args.turns}, edited lines/turn: {args.edits}, draft size: {raw} B, max delta depth: {MAX_DELTA_DEPTH}")
+    print(f"{'inline':<14}{inline:>10} B")
+    print(f"{'zstd':<14}{refs + full_blobs:>10} B  ({inline / (refs + full_blobs):.1f}x smaller)")
+    print(f"{'zstd+delta':<14}{refs + delta_blobs:>10} B  ({inline / (refs + delta_blobs):.1f}x smaller)")
+    print(f"{'encode':<14}{encode_ms / len(blobs):>10.3f} ms/version")
+    print(f"{'decode latest':<14}{decode_ms:>10.3f} ms (cold, full chain)")
+
+
+if __name__ == "__main__":
+    main()
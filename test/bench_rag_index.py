@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+RAG 인덱스 타입별 recall / 지연시간 벤치마크
+flat(정확 검색)을 기준으로 hnsw, ivfpq의 recall@k와 단건 검색 p50/p99 지연시간을 측정합니다.
+
+사용법:
+    python test/bench_rag_index.py                      # 합성 벡터 50,000개
+    python test/bench_rag_index.py --size 200000 --k 5
+    python test/bench_rag_index.py --index-path faiss_index   # 현재 인덱스의 임베딩 사용
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.service.ai.rag_store import RAGIndexSnapshot, build_faiss_index, normalize_vectors
+
+
+def load_vectors(args) -> np.ndarray:
+    """현재 인덱스의 임베딩 또는 군집 구조를 가진 합성 벡터"""
+    if args.index_path:
+        snapshot = RAGIndexSnapshot.open(args.index_path)
+        if snapshot is None:
+            raise SystemExit(f"No RAG index found in {args.index_path}")
+        return np.asarray(snapshot.vectors)
+
+    rng = np.random.default_rng(args.seed)
+    centers = rng.normal(size=(max(args.size // 200, 1), args.dim)).astype("float32")
+    labels = rng.integers(0, len(centers), size=args.size)
+    vectors = centers[labels] + 0.3 * rng.normal(size=(args.size, args.dim)).astype("float32")
+    return normalize_vectors(vectors)
+
+
+def make_queries(vectors: np.ndarray, count: int, seed: int) -> np.ndarray:
+    """코퍼스 벡터에 잡음을 더한 질의 (실제 질의가 문서와 유사하지만 동일하지 않은 상황)"""
+    rng = np.random.default_rng(seed + 1)
+    picks = vectors[rng.integers(0, len(vectors), size=count)]
+    return normalize_vectors(picks + 0.05 * rng.normal(size=picks.shape).astype("float32"))
+
+
+def measure(index, queries: np.ndarray, k: int):
+    latencies = []
+    results = []
+    for query in queries:
+        start = time.perf_counter()
+        _, ids = index.search(query.reshape(1, -1), k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        results.append(ids[0])
+    return np.array(results), np.array(latencies)
+
+
+def recall_at_k(results: np.ndarray, truth: np.ndarray) -> float:
+    hits = sum(len(set(r[r >= 0]) & set(t)) for r, t in zip(results, truth))
+    return hits / truth.size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RAG index recall/latency benchmark")
+    parser.add_argument("--index-path", default=None, help="기존 인덱스 디렉토리 (미지정 시 합성 벡터)")
+    parser.add_argument("--size", type=int, default=50_000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--hnsw-m", type=int, default=32)
+    parser.add_argument("--hnsw-ef-search", type=int, default=64)
+    parser.add_argument("--ivf-nlist", type=int, default=256)
+    parser.add_argument("--ivf-nprobe", type=int, default=16)
+    parser.add_argument("--pq-m", type=int, default=48)
+    parser.add_argument("--pq-refine-k-factor", type=int, default=8)
+    args = parser.parse_args()
+
+    vectors = load_vectors(args)
+    queries = make_queries(vectors, args.queries, args.seed)
+    print(f"Corpus: {len(vectors)} vectors x {vectors.shape[1]} dims, {len(queries)} queries, k={args.k}")
+
+    configs = {
+        "flat": {"type": "flat"},
+        "hnsw": {"type": "hnsw", "hnsw_m": args.hnsw_m, "hnsw_ef_search": args.hnsw_ef_search},
+        "ivfpq": {"type": "ivfpq", "ivf_nlist": args.ivf_nlist, "ivf_nprobe": args.ivf_nprobe,
+                  "pq_m": args.pq_m, "pq_refine_k_factor": args.pq_refine_k_factor},
+    }
+
+    truth = None
+    print(f"{'index':<8}{'build(s)':>10}{'recall@k':>10}{'p50(ms)':>10}{'p99(ms)':>10}")
+    for name, params in configs.items():
+        start = time.perf_counter()
+        index = build_faiss_index(vectors, params)
+        build_sec = time.perf_counter() - start
+
+        results, latencies = measure(index, queries, args.k)
+        if truth is None:
+            truth = results  # flat 결과를 정답으로 사용
+        recall = recall_at_k(results, truth)
+        print(
+            f"{name:<8}{build_sec:>10.2f}{recall:>10.3f}"
+            f"{np.percentile(latencies, 50):>10.3f}{np.percentile(latencies, 99):>10.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+RAG 검색 품질 / 지연시간 / 메모리 벤치마크
+ChatStep 주제별 라벨링된 질의로 recall@k, MRR, 검색 p50/p99, 메모리를 인덱스 타입 × 검색 방식별로 측정합니다.
+Gemini 임베딩 대신 문자 n-gram 해싱 임베딩을 사용하므로 네트워크 없이 실행됩니다.
+
+검색 방식:
+    dense       전체 코퍼스 검색 (RAGIndexSnapshot.search)
+    dense+step  현재 단계 주제 필터 검색 (chat_ws와 동일)
+
+사용법:
+    python test/bench_rag_retrieval.py                    # reference/ PDF (PDF 파서 미설치 시 내장 샘플 계약서)
+    python test/bench_rag_retrieval.py --sample --repeat 300 --k 3
+    python test/bench_rag_retrieval.py --types flat,hnsw --max-chunk-chars 600
+"""
+
+import gc
+import os
+import re
+import sys
+import time
+import zlib
+import argparse
+import tempfile
+from collections import Counter
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.service.ai.rag_chunker import ClauseChunker, _ARTICLE_RE, topic_bit
+from src.service.ai.rag_store import FAISS_FILE, RAGIndexSnapshot, normalize_vectors, resolve_index_params, write_snapshot
+from src.service.ai.asset.prompts.doq_prompts_rag import RAG_STEP_TOPIC_KEYWORDS
+
+# (질의, 단계, 정답 조문 헤딩 키워드) - 헤딩에 키워드가 하나라도 있는 청크를 정답으로 간주
+LABELLED_QUERIES = [
+    ("디자인 용역의 과업 범위를 어떻게 정하나요", "work_scope", ["과업", "범위", "용역의 내용"]),
+    ("납품해야 하는 결과물은 무엇인가요", "work_scope", ["납품", "과업", "결과물"]),
+    ("작업 범위에 포함되는 업무", "work_scope", ["과업", "범위", "용역의 내용"]),
+    ("용역 기간과 납기일", "work_period", ["기간", "납품", "납기"]),
+    ("작업이 지체되면 지체상금은 얼마인가요", "work_period", ["지체"]),
+    ("계약 기간 연장은 어떻게 하나요", "work_period", ["기간", "변경"]),
+    ("용역 대금은 언제 지급되나요", "budget", ["대금", "지급"]),
+    ("계약금과 잔금 지급 비율", "budget", ["대금", "지급"]),
+    ("추가 비용 정산 방법", "budget", ["대금", "비용", "정산"]),
+    ("수정 요청은 몇 번까지 가능한가요", "revisions", ["수정", "보완", "검수"]),
+    ("검수 기간과 검수 절차", "revisions", ["검수"]),
+    ("시안 재작업 요청", "revisions", ["수정", "보완"]),
+    ("결과물 저작권은 누구에게 귀속되나요", "copyright", ["저작권", "지식재산", "권리"]),
+    ("2차적 저작물 작성권", "copyright", ["저작권", "지식재산", "권리"]),
+    ("포트폴리오로 사용해도 되나요", "copyright", ["저작권", "지식재산", "권리", "포트폴리오"]),
+    ("비밀유지 의무 기간", "confidentiality", ["비밀"]),
+    ("업무상 알게 된 정보를 누설하면", "confidentiality", ["비밀"]),
+    ("개인정보 보호 의무", "confidentiality", ["비밀", "개인정보"]),
+    ("계약 해제와 해지 사유", "conflict_resolution", ["해제", "해지"]),
+    ("손해배상 책임 범위", "conflict_resolution", ["손해배상"]),
+    ("분쟁 발생 시 관할 법원", "conflict_resolution", ["분쟁", "관할"]),
+    ("계약서 서명 날인", "finalization", ["효력", "서명", "부칙", "기타"]),
+    ("계약의 효력 발생 시점", "finalization", ["효력", "부칙"]),
+    ("계약서에 정하지 않은 사항은 어떻게 하나요", "finalization", ["기타", "해석", "부칙"]),
+]
+
+# reference PDF를 읽을 수 없을 때 사용하는 표준계약서 형태의 샘플 본문
+SAMPLE_CONTRACT = """디자인 용역 표준계약서
+제1조(목적) 이 계약은 발주자가 수급자에게 의뢰한 디자인 용역의 수행과 관련하여 당사자의 권리와 의무를 정함을 목적으로 한다.
+제2조(용역의 내용 및 과업 범위) ① 수급자가 수행할 과업의 범위는 별지 과업내용서에 따른다.
+② 과업 범위의 변경은 당사자가 서면으로 합의한 경우에 한한다.
+③ 수급자는 과업내용서에 정한 결과물을 정해진 형식으로 납품한다.
+제3조(용역 기간) ① 용역 기간은 계약일로부터 별도로 정한 완료일까지로 한다.
+② 발주자의 자료 제공 지연 등 수급자의 책임 없는 사유로 일정이 늦어지면 그 기간만큼 연장한다.
+제4조(납품 및 지체상금) ① 수급자는 정해진 납기까지 결과물을 납품하여야 한다.
+② 수급자가 납기를 지체한 경우 지체일수에 계약금액의 1천분의 1을 곱한 지체상금을 지급한다.
+제5조(용역 대금의 지급) ① 발주자는 계약 체결 시 계약금으로 대금의 30%를 지급한다.
+② 잔금은 검수 완료 후 14일 이내에 지급한다.
+③ 계약 금액에는 부가가치세가 포함되지 않은 것으로 본다.
+제6조(추가 비용의 정산) 과업 범위를 넘는 추가 작업에 대한 비용은 당사자가 협의하여 정산한다.
+제7조(수정 및 보완) ① 수급자는 시안 확정 전 3회까지 무상으로 수정 및 보완 요청에 응한다.
+② 3회를 초과하는 수정 또는 확정 후 재작업 요청은 별도 비용으로 한다.
+제8조(검수) ① 발주자는 결과물을 납품받은 날부터 7일 이내에 검수를 완료하여야 한다.
+② 기간 내 검수 결과를 통지하지 않으면 검수에 합격한 것으로 본다.
+제9조(저작권 등 지식재산권의 귀속) ① 결과물에 대한 저작재산권은 대금 지급이 완료된 때에 발주자에게 양도된다.
+② 2차적 저작물 작성권은 별도 약정이 없는 한 수급자에게 유보된다.
+③ 수급자는 결과물을 포트폴리오 목적으로 사용할 수 있다.
+제10조(저작인격권) 수급자의 저작인격권은 양도되지 아니하며 발주자는 성명표시를 존중한다.
+제11조(비밀유지) ① 당사자는 용역 수행 중 알게 된 상대방의 기밀 정보를 제3자에게 누설하여서는 아니 된다.
+② 비밀유지 의무는 계약 종료 후 2년간 존속한다.
+③ 수급자는 업무상 취득한 개인정보를 관계 법령에 따라 보호하여야 한다.
+제12조(계약의 해제 및 해지) ① 당사자 일방이 계약을 위반하고 14일 이내에 시정하지 않으면 상대방은 계약을 해제 또는 해지할 수 있다.
+② 발주자의 사정으로 해지하는 경우 이미 수행한 과업에 대한 대금을 정산한다.
+제13조(손해배상) 당사자는 고의 또는 과실로 상대방에게 손해를 입힌 경우 그 손해를 배상하여야 한다.
+제14조(분쟁의 해결) ① 이 계약과 관련한 분쟁은 당사자 간 협의로 해결함을 원칙으로 한다.
+② 협의가 이루어지지 않으면 한국저작권위원회의 조정 또는 중재에 따르거나 발주자 소재지 관할 법원에 제소한다.
+제15조(기타 및 해석) 이 계약에서 정하지 아니한 사항은 관계 법령과 일반 상관례에 따른다.
+제16조(계약의 효력) 이 계약은 당사자가 기명날인 또는 서명한 날부터 효력이 발생한다.
+"""
+
+
+class HashingEmbeddings:
+    """
+    Gemini 임베딩 대체용 문자 1~3-gram 해싱 임베딩 (오프라인/결정적)
+    embed_documents / embed_query 인터페이스는 langchain 임베딩과 동일합니다.
+    """
+
+    def __init__(self, dim: int = 768):
+        self.dim = dim
+
+    def _embed(self, text: str) -> np.ndarray:
+        compact = "".join(text.split())
+        grams = Counter(compact[i:i + n] for n in (1, 2, 3) for i in range(len(compact) - n + 1))
+        vector = np.zeros(self.dim, dtype="float32")
+        for gram, count in grams.items():
+            h = zlib.crc32(gram.encode("utf-8"))
+            vector[h % self.dim] += (1.0 if h & 0x80000000 else -1.0) * (1.0 + np.log(count))
+        return vector
+
+    def embed_documents(self, texts):
+        return [self._embed(text).tolist() for text in texts]
+
+    def embed_query(self, text):
+        return self._embed(text).tolist()
+
+
+_PARTY_NAMES = [("발주자", "수급자"), ("갑", "을"), ("의뢰인", "디자이너"), ("위탁자", "수탁자")]
+
+
+def sample_variant(rng) -> str:
+    """당사자 명칭과 숫자를 바꾼 샘플 계약서 (동일 벡터 중복으로 인한 왜곡 방지)"""
+    client, provider = _PARTY_NAMES[rng.integers(len(_PARTY_NAMES))]
+    text = SAMPLE_CONTRACT.replace("발주자", client).replace("수급자", provider)
+    return re.sub(r"\d+(?=\s*(?:회|일|%|년|일수))", lambda m: str(rng.integers(1, 60)), text)
+
+
+def load_pages(args):
+    """{source: pages} - reference PDF 또는 내장 샘플 변형 (repeat개)"""
+    if not args.sample:
+        try:
+            from src.service.ai.rag_index_builder import _load_pdf_pages
+            pdfs = sorted(name for name in os.listdir(args.reference_dir) if name.endswith(".pdf"))
+            docs = {name: _load_pdf_pages(os.path.join(args.reference_dir, name)) for name in pdfs}
+            if docs:
+                return docs, "reference"
+        except Exception as e:
+            print(f"Cannot parse reference PDFs ({e}); using built-in sample contract")
+    rng = np.random.default_rng(args.seed)
+    return {f"sample_{i:04d}.txt": [(sample_variant(rng), {"page": 0})] for i in range(args.repeat)}, "sample"
+
+
+def build_corpus(docs, max_chunk_chars: int):
+    chunker = ClauseChunker(max_chars=max_chunk_chars)
+    texts, metadatas, files = [], [], []
+    for name, pages in docs.items():
+        start = len(texts)
+        for chunk, page, topics in chunker.split_pages(pages):
+            texts.append(chunk)
+            metadatas.append({"source": name, "page": page, "topics": topics})
+        files.append({"name": name, "sha256": "", "start": start, "count": len(texts) - start})
+    return texts, metadatas, files
+
+
+def relevant_ids(texts, labels):
+    """조문 헤딩에 정답 키워드가 포함된 청크 번호"""
+    ids = set()
+    for idx, text in enumerate(texts):
+        match = _ARTICLE_RE.match(text.split("\n", 1)[0])
+        if match and any(label in match.group(0) for label in labels):
+            ids.add(idx)
+    return ids
+
+
+def rss_bytes() -> int:
+    """현재 프로세스 RSS (Linux /proc 기준, 그 외 0)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return 0
+
+
+def evaluate(snapshot, queries, truths, k: int, use_step: bool):
+    recalls, rr, latencies = [], [], []
+    for (query_vector, step), relevant in zip(queries, truths):
+        start = time.perf_counter()
+        results = snapshot.search(query_vector, k, topic_mask=topic_bit(step) if use_step else 0)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+        ranked = [idx for _, idx in results]
+        found = [rank for rank, idx in enumerate(ranked, 1) if idx in relevant]
+        recalls.append(len(found) / min(k, len(relevant)) if relevant else 0.0)
+        rr.append(1.0 / found[0] if found else 0.0)
+    return np.mean(recalls), np.mean(rr), np.percentile(latencies, 50), np.percentile(latencies, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RAG retrieval quality/latency benchmark (offline)")
+    parser.add_argument("--reference-dir", default="reference")
+    parser.add_argument("--sample", action="store_true", help="reference PDF 대신 내장 샘플 계약서 사용")
+    parser.add_argument("--repeat", type=int, default=200, help="샘플 계약서 복제 수 (코퍼스 크기)")
+    parser.add_argument("--types", default="flat,hnsw,ivfpq")
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--max-chunk-chars", type=int, default=800)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    embeddings = HashingEmbeddings(args.dim)
+    docs, corpus_name = load_pages(args)
+    texts, metadatas, files = build_corpus(docs, args.max_chunk_chars)
+    vectors = normalize_vectors(embeddings.embed_documents(texts))
+
+    queries = [(embeddings.embed_query(f"{step} {query}"), step) for query, step, _ in LABELLED_QUERIES]
+    truths = [relevant_ids(texts, labels) for _, _, labels in LABELLED_QUERIES]
+    missing = [query for (query, _, _), truth in zip(LABELLED_QUERIES, truths) if not truth]
+    if missing:
+        print(f"Warning: {len(missing)} queries have no labelled chunk in this corpus: {missing}")
+
+    print(f"Corpus: {corpus_name}, {len(docs)} docs, {len(texts)} chunks x {args.dim} dims, "
+          f"{len(queries)} queries over {len(RAG_STEP_TOPIC_KEYWORDS)} topics, k={args.k}")
+    print(f"{'index':<8}{'backend':<12}{'recall@k':>10}{'MRR':>8}{'p50(ms)':>10}{'p99(ms)':>10}{'disk(MB)':>10}{'+rss(MB)':>10}")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for index_type in args.types.split(","):
+            params = resolve_index_params({"type": index_type})
+            index_path = os.path.join(tmp_dir, index_type)
+            version = write_snapshot(index_path, vectors, texts, metadatas, files, params, RAG_STEP_TOPIC_KEYWORDS)
+            disk_mb = os.path.getsize(os.path.join(index_path, version, FAISS_FILE)) / 2**20
+
+            gc.collect()
+            rss_before = rss_bytes()
+            snapshot = RAGIndexSnapshot.open(index_path, params)
+            for backend, use_step in (("dense", False), ("dense+step", True)):
+                recall, mrr, p50, p99 = evaluate(snapshot, queries, truths, args.k, use_step)
+                rss_mb = (rss_bytes() - rss_before) / 2**20
+                print(f"{index_type:<8}{backend:<12}{recall:>10.3f}{mrr:>8.3f}{p50:>10.3f}{p99:>10.3f}{disk_mb:>10.2f}{rss_mb:>10.2f}")
+            snapshot.close()
+            del snapshot
+
+
+if __name__ == "__main__":
+    main()
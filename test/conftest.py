@@ -0,0 +1,230 @@
+"""
+pytest 공용 fixture
+Redis 서버 없이 SessionStateCache/StepSummaryQueue를 검증하기 위한 인메모리 FakeRedis와 ctx를 제공합니다.
+FakeRedis는 decode_responses=True 클라이언트처럼 문자열을 반환하며(bytes 값은 그대로 보관), 세션 상태 CAS 저장 스크립트와
+계약서 초안 저장 스크립트는 같은 동작을 Python으로 수행합니다.
+"""
+import fnmatch
+import logging
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _span(length: int, start: int, end: int):
+    """Redis LRANGE/LTRIM 인덱스(음수 허용, end 포함)를 파이썬 슬라이스 범위로 변환"""
+    start = max(length + start, 0) if start < 0 else start
+    end = length + end if end < 0 else end
+    return start, end + 1
+
+
+class FakeRedis:
+    """테스트용 인메모리 Redis (해시/리스트/문자열 + publish 기록)"""
+
+    def __init__(self):
+        self.data = {}
+        self.ttls = {}          # key -> 마지막으로 설정된 만료(초)
+        self.published = []
+        self.script_calls = 0
+
+    async def type(self, key):
+        value = self.data.get(key)
+        if isinstance(value, dict):
+            return "hash"
+        if isinstance(value, list):
+            return "list"
+        if isinstance(value, set):
+            return "set"
+        return "none" if value is None else "string"
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value if isinstance(value, bytes) else str(value)
+        if ex:
+            self.ttls[key] = ex
+        return True
+
+    async def mget(self, keys):
+        return [self.data.get(key) for key in keys]
+
+    async def expire(self, key, seconds):
+        if key not in self.data:
+            return 0
+        self.ttls[key] = seconds
+        return 1
+
+    async def exists(self, *keys):
+        return sum(1 for key in keys if key in self.data)
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.ttls.pop(key, None)
+        return sum(1 for key in keys if self.data.pop(key, None) is not None)
+
+    async def scan_iter(self, match="*"):
+        for key in list(self.data):
+            if fnmatch.fnmatchcase(key, match):
+                yield key
+
+    async def hgetall(self, key):
+        return dict(self.data.get(key) or {})
+
+    async def hget(self, key, field):
+        return (self.data.get(key) or {}).get(field)
+
+    async def hmget(self, key, fields):
+        values = self.data.get(key) or {}
+        return [values.get(field) for field in fields]
+
+    async def hset(self, key, field=None, value=None, mapping=None):
+        values = self.data.setdefault(key, {})
+        items = dict(mapping or {})
+        if field is not None:
+            items[field] = value
+        added = sum(1 for name in items if name not in values)
+        values.update((name, str(item)) for name, item in items.items())
+        return added
+
+    async def hincrby(self, key, field, amount=1):
+        values = self.data.setdefault(key, {})
+        values[field] = str(int(values.get(field) or 0) + amount)
+        return int(values[field])
+
+    async def sadd(self, key, *members):
+        values = self.data.setdefault(key, set())
+        added = sum(1 for member in members if str(member) not in values)
+        values.update(str(member) for member in members)
+        return added
+
+    async def sismember(self, key, member):
+        return int(str(member) in (self.data.get(key) or set()))
+
+    async def smembers(self, key):
+        return set(self.data.get(key) or set())
+
+    async def rpush(self, key, *values):
+        items = self.data.setdefault(key, [])
+        items.extend(str(value) for value in values)
+        return len(items)
+
+    async def lrange(self, key, start, end):
+        items = self.data.get(key) or []
+        begin, stop = _span(len(items), start, end)
+        return items[begin:stop]
+
+    async def xadd(self, key, fields):
+        entries = self.data.setdefault(key, [])
+        message_id = f"{len(entries) + 1}-0"
+        entries.append((message_id, {name: str(value) for name, value in fields.items()}))
+        return message_id
+
+    async def xrevrange(self, key, max="+", min="-", count=None):
+        def stream_key(message_id):
+            ms, _, seq = message_id.partition("-")
+            return int(ms), int(seq or 0)
+
+        def within(message_id):
+            if min != "-":
+                if min.startswith("("):
+                    if stream_key(message_id) <= stream_key(min[1:]):
+                        return False
+                elif stream_key(message_id) < stream_key(min):
+                    return False
+            return max == "+" or stream_key(message_id) <= stream_key(max)
+
+        entries = [entry for entry in reversed(self.data.get(key) or []) if within(entry[0])]
+        return entries[:count] if count else entries
+
+    async def publish(self, channel, message):
+        self.published.append((channel, message))
+        return 0
+
+    def register_script(self, source):
+        from src.service.ai.chat_state_manager import _CAS_SAVE_SCRIPT
+        from src.utils.contract_draft_utils import _SAVE_DRAFT_SCRIPT
+        scripts = {_CAS_SAVE_SCRIPT: self._cas_save, _SAVE_DRAFT_SCRIPT: self._save_draft}
+        if source not in scripts:
+            raise NotImplementedError("FakeRedis only emulates the session state CAS and contract draft scripts")
+        return scripts[source]
+
+    async def _cas_save(self, keys, args):
+        """_CAS_SAVE_SCRIPT와 같은 동작 (rev 비교 → HSET → RPUSH/LTRIM → rev 증가 → PUBLISH)"""
+        self.script_calls += 1
+        state_key, inputs_key = keys
+        state = self.data.get(state_key) or {}
+        rev = int(state.get("rev") or 0)
+        if rev != int(args[0]):
+            return [0, rev]
+        inputs_max, channel, prefix, nfields = int(args[1]), args[2], args[3], int(args[4])
+        first_item = 5 + nfields * 2
+        if nfields:
+            pairs = args[5:first_item]
+            await self.hset(state_key, mapping=dict(zip(pairs[0::2], pairs[1::2])))
+        if len(args) > first_item:
+            await self.rpush(inputs_key, *args[first_item:])
+            items = self.data[inputs_key]
+            begin, stop = _span(len(items), -inputs_max, -1)
+            self.data[inputs_key] = items[begin:stop]
+        rev = await self.hincrby(state_key, "rev", 1)
+        await self.publish(channel, f"{prefix}{rev}")
+        return [1, rev]
+
+    async def _save_draft(self, keys, args):
+        """_SAVE_DRAFT_SCRIPT와 같은 동작 (포인터 갱신 → 버전 집합 기록 → 포인터/집합/세션 blob 만료 갱신)"""
+        self.script_calls += 1
+        pointer_key, versions_key = keys
+        sha256, updated_at, ttl, blob_prefix = args
+        changed = 0
+        if await self.hget(pointer_key, "sha256") == sha256:
+            version = int(await self.hget(pointer_key, "version"))
+        else:
+            version = await self.hincrby(pointer_key, "version", 1)
+            await self.hset(pointer_key, mapping={"sha256": sha256, "updated_at": updated_at})
+            changed = 1
+        await self.sadd(versions_key, sha256)
+        if int(ttl) > 0:
+            for key in [pointer_key, versions_key] + [f"{blob_prefix}{sha}" for sha in await self.smembers(versions_key)]:
+                await self.expire(key, int(ttl))
+        return [version, changed]
+
+
+@pytest.fixture
+def fake_redis():
+    return FakeRedis()
+
+
+@pytest.fixture
+def ctx(fake_redis):
+    handler = SimpleNamespace(client=fake_redis, get_client=lambda: fake_redis, get_binary_client=lambda: fake_redis)
+    return SimpleNamespace(redis_handler=handler, log=logging.getLogger("doq-test"))
+
+
+@pytest.fixture
+def session_cache():
+    """SessionStateCache의 클래스 단위 상태를 테스트마다 초기화"""
+    from src.service.ai.chat_state_manager import SessionStateCache
+
+    def reset():
+        SessionStateCache._cache.clear()
+        SessionStateCache._last_access.clear()
+        SessionStateCache._sizes.clear()
+        SessionStateCache._total_bytes = 0
+        SessionStateCache._turns.clear()
+        SessionStateCache._pending.clear()
+        for timer in SessionStateCache._flush_timers.values():
+            timer.cancel()
+        SessionStateCache._flush_timers.clear()
+        SessionStateCache._cas_scripts.clear()
+        SessionStateCache._listening = False
+
+    reset()
+    yield SessionStateCache
+    reset()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+로컬 턴 분류기 평가
+LLM 판단 로그(turn_decisions.jsonl)를 정답으로 보고 현재 모델(CURRENT)의 일치율과 LLM 호출 절감량을 측정합니다.
+기본값은 모델 학습 이후(trained_until 이후)에 기록된 판단만 평가하므로, 학습에 쓰인 표본이 섞이지 않습니다.
+
+측정 항목:
+    agreement            전체 표본에서 분류기(p >= 0.5)와 LLM 판단의 일치율
+    coverage             확신도 >= min_confidence 라서 LLM 호출을 생략하게 될 표본 비율
+    confident_agreement  생략된 표본에서의 일치율 (분류기가 대신 내린 판단의 정확도)
+    latency              로그의 LLM 평균 지연 대비 분류기 추론 지연, 표본당 예상 절감 시간
+
+사용법:
+    python test/eval_turn_classifier.py
+    python test/eval_turn_classifier.py --log logs/turn_decisions.jsonl --model-dir turn_classifier --all
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.service.ai.turn_classifier import TASKS, TurnClassifier, TurnDecisionLog, agreement_report
+
+SWEEP = (0.7, 0.8, 0.9, 0.95, 0.99)
+
+
+def evaluate(classifier: TurnClassifier, task: str, records, min_confidence: float):
+    probs, elapsed = [], 0.0
+    for record in records:
+        start = time.perf_counter()
+        probs.append(classifier.predict_logged(task, record))
+        elapsed += time.perf_counter() - start
+    probs = np.array(probs, dtype=np.float64)
+    labels = np.array([bool(record["label"]) for record in records])
+
+    report = agreement_report(probs, labels, min_confidence)
+    llm_ms = float(np.mean([record.get("llm_ms") or 0.0 for record in records]))
+    clf_ms = elapsed / len(records) * 1000
+
+    print(f"[{task}] samples={report['samples']}")
+    print(f"  agreement            {report['agreement']}")
+    print(f"  coverage             {report['coverage']}  (min_confidence={min_confidence})")
+    print(f"  confident_agreement  {report['confident_agreement']}")
+    print(f"  llm latency          {llm_ms:10.1f} ms/call (logged)")
+    print(f"  classifier latency   {clf_ms * 1000:10.1f} us/call")
+    # 분류기는 항상 먼저 실행되고, 확신하는 표본에서만 LLM 호출이 사라짐
+    saved_ms = report["coverage"] * llm_ms - clf_ms
+    print(f"  expected saving      {saved_ms:10.1f} ms/decision ({saved_ms * len(records) / 1000:.1f} s over {len(records)} decisions)")
+
+    print(f"  {'threshold':>10}{'coverage':>10}{'agreement':>11}")
+    for threshold in SWEEP:
+        sweep = agreement_report(probs, labels, threshold)
+        print(f"  {threshold:>10}{sweep['coverage']:>10}{str(sweep['confident_agreement']):>11}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate the local turn classifier against logged LLM decisions")
+    parser.add_argument("--log", default="logs/turn_decisions.jsonl")
+    parser.add_argument("--model-dir", default="turn_classifier")
+    parser.add_argument("--min-confidence", type=float, default=0.9)
+    parser.add_argument("--all", action="store_true", help="학습에 사용된 표본까지 포함해 평가")
+    args = parser.parse_args()
+
+    classifier = TurnClassifier.load(args.model_dir, args.min_confidence)
+    if classifier is None:
+        raise SystemExit(f"No turn classifier found in {args.model_dir}")
+    print(f"Model: {classifier.version}")
+
+    entries = TurnDecisionLog.read(args.log)
+    for task in TASKS:
+        if task not in classifier.models:
+            print(f"[{task}] no model")
+            continue
+        trained_until = 0.0 if args.all else classifier.meta.get("holdout", {}).get(task, {}).get("trained_until", 0.0)
+        records = [e for e in entries if e["task"] == task and e["ts"] > trained_until]
+        if not records:
+            print(f"[{task}] no decisions logged after training (use --all to include training samples)")
+            continue
+        evaluate(classifier, task, records, args.min_confidence)
+
+
+if __name__ == "__main__":
+    main()
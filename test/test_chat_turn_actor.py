@@ -0,0 +1,141 @@
+"""
+세션 턴 실행기 테스트
+debounce 병합, 실행 중 턴의 대체(superseded), 세션 이탈(abandon) 시 대기 메시지 처리를 확인합니다.
+"""
+import asyncio
+import logging
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.service.ai.chat_turn_actor import SessionTurnActor
+
+
+class FakeContext:
+    log = logging.getLogger("test_chat_turn_actor")
+
+
+def message(text: str, asker: str = "client") -> dict:
+    return {"hd": {"asker": asker, "role": asker}, "bd": {"text": text}}
+
+
+def recording_turn(calls: list, delay: float = 0.0):
+    async def run_turn(ctx, websocket, msg, turn):
+        if delay:
+            await asyncio.sleep(delay)
+        calls.append(msg["bd"]["text"])
+    return run_turn
+
+
+async def drain(sid: str):
+    actor = SessionTurnActor._actors.get(sid)
+    if actor is not None:
+        await asyncio.wait_for(actor.worker, 2)
+
+
+def test_debounce_merges_messages():
+    async def scenario():
+        SessionTurnActor.configure(debounce_ms=30, max_batch=5)
+        calls = []
+        for text in ("안녕하세요", "예산은 500만원입니다"):
+            SessionTurnActor.submit(FakeContext(), "s-merge", None, message(text), recording_turn(calls))
+        await drain("s-merge")
+        return calls
+
+    assert asyncio.run(scenario()) == ["안녕하세요\n예산은 500만원입니다"]
+
+
+def test_abandon_during_debounce_stops_worker():
+    async def scenario():
+        SessionTurnActor.configure(debounce_ms=200, max_batch=5)
+        calls = []
+        dropped = SessionTurnActor._metrics["dropped_messages"]
+        SessionTurnActor.submit(FakeContext(), "s-abandon", None, message("안녕하세요"), recording_turn(calls))
+        actor = SessionTurnActor._actors["s-abandon"]
+        await asyncio.sleep(0.02)
+
+        SessionTurnActor.abandon("s-abandon")
+        # 워커는 debounce 만료를 기다리지 않고 바로 종료
+        await asyncio.wait_for(actor.worker, 0.1)
+        assert actor.worker.exception() is None
+        assert "s-abandon" not in SessionTurnActor._actors
+        assert SessionTurnActor._metrics["dropped_messages"] == dropped + 1
+        return calls
+
+    assert asyncio.run(scenario()) == []
+
+
+def test_message_after_abandon_runs():
+    async def scenario():
+        SessionTurnActor.configure(debounce_ms=50, max_batch=5)
+        calls = []
+        SessionTurnActor.submit(FakeContext(), "s-rejoin", None, message("첫 메시지"), recording_turn(calls))
+        await asyncio.sleep(0.01)
+        SessionTurnActor.abandon("s-rejoin")
+        # 재접속 후 바로 보낸 메시지는 버려지지 않음
+        SessionTurnActor.submit(FakeContext(), "s-rejoin", None, message("다시 왔습니다"), recording_turn(calls))
+        await drain("s-rejoin")
+        return calls
+
+    assert asyncio.run(scenario()) == ["다시 왔습니다"]
+
+
+def test_abandon_cancels_uncommitted_turn_without_requeue():
+    async def scenario():
+        SessionTurnActor.configure(debounce_ms=10, max_batch=5)
+        calls = []
+        SessionTurnActor.submit(FakeContext(), "s-running", None, message("첫 메시지"), recording_turn(calls, delay=0.2))
+        await asyncio.sleep(0.05)
+        actor = SessionTurnActor._actors["s-running"]
+        assert actor.turn is not None
+        # 새 메시지로 대체가 요청된 직후 세션이 버려지면 되돌려 넣지 않음
+        SessionTurnActor.submit(FakeContext(), "s-running", None, message("두 번째"), recording_turn(calls, delay=0.2))
+        SessionTurnActor.abandon("s-running")
+        await drain("s-running")
+        return calls
+
+    assert asyncio.run(scenario()) == []
+
+
+def test_batches_split_on_sender_change():
+    async def scenario():
+        SessionTurnActor.configure(debounce_ms=30, max_batch=5)
+        calls = []
+        for text, asker in (("갑 첫 메시지", "client"), ("갑 두 번째", "client"), ("을 메시지", "contractor"), ("갑 세 번째", "client")):
+            SessionTurnActor.submit(FakeContext(), "s-roles", None, message(text, asker), recording_turn(calls))
+        await drain("s-roles")
+        return calls
+
+    assert asyncio.run(scenario()) == ["갑 첫 메시지\n갑 두 번째", "을 메시지", "갑 세 번째"]
+
+
+def test_other_sender_does_not_supersede_running_turn():
+    async def scenario():
+        SessionTurnActor.configure(debounce_ms=10, max_batch=5)
+        calls = []
+        superseded = SessionTurnActor._metrics["superseded_turns"]
+        SessionTurnActor.submit(FakeContext(), "s-other", None, message("갑 메시지", "client"), recording_turn(calls, delay=0.05))
+        await asyncio.sleep(0.03)
+        SessionTurnActor.submit(FakeContext(), "s-other", None, message("을 메시지", "contractor"), recording_turn(calls, delay=0.05))
+        await drain("s-other")
+        assert SessionTurnActor._metrics["superseded_turns"] == superseded
+        return calls
+
+    assert asyncio.run(scenario()) == ["갑 메시지", "을 메시지"]
+
+
+def test_abandon_hooks_count_avoided_calls(monkeypatch):
+    monkeypatch.setattr(SessionTurnActor, "_abandon_hooks", [])
+    abandoned = []
+
+    def cancel_background(sid):
+        abandoned.append(sid)
+        return 2
+    SessionTurnActor.add_abandon_hook(cancel_background)
+
+    avoided = SessionTurnActor._metrics["llm_calls_avoided"]
+    # 실행 중인 턴이 없어도 세션의 백그라운드 작업은 취소
+    SessionTurnActor.abandon("s-hooks")
+    assert abandoned == ["s-hooks"]
+    assert SessionTurnActor._metrics["llm_calls_avoided"] == avoided + 2
@@ -0,0 +1,64 @@
+"""
+후속 접속자 대화 이력 테스트 (FakeRedis)
+스트림의 최신 메시지를 시간순으로 보내고, 메시지의 초안 참조를 한 번에 본문으로 복원하는지 확인합니다.
+"""
+import asyncio
+import os
+import sys
+
+import orjson
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("redis")
+pytest.importorskip("langchain_google_genai")
+pytest.importorskip("src.service.conf.gemini_api_key")
+
+# chat_stream_utils는 src 기준 경로(utils.*)로 import (서버는 src에서 실행)
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+import src.service.ai.chat_ws as chat_ws
+import src.utils.redis_blob_utils as blob_utils
+from src.utils.contract_draft_utils import ContractDraftStore
+
+
+async def add_message(fake_redis, sid: str, participant: str, bd: dict):
+    body = {"hd": {"sid": sid, "role": participant}, "bd": bd}
+    await fake_redis.xadd(f"session:chat:{sid}", {"participant": participant, "body": orjson.dumps(body).decode()})
+
+
+def test_late_join_sends_latest_messages_in_order(ctx, fake_redis, monkeypatch):
+    monkeypatch.setattr(chat_ws, "LATE_JOIN_HISTORY_COUNT", 3)
+
+    async def scenario():
+        for i in range(5):
+            await add_message(fake_redis, "s-late", "client", {"text": f"메시지 {i}"})
+        return await chat_ws._load_late_join_history(ctx, "s-late")
+
+    history = asyncio.run(scenario())
+    assert [message["bd"]["text"] for message in history] == ["메시지 2", "메시지 3", "메시지 4"]
+
+
+def test_late_join_resolves_draft_refs_in_one_batch(ctx, fake_redis, monkeypatch):
+    ContractDraftStore._cache.clear()
+    ContractDraftStore._scripts = {}
+    blob_utils._cache.clear()
+    calls = []
+    resolve = ContractDraftStore.resolve.__func__
+
+    async def counting_resolve(cls, ctx, sid, refs):
+        calls.append(list(refs))
+        return await resolve(cls, ctx, sid, refs)
+    monkeypatch.setattr(ContractDraftStore, "resolve", classmethod(counting_resolve))
+
+    async def scenario():
+        for draft in ["초안 1", "초안 2"]:
+            ref = await ContractDraftStore.save(ctx, "s-drafts", draft)
+            await add_message(fake_redis, "s-drafts", "assistant", {"text": "응답", "contract_draft_ref": ref})
+        await add_message(fake_redis, "s-drafts", "client", {"text": "좋습니다"})
+        blob_utils._cache.clear()
+        return await chat_ws._load_late_join_history(ctx, "s-drafts")
+
+    history = asyncio.run(scenario())
+    assert [message["bd"].get("contract_draft") for message in history] == ["초안 1", "초안 2", None]
+    assert len(calls) == 1 and len(calls[0]) == 2
@@ -0,0 +1,121 @@
+"""
+LLM 턴 처리 테스트
+- 단계 진행 시 미리 시작하는 다음 단계 안내 프롬프트에, 요약 전까지 채워 두는 현재 단계 입력이 포함되는지
+- 같은 단계의 턴들이 발화가 달라도 세션 검색 캐시를 재사용하고, 단계가 바뀌면 캐시를 비우는지
+"""
+import asyncio
+import logging
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("redis")
+pytest.importorskip("langchain_google_genai")
+pytest.importorskip("src.service.conf.gemini_api_key")
+
+# chat_stream_utils는 src 기준 경로(utils.*)로 import (서버는 src에서 실행)
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+import src.service.ai.chat_ws as chat_ws
+from src.service.ai.chat_state_manager import ChatStateManager, ChatStep
+from src.service.ai.rag_manager import RAGManager, RAGSessionCache
+
+
+class FakeLLM:
+    """generate 호출의 placeholders를 기록"""
+
+    def __init__(self):
+        self.calls = []
+
+    async def generate(self, prompt, placeholders=None, **kwargs):
+        self.calls.append((prompt, placeholders or {}))
+        return "USER_MESSAGE: 알겠습니다."
+
+    async def classify_response(self, user_response, current_step, placeholders=None):
+        return {"extracted_fields": {}, "next_action": "continue"}
+
+
+@pytest.fixture
+def turn(monkeypatch):
+    """세션 상태/이력/저장소를 메모리로 대체한 턴 실행 환경 (검색은 인덱스 없는 RAGManager로 캐시만 동작)"""
+    env = SimpleNamespace(
+        state=ChatStateManager("s-turn", {"role": "client"}),
+        llm=FakeLLM(),
+        history=[],
+        advance=False,
+    )
+    env.ctx = SimpleNamespace(llm_manager=env.llm, log=logging.getLogger("doq-test"))
+
+    rag = object.__new__(RAGManager)
+    rag.snapshot = None
+    rag.session_cache = RAGSessionCache()
+    rag.initialized = True
+    env.rag = rag
+    monkeypatch.setattr(RAGManager, "_instance", rag)
+
+    async def noop(*args, **kwargs):
+        return None
+
+    async def load_session_info(ctx, sid):
+        return dict.fromkeys(
+            ["client_name", "provider_name", "client_business_number", "client_contact",
+             "provider_business_number", "provider_contact"], ""
+        )
+
+    async def get_state(ctx, sid, hd, session_info):
+        return env.state
+
+    async def history(ctx, sid):
+        return list(env.history), None
+
+    monkeypatch.setattr(chat_ws, "_load_session_info", load_session_info)
+    monkeypatch.setattr(chat_ws, "_get_or_create_state", get_state)
+    monkeypatch.setattr(chat_ws, "_send_session", noop)
+    monkeypatch.setattr(chat_ws, "store_chat_message", noop)
+    monkeypatch.setattr(chat_ws, "_evaluate_step_advance_rules", lambda *args: {
+        "advance": env.advance, "reason": "test", "source": "pattern", "decided_by": "rules"
+    })
+    monkeypatch.setattr(chat_ws.ChatHistoryCache, "get", history)
+    monkeypatch.setattr(chat_ws.ContractDraftStore, "get", noop)
+    monkeypatch.setattr(chat_ws.ContractDraftStore, "save", noop)
+    monkeypatch.setattr(chat_ws.SessionStateCache, "save", noop)
+    monkeypatch.setattr(chat_ws.StepSummaryQueue, "wait", noop)
+    monkeypatch.setattr(chat_ws.StepSummaryQueue, "submit", lambda *args: None)
+
+    def run(text: str):
+        msg = {"sid": "s-turn", "hd": {"role": "client", "asker": "client"}, "bd": {"text": text}}
+        asyncio.run(chat_ws._run_llm_invocation(env.ctx, None, msg))
+    env.run = run
+    return env
+
+
+def test_transition_prompt_includes_saved_step_input(turn):
+    turn.state.current_step = ChatStep.WORK_PERIOD
+    turn.advance = True
+    # llm.trigger 요청: user_query가 비어 있어 직전 사용자 발화로 대체
+    turn.history = ["client(의뢰인(갑)): 작업 기간은 3개월로 하죠"]
+    turn.run("")
+
+    transitions = [placeholders for _, placeholders in turn.llm.calls if placeholders.get("current_step") == ChatStep.BUDGET.value]
+    assert len(transitions) == 1
+    assert transitions[0]["previous_step"] == ChatStep.WORK_PERIOD.value
+    assert "- work_period: 작업 기간은 3개월로 하죠" in transitions[0]["collected_fields_summary"]
+    assert turn.state.current_step == ChatStep.BUDGET
+
+
+def test_turns_in_same_step_reuse_retrieval(turn):
+    turn.state.current_step = ChatStep.BUDGET
+    cache = turn.rag.session_cache
+    for text in ["500만원 정도 생각하고 있어요", "부가세 별도로 해주세요", "계약금은 30%로 하죠", "잔금은 납품 후에요"]:
+        turn.run(text)
+    assert (cache.misses, cache.hits) == (1, 3)
+
+    # 단계 전환 시 이전 단계 캐시를 비우고 다음 단계 기준으로 한 번 검색
+    turn.advance = True
+    turn.run("좋아요, 다음으로 넘어가죠")
+    assert turn.state.current_step == ChatStep.REVISIONS
+    assert (cache.misses, cache.hits) == (2, 3)
+    assert cache._sessions["s-turn"][0] == ChatStep.REVISIONS.value
@@ -0,0 +1,86 @@
+"""
+계약서 초안 저장소 테스트 (FakeRedis)
+초안 blob이 세션별로 저장되어 다른 세션에서 조회되지 않고, 만료가 있으면 저장할 때마다
+포인터/버전 집합/세션의 모든 blob 만료가 함께 갱신되는지(차분 부모가 먼저 사라지지 않는지) 확인합니다.
+"""
+import asyncio
+
+import pytest
+
+pytest.importorskip("redis")
+
+import src.utils.redis_blob_utils as blob_utils
+from src.utils.contract_draft_utils import ContractDraftStore, DRAFT_PREFIX, DRAFT_VERSIONS_PREFIX
+
+TTL_SEC = 3600
+DRAFTS = [
+    "제1조 (목적) 본 계약은 로고 디자인 용역에 관한 사항을 정한다.\n제2조 (기간) 미기재",
+    "제1조 (목적) 본 계약은 로고 디자인 용역에 관한 사항을 정한다.\n제2조 (기간) 2026-01-01 ~ 2026-03-31",
+    "제1조 (목적) 본 계약은 로고 디자인 용역에 관한 사항을 정한다.\n제2조 (기간) 2026-01-01 ~ 2026-03-31\n제3조 (대금) 500만원",
+]
+
+
+@pytest.fixture
+def draft_store():
+    def reset(ttl_sec=0):
+        ContractDraftStore._cache.clear()
+        ContractDraftStore._scripts = {}
+        ContractDraftStore.configure(ttl_sec=ttl_sec)
+        blob_utils._cache.clear()
+
+    reset(TTL_SEC)
+    yield ContractDraftStore
+    reset()
+
+
+def blob_key(sid: str, sha: str) -> str:
+    return blob_utils.redis_blob_key(ContractDraftStore.namespace(sid), sha)
+
+
+def test_save_refreshes_whole_delta_chain(ctx, fake_redis, draft_store):
+    async def scenario():
+        return [await draft_store.save(ctx, "s-draft", draft) for draft in DRAFTS]
+
+    refs = asyncio.run(scenario())
+    assert [ref["version"] for ref in refs] == [1, 2, 3]
+
+    # 두 번째 버전부터 같은 세션의 직전 버전을 부모로 한 차분
+    depth, parent, _ = blob_utils.parse_blob(fake_redis.data[blob_key("s-draft", refs[1]["sha256"])])
+    assert (depth, parent) == (1, refs[0]["sha256"])
+
+    fake_redis.ttls.clear()
+    asyncio.run(draft_store.save(ctx, "s-draft", DRAFTS[-1]))
+    keys = [f"{DRAFT_PREFIX}s-draft", f"{DRAFT_VERSIONS_PREFIX}s-draft"] + [blob_key("s-draft", ref["sha256"]) for ref in refs]
+    assert {key: fake_redis.ttls.get(key) for key in keys} == dict.fromkeys(keys, TTL_SEC)
+
+
+def test_draft_versions_are_scoped_to_session(ctx, fake_redis, draft_store):
+    async def scenario():
+        ref = await draft_store.save(ctx, "s-owner", DRAFTS[0])
+        blob_utils._cache.clear()
+        return (
+            ref,
+            await draft_store.get_version(ctx, "s-owner", ref["sha256"]),
+            await draft_store.get_version(ctx, "s-other", ref["sha256"]),
+            await draft_store.resolve(ctx, "s-other", [ref]),
+        )
+
+    ref, own, other, other_resolved = asyncio.run(scenario())
+    assert own == DRAFTS[0]
+    assert other is None
+    assert ref["sha256"] not in other_resolved
+
+
+def test_stale_parent_is_not_used_for_delta(ctx, fake_redis, draft_store):
+    async def scenario():
+        first = await draft_store.save(ctx, "s-stale", DRAFTS[0])
+        # 이 워커가 만료를 갱신한 지 오래되어 부모 blob이 남아 있다고 보장할 수 없음
+        version, sha256, _ = draft_store._cache["s-stale"]
+        draft_store._cache["s-stale"] = (version, sha256, 0.0)
+        second = await draft_store.save(ctx, "s-stale", DRAFTS[1])
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    depth, parent, _ = blob_utils.parse_blob(fake_redis.data[blob_key("s-stale", second["sha256"])])
+    assert (depth, parent) == (0, None)
+    assert second["version"] == first["version"] + 1
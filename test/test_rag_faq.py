@@ -0,0 +1,38 @@
+"""
+FAQ 매칭 테스트
+질문 표지가 없는 발화(조건 제시/동의)는 FAQ 질문과 단어가 겹쳐도 미리 생성된 답변으로 응답하지 않는지 확인합니다.
+질문 표지 사전 필터가 '~할까' 같은 완성형 의문형 어미를 놓치지 않는지도 확인합니다.
+"""
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.service.ai.rag_faq import FAQMatcher, has_question_marker
+
+ENTRIES = [{
+    "id": "warranty_period",
+    "step": "warranty",
+    "questions": ["하자보수 기간은 보통 얼마나 되나요?", "하자보수 기간이 뭔가요?"],
+    "answer": "통상 검수 완료 후 1년입니다.",
+}]
+
+
+def test_question_matches_faq():
+    matcher = FAQMatcher(ENTRIES)
+    match = matcher.match("하자보수 기간은 보통 얼마나 되나요", step="warranty")
+    assert match is not None and match["id"] == "warranty_period"
+
+
+def test_statement_does_not_match_faq():
+    # 유사도만으로는 걸리는 임계값에서도 질문 표지가 없으면 매칭하지 않음
+    matcher = FAQMatcher(ENTRIES, min_similarity=0.4)
+    assert matcher.match("하자보수 기간은 1년으로 하겠습니다.", step="warranty") is None
+    assert matcher.match("하자보수 기간 1년", step="warranty") is None
+
+
+def test_rieul_kka_endings_are_question_markers():
+    for text in ["그럼 검수는 다음 주에 할까", "시안은 두 개로 갈까...", "수정 횟수는 세 번으로 볼까요", "계약금부터 정할까!"]:
+        assert has_question_marker(text), text
+    for text in ["계약금은 30%로 하겠습니다", "납품은 다음 달까지", "잔금은 완료 후 지급할게요"]:
+        assert not has_question_marker(text), text
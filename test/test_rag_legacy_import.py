@@ -0,0 +1,43 @@
+"""
+이전 형식(LangChain FAISS) 인덱스 변환 테스트
+저장소에 포함된 faiss_index/index.faiss + index.pkl을 임베딩 API 호출 없이 현재 형식으로 옮기는지 확인합니다.
+"""
+import os
+import sys
+import shutil
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.service.ai.rag_index_builder import RAGIndexBuilder
+from src.service.ai.rag_store import read_current_version
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class NoEmbeddings:
+    def embed_documents(self, texts):
+        raise AssertionError("legacy import must not call the embedding API")
+
+
+def test_import_legacy_without_embedding(tmp_path):
+    index_path = str(tmp_path / "faiss_index")
+    shutil.copytree(os.path.join(ROOT, "faiss_index"), index_path)
+    builder = RAGIndexBuilder(os.path.join(ROOT, "reference"), index_path, NoEmbeddings())
+
+    snapshot = builder.import_legacy()
+
+    assert snapshot is not None
+    assert read_current_version(index_path) == snapshot.version
+    names = {entry["name"] for entry in snapshot.manifest["files"]}
+    assert names == set(builder.scan_reference_files())
+    assert snapshot.index.ntotal == sum(entry["count"] for entry in snapshot.manifest["files"])
+
+    # 변환 직후 빌드는 변경 없음 (재임베딩 없이 그대로 사용)
+    assert builder.build(snapshot) is snapshot
+
+    query = np.array(snapshot.vectors[0])
+    score, idx = snapshot.search(query, 1)[0]
+    assert idx == 0 and score > 0.99
+    snapshot.close()
@@ -0,0 +1,71 @@
+"""
+RAG 구조화 검색 결과 테스트
+search_hits가 유사도 임계값 미만 조항을 제외하고, RAGHit에 조항 번호/점수/본문/출처 페이지를 담는지 확인합니다.
+"""
+import numpy as np
+import pytest
+
+pytest.importorskip("langchain_google_genai")
+pytest.importorskip("src.service.conf.gemini_api_key")
+
+from src.service.ai.rag_manager import RAGHit, RAGManager, RAGSessionCache
+from src.service.ai.rag_store import RAGIndexSnapshot, write_snapshot
+
+TEXTS = ["제1조 계약금은 총액의 30%로 한다.", "제2조 저작권은 의뢰인에게 귀속된다.", "제3조 하자보수 기간은 1년으로 한다."]
+
+
+class FakeEmbeddings:
+    """쿼리별로 정해진 벡터를 반환 (조항 i는 i번째 축)"""
+
+    QUERIES = {
+        "계약금": [1.0, 0.0, 0.0, 0.0],
+        "저작권과 계약금": [0.6, 0.8, 0.0, 0.0],
+        "네, 좋습니다": [0.0, 0.0, 0.0, 1.0],
+    }
+
+    def embed_query(self, query):
+        return self.QUERIES[query]
+
+
+@pytest.fixture
+def manager(tmp_path):
+    vectors = np.eye(3, 4, dtype="float32")
+    metadatas = [{"source": "계약서.pdf", "page": page, "topics": 0} for page in (1, 2, 5)]
+    files = [{"name": "계약서.pdf", "sha256": "0", "start": 0, "count": 3}]
+    write_snapshot(str(tmp_path), vectors, TEXTS, metadatas, files)
+
+    rag = object.__new__(RAGManager)
+    rag.snapshot = RAGIndexSnapshot.open(str(tmp_path))
+    rag.embeddings = FakeEmbeddings()
+    rag.min_score = 0.5
+    rag.session_cache = RAGSessionCache()
+    yield rag
+    rag.snapshot.close()
+
+
+def test_hits_carry_chunk_fields(manager):
+    [hit] = manager.search_hits("계약금", k=3)
+    assert isinstance(hit, RAGHit)
+    assert (hit.chunk_id, hit.text, hit.source, hit.page) == (0, TEXTS[0], "계약서.pdf", 1)
+    assert hit.score == pytest.approx(1.0, abs=1e-5)
+
+
+def test_threshold_filters_weak_matches(manager):
+    hits = manager.search_hits("저작권과 계약금", k=3)
+    assert [hit.chunk_id for hit in hits] == [1, 0]
+    assert [round(hit.score, 2) for hit in hits] == [0.8, 0.6]
+
+    # 호출별 min_score가 설정값보다 우선
+    assert [hit.chunk_id for hit in manager.search_hits("저작권과 계약금", k=3, min_score=0.7)] == [1]
+    assert len(manager.search_hits("저작권과 계약금", k=3, min_score=0.0)) == 3
+
+
+def test_irrelevant_turn_skips_injection(manager):
+    assert manager.search_hits("네, 좋습니다", k=3) == []
+    assert manager.search("네, 좋습니다", k=3) == ""
+
+
+def test_closed_snapshot_is_not_retried_forever(manager):
+    # 교체되지 않은 채 닫힌 스냅샷(종료 중 등)은 검색을 생략
+    manager.snapshot.close()
+    assert manager.search_hits("계약금", k=3) == []
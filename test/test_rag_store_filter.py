@@ -0,0 +1,68 @@
+"""
+주제 필터 검색 테스트
+필터 대상이 EXACT_FILTER_LIMIT보다 크면 ID selector로 ANN 인덱스에서 직접 거르는지 확인합니다.
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.service.ai import rag_store
+from src.service.ai.rag_store import RAGIndexSnapshot, normalize_vectors, write_snapshot
+
+N, DIM = 3000, 32
+
+
+@pytest.fixture(scope="module")
+def corpus():
+    rng = np.random.default_rng(7)
+    vectors = normalize_vectors(rng.standard_normal((N, DIM)).astype("float32"))
+    masks = 1 << rng.integers(0, 3, N)
+    queries = normalize_vectors(rng.standard_normal((20, DIM)).astype("float32"))
+    return vectors, masks, queries
+
+
+def open_snapshot(tmp_path, vectors, masks, index_type):
+    metadatas = [{"source": "a.pdf", "page": 0, "topics": int(mask)} for mask in masks]
+    files = [{"name": "a.pdf", "sha256": "0", "start": 0, "count": N}]
+    params = {"type": index_type}
+    write_snapshot(str(tmp_path), vectors, [str(i) for i in range(N)], metadatas, files, params, {})
+    return RAGIndexSnapshot.open(str(tmp_path), params)
+
+
+@pytest.mark.parametrize("index_type", ["flat", "hnsw"])
+def test_selector_search_stays_inside_topic(tmp_path, monkeypatch, corpus, index_type):
+    vectors, masks, queries = corpus
+    snapshot = open_snapshot(tmp_path, vectors, masks, index_type)
+    monkeypatch.setattr(rag_store, "EXACT_FILTER_LIMIT", 0)
+    subset = np.flatnonzero(masks & 1)
+
+    recalls = []
+    for query in queries:
+        hits = snapshot.search(query, 5, topic_mask=1)
+        assert len(hits) == 5
+        assert all(masks[idx] & 1 for _, idx in hits)
+        exact = subset[np.argsort(-(vectors[subset] @ query))[:5]]
+        recalls.append(len(set(exact) & {idx for _, idx in hits}) / 5)
+
+    if index_type == "flat":
+        assert min(recalls) == 1.0
+    else:
+        assert np.mean(recalls) >= 0.8
+    snapshot.close()
+
+
+def test_small_subset_uses_exact_search(tmp_path, corpus):
+    vectors, masks, queries = corpus
+    snapshot = open_snapshot(tmp_path, vectors, masks, "hnsw")
+    subset = np.flatnonzero(masks & 2)
+    assert len(subset) <= rag_store.EXACT_FILTER_LIMIT
+
+    hits = snapshot.search(queries[0], 3, topic_mask=2)
+    exact = subset[np.argsort(-(vectors[subset] @ queries[0]))[:3]]
+    assert [idx for _, idx in hits] == exact.tolist()
+    assert not snapshot._topic_params
+    snapshot.close()
@@ -0,0 +1,66 @@
+"""
+RAG 인덱스 버전 관리 테스트
+같은 초에 연속 빌드해도 생성 순서대로 정리되는지, 워커가 열어 둔 버전은 지우지 않는지,
+교체된 스냅샷이 진행 중인 검색이 끝난 뒤 닫히는지 확인합니다.
+"""
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.service.ai.rag_store import KEEP_VERSIONS, MANIFEST_FILE, RAGIndexSnapshot, read_current_version, write_snapshot
+
+
+def write_version(index_path: str, seed: int) -> str:
+    vectors = np.random.default_rng(seed).standard_normal((4, 8)).astype("float32")
+    metadatas = [{"source": "a.pdf", "page": 0} for _ in range(4)]
+    files = [{"name": "a.pdf", "sha256": str(seed), "start": 0, "count": 4}]
+    return write_snapshot(index_path, vectors, ["a", "b", "c", "d"], metadatas, files)
+
+
+def list_versions(index_path: str):
+    return sorted(name for name in os.listdir(index_path) if os.path.exists(os.path.join(index_path, name, MANIFEST_FILE)))
+
+
+def test_versions_are_ordered_within_same_second(tmp_path):
+    index_path = str(tmp_path)
+    written = [write_version(index_path, seed) for seed in range(5)]
+
+    assert written == sorted(written)
+    assert len(set(written)) == len(written)
+    assert read_current_version(index_path) == written[-1]
+    assert list_versions(index_path) == written[-KEEP_VERSIONS:]
+
+
+def test_open_version_is_not_pruned(tmp_path):
+    index_path = str(tmp_path)
+    write_version(index_path, 0)
+    in_use = RAGIndexSnapshot.open(index_path)
+
+    for seed in range(1, 4):
+        write_version(index_path, seed)
+    assert in_use.version in list_versions(index_path)
+    assert len(in_use.chunks.text(0)) == 1
+
+    in_use.close()
+    latest = write_version(index_path, 4)
+    assert in_use.version not in list_versions(index_path)
+    assert list_versions(index_path)[-1] == latest
+
+
+def test_retired_snapshot_closes_after_last_search(tmp_path):
+    index_path = str(tmp_path)
+    write_version(index_path, 0)
+    snapshot = RAGIndexSnapshot.open(index_path)
+
+    assert snapshot.acquire()
+    snapshot.retire()
+    # 교체 후에도 진행 중인 검색은 끝까지 사용
+    assert snapshot.chunks.text(1) == "b"
+    assert snapshot.index is not None
+
+    snapshot.release()
+    assert snapshot.index is None
+    assert not snapshot.acquire()
@@ -0,0 +1,73 @@
+"""
+세션 상태 CAS 저장 테스트 (FakeRedis)
+다른 워커가 먼저 기록한 경우 원격 상태 위에 로컬 변경분을 rebase하는지, 충돌이 계속되면 변경분을 유지하는지 확인합니다.
+"""
+import asyncio
+
+import orjson
+import pytest
+
+pytest.importorskip("redis")
+
+from src.service.ai.chat_state_manager import ChatStateManager
+
+
+def stored_data(fake_redis, sid: str) -> dict:
+    return orjson.loads(fake_redis.data[f"session:chat_state:{sid}"]["collected_data"])
+
+
+def stored_rev(fake_redis, sid: str) -> int:
+    return int(fake_redis.data[f"session:chat_state:{sid}"]["rev"])
+
+
+async def create_session(cache, ctx, sid: str) -> ChatStateManager:
+    manager = ChatStateManager(sid)
+    await cache.save(manager, ctx)
+    return manager
+
+
+def test_cas_conflict_rebases_onto_remote(ctx, fake_redis, session_cache):
+    async def scenario():
+        local = await create_session(session_cache, ctx, "s-cas")
+        # 다른 워커가 같은 rev에서 읽어 먼저 기록
+        other = ChatStateManager.from_redis(await fake_redis.hgetall("session:chat_state:s-cas"))
+        other.update_data("budget", "500만원")
+        await session_cache._save_to_redis(ctx, other)
+
+        conflicts = session_cache._metrics["cas_conflicts"]
+        local.update_data("work_scope", "랜딩 페이지 디자인")
+        await session_cache.save(local, ctx)
+        return local, conflicts
+
+    local, conflicts = asyncio.run(scenario())
+    assert session_cache._metrics["cas_conflicts"] == conflicts + 1
+    data = stored_data(fake_redis, "s-cas")
+    assert data["budget"] == "500만원"
+    assert data["work_scope"] == "랜딩 페이지 디자인"
+    assert local.collected_data["budget"] == "500만원"
+    assert local.revision == stored_rev(fake_redis, "s-cas") == 3
+    assert not local.has_changes()
+
+
+def test_cas_keeps_changes_when_conflicts_persist(ctx, fake_redis, session_cache):
+    async def scenario():
+        local = await create_session(session_cache, ctx, "s-busy")
+        original = fake_redis._cas_save
+
+        async def always_conflict(keys, args):
+            # 매 시도마다 다른 워커가 먼저 기록
+            await fake_redis.hincrby(keys[0], "rev", 1)
+            return await original(keys, args)
+        fake_redis._cas_save = always_conflict
+        session_cache._cas_scripts.clear()
+
+        failures = session_cache._metrics["cas_failures"]
+        local.update_data("budget", "300만원")
+        await session_cache.save(local, ctx)
+        return local, failures
+
+    local, failures = asyncio.run(scenario())
+    assert session_cache._metrics["cas_failures"] == failures + 1
+    assert stored_data(fake_redis, "s-busy")["budget"] is None
+    # 다음 저장에서 다시 시도하도록 변경분 유지
+    assert local.has_changes()
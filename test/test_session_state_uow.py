@@ -0,0 +1,115 @@
+"""
+세션 상태 unit_of_work 테스트 (FakeRedis)
+턴 안의 저장이 턴 종료 시(예외 포함) 한 번에 순서대로 기록되고, 긴 턴은 flush_after_ms 타이머로 기록되는지 확인합니다.
+"""
+import asyncio
+
+import orjson
+import pytest
+
+pytest.importorskip("redis")
+
+from src.service.ai.chat_state_manager import ChatStateManager
+
+
+def stored_data(fake_redis, sid: str) -> dict:
+    return orjson.loads(fake_redis.data[f"session:chat_state:{sid}"]["collected_data"])
+
+
+def stored_rev(fake_redis, sid: str) -> int:
+    return int(fake_redis.data[f"session:chat_state:{sid}"]["rev"])
+
+
+async def create_session(cache, ctx, sid: str) -> ChatStateManager:
+    manager = ChatStateManager(sid)
+    await cache.save(manager, ctx)
+    return manager
+
+
+def test_unit_of_work_defers_saves_until_turn_end(ctx, fake_redis, session_cache):
+    async def scenario():
+        manager = await create_session(session_cache, ctx, "s-uow")
+        rev_before = stored_rev(fake_redis, "s-uow")
+        calls_before = fake_redis.script_calls
+
+        async with session_cache.unit_of_work("s-uow", ctx):
+            manager.update_data("budget", "500만원")
+            manager.add_role_input("client", "예산은 500만원입니다")
+            await session_cache.save(manager, ctx)
+            async with session_cache.unit_of_work("s-uow", ctx):
+                manager.update_data("work_period", "3개월")
+                manager.add_role_input("provider", "기간은 3개월로 하죠")
+                await session_cache.save(manager, ctx)
+            # 중첩 블록 종료로는 기록하지 않음
+            assert stored_rev(fake_redis, "s-uow") == rev_before
+            assert fake_redis.script_calls == calls_before
+        return rev_before, calls_before
+
+    rev_before, calls_before = asyncio.run(scenario())
+    assert fake_redis.script_calls == calls_before + 1
+    assert stored_rev(fake_redis, "s-uow") == rev_before + 1
+    data = stored_data(fake_redis, "s-uow")
+    assert (data["budget"], data["work_period"]) == ("500만원", "3개월")
+    inputs = [orjson.loads(item)["text"] for item in fake_redis.data["session:chat_inputs:s-uow"]]
+    assert inputs == ["예산은 500만원입니다", "기간은 3개월로 하죠"]
+    assert "s-uow" not in session_cache._pending
+
+
+def test_unit_of_work_flushes_on_error(ctx, fake_redis, session_cache):
+    async def scenario():
+        manager = await create_session(session_cache, ctx, "s-error")
+        try:
+            async with session_cache.unit_of_work("s-error", ctx):
+                manager.update_data("budget", "100만원")
+                await session_cache.save(manager, ctx)
+                raise RuntimeError("turn failed")
+        except RuntimeError:
+            pass
+
+    asyncio.run(scenario())
+    assert stored_data(fake_redis, "s-error")["budget"] == "100만원"
+
+
+def test_long_turn_is_flushed_by_timer(ctx, fake_redis, session_cache):
+    async def scenario():
+        session_cache._flush_after_ms, flush_after_ms = 20, session_cache._flush_after_ms
+        try:
+            manager = await create_session(session_cache, ctx, "s-timer")
+            async with session_cache.unit_of_work("s-timer", ctx):
+                manager.update_data("budget", "700만원")
+                await session_cache.save(manager, ctx)
+                await asyncio.sleep(0.1)
+                # 턴이 끝나기 전에 flush_after_ms 타이머로 기록됨
+                assert stored_data(fake_redis, "s-timer")["budget"] == "700만원"
+        finally:
+            session_cache._flush_after_ms = flush_after_ms
+
+    asyncio.run(scenario())
+
+
+def test_pending_state_survives_eviction(ctx, fake_redis, session_cache):
+    async def scenario():
+        max_entries = session_cache._max_entries
+        session_cache._max_entries = 1
+        try:
+            manager = await create_session(session_cache, ctx, "s-pending")
+            async with session_cache.unit_of_work("s-pending", ctx):
+                manager.update_data("budget", "500만원")
+                await session_cache.save(manager, ctx)
+                # 같은 턴 안에서 다른 세션이 캐시에 들어와도 기록 대기 세션 대신 다른 세션을 제거
+                await create_session(session_cache, ctx, "s-other")
+                assert list(session_cache._cache) == ["s-pending"]
+
+                # 캐시에서 빠졌더라도 get()은 Redis의 이전 상태 대신 기록 대기 상태를 반환
+                session_cache._remove("s-pending")
+                loaded = await session_cache.get("s-pending", ctx)
+                assert loaded is manager
+                assert loaded.collected_data["budget"] == "500만원"
+            # 턴 종료 후 기록되면 다시 제거 대상
+            await create_session(session_cache, ctx, "s-other")
+            assert list(session_cache._cache) == ["s-other"]
+        finally:
+            session_cache._max_entries = max_entries
+
+    asyncio.run(scenario())
+    assert stored_data(fake_redis, "s-pending")["budget"] == "500만원"
@@ -0,0 +1,125 @@
+"""
+단계 요약 큐 테스트 (FakeRedis)
+요약은 제출 순서대로 반영되고, 요약을 기다리는 사이 필드가 바뀌면(stale) 덮어쓰지 않는지 확인합니다.
+"""
+import asyncio
+
+import orjson
+import pytest
+
+pytest.importorskip("redis")
+
+from src.service.ai.chat_state_manager import ChatStateManager
+from src.service.ai.step_summary_queue import StepSummaryQueue
+
+
+class FakeLLM:
+    """target_field별 지연 후 요약 값을 반환하는 generate"""
+
+    def __init__(self, delays: dict):
+        self.delays = delays
+
+    async def generate(self, prompt, placeholders=None, **kwargs):
+        field = placeholders["target_field"]
+        await asyncio.sleep(self.delays.get(field, 0.0))
+        return f'```json\n{{"extracted_value": "{field} 요약"}}\n```'
+
+
+def stored_data(fake_redis, sid: str) -> dict:
+    return orjson.loads(fake_redis.data[f"session:chat_state:{sid}"]["collected_data"])
+
+
+async def create_session(cache, ctx, sid: str, **data) -> ChatStateManager:
+    manager = ChatStateManager(sid)
+    for key, value in data.items():
+        manager.update_data(key, value)
+    await cache.save(manager, ctx)
+    return manager
+
+
+def test_stale_summary_is_dropped(ctx, fake_redis, session_cache):
+    async def scenario():
+        ctx.llm_manager = FakeLLM({"budget": 0.05})
+        manager = await create_session(session_cache, ctx, "s-stale", budget="500만원 정도")
+        stale = StepSummaryQueue._metrics["stale"]
+
+        StepSummaryQueue.submit(ctx, "s-stale", "budget", "budget", "500만원 정도", "대화")
+        # 요약이 끝나기 전 다음 턴에서 사용자가 값을 바꿈
+        manager.update_data("budget", "700만원")
+        await session_cache.save(manager, ctx)
+
+        assert await StepSummaryQueue.wait(ctx, "s-stale")
+        return stale
+
+    stale = asyncio.run(scenario())
+    assert StepSummaryQueue._metrics["stale"] == stale + 1
+    assert stored_data(fake_redis, "s-stale")["budget"] == "700만원"
+
+
+def test_summaries_apply_in_submit_order(ctx, fake_redis, session_cache, monkeypatch):
+    async def scenario():
+        # 먼저 제출한 요약이 더 늦게 끝나도 제출 순서대로 반영
+        ctx.llm_manager = FakeLLM({"work_scope": 0.08, "budget": 0.01})
+        await create_session(session_cache, ctx, "s-order", work_scope="디자인 작업", budget="500")
+        applied = StepSummaryQueue._metrics["applied"]
+        order = []
+        original = session_cache.save
+
+        async def recording_save(manager, ctx=None):
+            order.append(dict(manager.collected_data))
+            await original(manager, ctx)
+        monkeypatch.setattr(session_cache, "save", recording_save)
+
+        StepSummaryQueue.submit(ctx, "s-order", "work_scope", "work_scope", "디자인 작업", "대화")
+        StepSummaryQueue.submit(ctx, "s-order", "budget", "budget", "500", "대화")
+        assert await StepSummaryQueue.wait(ctx, "s-order")
+        return applied, order
+
+    applied, order = asyncio.run(scenario())
+    assert StepSummaryQueue._metrics["applied"] == applied + 2
+    assert [(entry["work_scope"], entry["budget"]) for entry in order] == [
+        ("work_scope 요약", "500"),
+        ("work_scope 요약", "budget 요약"),
+    ]
+    assert "s-order" not in StepSummaryQueue._jobs
+
+
+def test_wait_times_out_and_keeps_fallback(ctx, fake_redis, session_cache):
+    async def scenario():
+        ctx.llm_manager = FakeLLM({"budget": 0.2})
+        await create_session(session_cache, ctx, "s-slow", budget="500만원 정도")
+        StepSummaryQueue.configure(wait_sec=0.02)
+        try:
+            StepSummaryQueue.submit(ctx, "s-slow", "budget", "budget", "500만원 정도", "대화")
+            finished = await StepSummaryQueue.wait(ctx, "s-slow")
+            fallback = stored_data(fake_redis, "s-slow")["budget"]
+            await StepSummaryQueue.shutdown()
+        finally:
+            StepSummaryQueue.configure()
+        return finished, fallback
+
+    finished, fallback = asyncio.run(scenario())
+    assert not finished
+    assert fallback == "500만원 정도"
+
+
+def test_cancel_on_abandon_keeps_fallback(ctx, fake_redis, session_cache):
+    async def scenario():
+        ctx.llm_manager = FakeLLM({"work_scope": 0.0, "budget": 0.5})
+        await create_session(session_cache, ctx, "s-left", work_scope="디자인 작업", budget="500만원 정도")
+        cancelled = StepSummaryQueue._metrics["cancelled"]
+
+        StepSummaryQueue.submit(ctx, "s-left", "work_scope", "work_scope", "디자인 작업", "대화")
+        StepSummaryQueue.submit(ctx, "s-left", "budget", "budget", "500만원 정도", "대화")
+        await asyncio.sleep(0.02)
+        # 요약 값을 이미 받은 작업은 반영하고, LLM 호출 중인 작업만 취소
+        avoided = StepSummaryQueue.cancel("s-left")
+        assert await StepSummaryQueue.wait(ctx, "s-left")
+        return avoided, cancelled
+
+    avoided, cancelled = asyncio.run(scenario())
+    assert avoided == 1
+    assert StepSummaryQueue._metrics["cancelled"] == cancelled + 1
+    assert stored_data(fake_redis, "s-left")["work_scope"] == "work_scope 요약"
+    assert stored_data(fake_redis, "s-left")["budget"] == "500만원 정도"
+    assert "s-left" not in StepSummaryQueue._summarizing
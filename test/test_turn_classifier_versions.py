@@ -0,0 +1,30 @@
+"""
+턴 분류기 모델 버전 테스트
+같은 초에 여러 번 학습해도 버전 순서가 유지되고, 이전 형식(YYYYmmddHHMMSS) 버전보다 새 버전이 남는지 확인합니다.
+"""
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.service.ai.turn_classifier import KEEP_VERSIONS, META_FILE, read_current_version, write_model
+
+
+def model(seed: int):
+    return {"question": (np.full(8, seed, dtype=np.float32), 0.0)}
+
+
+def test_versions_are_ordered_and_newest_kept(tmp_path):
+    model_dir = str(tmp_path)
+    # 이전 형식 이름은 ns 이름보다 앞에 정렬되어 먼저 정리됨
+    legacy = os.path.join(model_dir, "29991231235959-legacy00")
+    os.makedirs(legacy)
+    with open(os.path.join(legacy, META_FILE), "w") as f:
+        f.write("{}")
+
+    versions = [write_model(model_dir, model(seed), {}) for seed in range(KEEP_VERSIONS + 1)]
+    assert versions == sorted(versions)
+    assert read_current_version(model_dir) == versions[-1]
+    assert sorted(os.listdir(model_dir)) == sorted(versions[-KEEP_VERSIONS:] + ["CURRENT"])
@@ -0,0 +1,40 @@
+"""
+턴 판단 로그 테스트
+기본 설정에서는 사용자 원문 대신 해시된 n-gram 특징만 기록되고, 그 특징으로 원문과 같은 학습 입력을 얻는지 확인합니다.
+"""
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.service.ai.turn_classifier import DEFAULT_DIM, TurnDecisionLog, featurize, sample_features
+
+
+def test_hashed_log_omits_raw_text(tmp_path):
+    path = str(tmp_path / "turn_decisions.jsonl")
+    log = TurnDecisionLog(path)
+    log.record("question", "계약금은 보통 얼마인가요?", "payment", True, llm_ms=120.0)
+    log.close()
+
+    with open(path, "rb") as f:
+        content = f.read().decode("utf-8")
+    assert "계약금" not in content
+
+    [entry] = TurnDecisionLog.read(path)
+    for dim in (DEFAULT_DIM, 1 << 12):
+        ids, values = sample_features(entry, dim)
+        expected_ids, expected_values = featurize("계약금은 보통 얼마인가요?", "payment", dim)
+        assert np.array_equal(ids, expected_ids)
+        assert np.allclose(values, expected_values)
+
+
+def test_raw_text_is_opt_in(tmp_path):
+    path = str(tmp_path / "turn_decisions.jsonl")
+    log = TurnDecisionLog(path, raw_text=True)
+    log.record("step_advance", "네 좋습니다", "payment", True, llm_ms=80.0)
+    log.close()
+
+    [entry] = TurnDecisionLog.read(path)
+    assert entry["text"] == "네 좋습니다"